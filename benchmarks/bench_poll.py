@@ -0,0 +1,130 @@
+"""Scaling benchmark of RaritanPDU.update_data against simulated PDUs on the local host.
+
+Run from anywhere with the Home Assistant requirements installed, e.g.
+
+    python benchmarks/bench_poll.py --outlets 8 24 48 --pdus 1 10 100 --polls 20
+
+Every poll advances the simulated readings first, so the values change between polls like on a real PDU. Reported per
+poll of all PDUs: wall time (median and p95), CPU time of the process, requests and bytes on the wire (both
+directions), and the memory allocated by the integration per outlet once the PDUs are set up.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # the MIB directories are relative to the Home Assistant configuration directory
+
+from custom_components.raritan.const import MAX_CONCURRENT_POLLS  # noqa: E402
+from custom_components.raritan.mib import async_get_mib_store  # noqa: E402
+from custom_components.raritan.raritan_pdu import RaritanPDU  # noqa: E402
+from simulator import SimulatedRaritanPDU, start_agent  # noqa: E402
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_case(args, outlet_count: int, pdu_count: int) -> dict:
+    """Poll pdu_count simulated PDUs with outlet_count outlets each, return the measurements of one case."""
+    mib_store = await async_get_mib_store()
+    simulators = [SimulatedRaritanPDU(mib_store.mib_builder, name=f"sim-{i}", outlets=outlet_count,
+                                      inlets=args.inlets, circuit_breakers=args.circuit_breakers, seed=i)
+                  for i in range(pdu_count)]
+    agents = [await start_agent(simulator, latency=args.latency, packet_loss=args.packet_loss,
+                                max_response_size=args.max_response_size, seed=i)
+              for i, simulator in enumerate(simulators)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def poll(pdu: RaritanPDU):
+        async with semaphore:
+            await pdu.update_data()
+
+    try:
+        # Memory of the PDUs after the first poll, which fetches every tier and builds the request plans
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        pdus = [RaritanPDU("127.0.0.1", port, "public", "private", max_repetitions=args.max_repetitions)
+                for _, _, port in agents]
+        await asyncio.gather(*[poll(pdu) for pdu in pdus])
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        wall_times, cpu_times, requests, transferred = [], [], [], []
+        for _ in range(args.polls):
+            for simulator in simulators:
+                simulator.tick()
+            counters = [(protocol.requests, protocol.bytes_received + protocol.bytes_sent)
+                        for _, protocol, _ in agents]
+
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            await asyncio.gather(*[poll(pdu) for pdu in pdus])
+            wall_times.append(time.perf_counter() - wall_start)
+            # The simulated agents run in this process, their share of the CPU time is included
+            cpu_times.append(time.process_time() - cpu_start)
+
+            requests.append(sum(protocol.requests - count for (_, protocol, _), (count, _) in zip(agents, counters)))
+            transferred.append(sum(protocol.bytes_received + protocol.bytes_sent - size
+                                   for (_, protocol, _), (_, size) in zip(agents, counters)))
+
+        return {
+            "outlets": outlet_count,
+            "pdus": pdu_count,
+            "wall_ms": statistics.median(wall_times) * 1000,
+            "wall_p95_ms": percentile(wall_times, 0.95) * 1000,
+            "cpu_ms": statistics.median(cpu_times) * 1000,
+            "requests": statistics.median(requests),
+            "bytes": statistics.median(transferred),
+            "memory_per_outlet": memory / (outlet_count * pdu_count),
+        }
+    finally:
+        for transport, _, _ in agents:
+            transport.close()
+
+
+async def main(args):
+    # One-time costs such as loading the MIBs and importing pysnmp modules are not part of any case
+    warm_up = argparse.Namespace(**{**vars(args), "polls": 1})
+    await run_case(warm_up, 1, 1)
+
+    results = []
+    if not args.json:
+        print(f"{'outlets':>7} {'pdus':>5} {'wall ms':>9} {'p95 ms':>9} {'cpu ms':>9} {'requests':>9} {'bytes':>9} "
+              f"{'B/outlet':>9}")
+    for outlet_count in args.outlets:
+        for pdu_count in args.pdus:
+            result = await run_case(args, outlet_count, pdu_count)
+            results.append(result)
+            if not args.json:
+                print(f"{result['outlets']:>7} {result['pdus']:>5} {result['wall_ms']:>9.1f} "
+                      f"{result['wall_p95_ms']:>9.1f} {result['cpu_ms']:>9.1f} {result['requests']:>9.0f} "
+                      f"{result['bytes']:>9.0f} {result['memory_per_outlet']:>9.0f}")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outlets", type=int, nargs="+", default=[8, 24, 48], help="outlets per PDU")
+    parser.add_argument("--pdus", type=int, nargs="+", default=[1, 10, 100], help="number of PDUs polled together")
+    parser.add_argument("--polls", type=int, default=10, help="measured polls per case")
+    parser.add_argument("--inlets", type=int, default=1)
+    parser.add_argument("--circuit-breakers", type=int, default=2)
+    parser.add_argument("--max-repetitions", type=int, default=16, help="GETBULK max repetitions, 0 to use GET")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_POLLS, help="PDUs polled at once")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the agents delay every response")
+    parser.add_argument("--packet-loss", type=float, default=0.0, help="fraction of requests the agents drop")
+    parser.add_argument("--max-response-size", type=int, default=None, help="bytes above which agents reply tooBig")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
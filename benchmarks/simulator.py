@@ -0,0 +1,365 @@
+"""Simulated Raritan PX PDU SNMP agent serving PDU-MIB over UDP on the local host."""
+import asyncio
+import random
+import time
+
+from pyasn1.codec.ber import decoder, encoder
+from pyasn1.error import PyAsn1Error
+from pyasn1.type.constraint import ConstraintsIntersection
+from pysnmp.proto import api, rfc1905
+from pysnmp.smi.builder import MibBuilder
+
+TOO_BIG = 1
+NOT_WRITABLE = 17
+
+PDU_MODULE = "PDU-MIB"
+
+
+# Initial external sensor columns of a temperature, a humidity and a contact sensor (enums as their numbers)
+EXTERNAL_SENSOR_VALUES = {
+    "externalSensorType": (10, 11, 20),
+    "externalSensorUnits": (7, 9, -1),
+    "externalSensorDecimalDigits": (1, 0, 0),
+    "externalSensorState": (4, 4, 1),
+    "externalSensorValue": (235, 40, 0),
+}
+
+
+class SimulatedRaritanPDU:
+    """The MIB instance values of one simulated PDU."""
+
+    def __init__(self, mib_builder: MibBuilder, name: str = "sim-pdu", outlets: int = 8, inlets: int = 1,
+                 poles: int = 3, circuit_breakers: int = 2, lines: int = 3, temp_sensors: int = 0,
+                 humidity_sensors: int = 0, external_sensors: int = 0, data_log_size: int = 120,
+                 energy_support: bool = True, seed: int = 0) -> None:
+        """Initialize."""
+        self.mib_builder = mib_builder
+        self.random = random.Random(seed)
+        self.values: dict[tuple[int, ...], any] = {}
+        self.sorted_oids: list[tuple[int, ...]] = []
+        self.writable: set[tuple[int, ...]] = set()
+
+        self.outlets = outlets
+        self.inlets = inlets
+        self.poles = poles
+        self.data_log_size = data_log_size
+        self.data_log_latest_index = 0
+
+        self.set_value("SNMPv2-MIB", "sysDescr", (0,), "Raritan Dominion PX - Firmware Version 1.5.20.5-41524")
+        self.set_value("SNMPv2-MIB", "sysName", (0,), name)
+        self.set_value("SNMPv2-MIB", "sysUpTime", (0,), 0)
+        for symbol, value in {
+            "firmwareVersion": "1.5.20.5-41524",
+            "objectName": "PX2-2630U",
+            "serialNumber": f"SIM{seed:07d}",
+            "outletEnergySupport": "Yes" if energy_support else "No",
+            "outletCount": outlets,
+            "inletCount": inlets,
+            "circuitBreakerCount": circuit_breakers,
+            "lineCurrentCount": lines,
+            "lineVoltageCount": lines,
+            "tempSensorCount": temp_sensors,
+            "humiditySensorCount": humidity_sensors,
+            "externalSensorCount": external_sensors,
+            "unitCpuTemp": 450,
+            "dataCollectionInterval": 3,
+            "measurementsPerLogEntry": 20,
+            "dataLogCount": 0,
+            "dataLogLatestIndex": 0,
+        }.items():
+            self.set_value(PDU_MODULE, symbol, (0,), value)
+
+        self.populate_table("outletEntry", [(i,) for i in range(1, outlets + 1)])
+        self.populate_table("inletEntry", [(i,) for i in range(1, inlets + 1)])
+        self.populate_table("inletPoleEntry", [(i, p) for i in range(1, inlets + 1) for p in range(1, poles + 1)])
+        self.populate_table("circuitBreakerEntry", [(i,) for i in range(1, circuit_breakers + 1)])
+        self.populate_table("lineCurrentEntry", [(i,) for i in range(1, lines + 1)])
+        self.populate_table("lineVoltageEntry", [(i,) for i in range(1, lines + 1)])
+        self.populate_table("tempSensorEntry", [(i,) for i in range(1, temp_sensors + 1)])
+        self.populate_table("humiditySensorEntry", [(i,) for i in range(1, humidity_sensors + 1)])
+        self.populate_table("externalSensorEntry", [(i,) for i in range(1, external_sensors + 1)])
+        self.sort()
+
+    def get_node(self, module: str, symbol: str):
+        node, = self.mib_builder.import_symbols(module, symbol)
+        return node
+
+    def get_oid(self, module: str, symbol: str, index: tuple[int, ...]) -> tuple[int, ...]:
+        return tuple(self.get_node(module, symbol).getName()) + index
+
+    def set_value(self, module: str, symbol: str, index: tuple[int, ...], value: any, sort: bool = False):
+        node = self.get_node(module, symbol)
+        oid = tuple(node.getName()) + index
+        is_new = oid not in self.values
+        syntax = node.getSyntax()
+        try:
+            self.values[oid] = syntax.clone(value)
+        except PyAsn1Error:
+            # Values outside the MIB range (e.g. an empty data log) are still served by real agents
+            self.values[oid] = syntax.clone(value, subtypeSpec=ConstraintsIntersection())
+        if getattr(node, "maxAccess", "") == "read-write":
+            self.writable.add(oid)
+        if sort and is_new:
+            self.sort()
+
+    def get_value(self, module: str, symbol: str, index: tuple[int, ...]) -> any:
+        return self.values[self.get_oid(module, symbol, index)]
+
+    def sort(self):
+        self.sorted_oids = sorted(self.values)
+
+    def get_columns(self, entry_symbol: str) -> list[str]:
+        entry_oid = tuple(self.get_node(PDU_MODULE, entry_symbol).getName())
+        columns = []
+        for symbol, node in self.mib_builder.mibSymbols[PDU_MODULE].items():
+            if type(node).__name__ == "MibTableColumn" and tuple(node.getName())[:-1] == entry_oid and \
+                    getattr(node, "maxAccess", "") != "not-accessible":
+                columns.append(symbol)
+        return columns
+
+    def populate_table(self, entry_symbol: str, indexes: list[tuple[int, ...]]):
+        for symbol in self.get_columns(entry_symbol):
+            for index in indexes:
+                self.set_value(PDU_MODULE, symbol, index, self.get_initial_value(symbol, index))
+
+    def get_initial_value(self, symbol: str, index: tuple[int, ...]) -> any:
+        syntax = self.get_node(PDU_MODULE, symbol).getSyntax()
+        name = symbol.lower()
+        if symbol.startswith("externalSensor") and symbol in EXTERNAL_SENSOR_VALUES:
+            # A temperature, a humidity and a contact sensor, repeated
+            return EXTERNAL_SENSOR_VALUES[symbol][(index[0] - 1) % 3]
+        if symbol == "inletPoleCount":
+            return self.poles
+        if symbol == "inletCurrentUnbalance":
+            return "4%" if self.poles > 1 else "NA"
+        if isinstance(syntax, rfc1905.univ.OctetString):
+            if name.endswith("label") or name.endswith("name"):
+                return f"{symbol.replace('Label', '').replace('Name', '').title()} {'.'.join(map(str, index))}"
+            return ""
+        if symbol == "outletOperationalState":
+            return 1
+        if syntax.namedValues:
+            return next(iter(syntax.namedValues.values()))
+        if "voltage" in name:
+            return 230000 if "upper" not in name and "lower" not in name else 250000
+        if "powerfactor" in name:
+            return 95
+        if "rating" in name:
+            return 16000
+        if "current" in name and "unbalance" not in name:
+            return 500 + 10 * index[-1]
+        if "power" in name:
+            return 100 + index[-1]
+        if "watthours" in name or "energy" in name:
+            return 1000 * index[-1]
+        if name in ("temperature",):
+            return 235
+        if name in ("humidity",):
+            return 40
+        return 0
+
+    def tick(self, now: float = None):
+        """Advance the readings as if the PDU kept measuring since the previous tick."""
+        now = time.time() if now is None else now
+        for index in range(1, self.outlets + 1):
+            if int(self.get_value(PDU_MODULE, "outletOperationalState", (index,))) != 1:
+                continue
+            current = max(0, int(self.get_value(PDU_MODULE, "outletCurrent", (index,))) + self.random.randint(-20, 20))
+            self.set_value(PDU_MODULE, "outletCurrent", (index,), current)
+            self.set_value(PDU_MODULE, "outletActivePower", (index,), current * 230 // 1000)
+            watt_hours = int(self.get_value(PDU_MODULE, "outletWattHours", (index,)))
+            self.set_value(PDU_MODULE, "outletWattHours", (index,), watt_hours + self.random.randint(0, 2))
+        self.set_value("SNMPv2-MIB", "sysUpTime", (0,), int(now * 100) % (2 ** 32))
+
+    def append_data_log(self, timestamp: int = None):
+        """Record one data log row for the unit, every outlet, every inlet and every inlet pole."""
+        self.data_log_latest_index = self.data_log_latest_index % self.data_log_size + 1
+        index = self.data_log_latest_index
+        self.set_value(PDU_MODULE, "dataLogTimeStamp", (index,), int(time.time()) if timestamp is None else timestamp,
+                       sort=True)
+        for outlet in range(1, self.outlets + 1):
+            for symbol, source in (("dataLogOutletCurrent", "outletCurrent"),
+                                   ("dataLogOutletVoltage", "outletVoltage"),
+                                   ("dataLogOutletPowerFactor", "outletPowerFactor"),
+                                   ("dataLogOutletWattHours", "outletWattHours"),
+                                   ("dataLogAvgOutletCurrent", "outletCurrent"),
+                                   ("dataLogMaxOutletCurrent", "outletCurrent"),
+                                   ("dataLogMinOutletCurrent", "outletCurrent"),
+                                   ("dataLogAvgOutletVoltage", "outletVoltage"),
+                                   ("dataLogMaxOutletVoltage", "outletVoltage"),
+                                   ("dataLogMinOutletVoltage", "outletVoltage"),
+                                   ("dataLogAvgOutletPowerFactor", "outletPowerFactor"),
+                                   ("dataLogMaxOutletPowerFactor", "outletPowerFactor"),
+                                   ("dataLogMinOutletPowerFactor", "outletPowerFactor"),
+                                   ("dataLogAvgOutletWattHours", "outletWattHours")):
+                self.set_value(PDU_MODULE, symbol, (index, outlet),
+                               int(self.get_value(PDU_MODULE, source, (outlet,))), sort=True)
+        for inlet in range(1, self.inlets + 1):
+            for symbol, source in (("dataLogInletActivePower", "inletActivePower"),
+                                   ("dataLogInletApparentPower", "inletApparentPower"),
+                                   ("dataLogInletActiveEnergy", "inletActiveEnergy"),
+                                   ("dataLogAvgInletActivePower", "inletActivePower"),
+                                   ("dataLogMaxInletActivePower", "inletActivePower"),
+                                   ("dataLogMinInletActivePower", "inletActivePower"),
+                                   ("dataLogAvgInletApparentPower", "inletApparentPower"),
+                                   ("dataLogMaxInletApparentPower", "inletApparentPower"),
+                                   ("dataLogMinInletApparentPower", "inletApparentPower"),
+                                   ("dataLogAvgInletActiveEnergy", "inletActiveEnergy")):
+                self.set_value(PDU_MODULE, symbol, (index, inlet),
+                               int(self.get_value(PDU_MODULE, source, (inlet,))), sort=True)
+            for pole in range(1, self.poles + 1):
+                for symbol, source in (("dataLogInletPoleCurrent", "inletPoleCurrent"),
+                                       ("dataLogInletPoleVoltage", "inletPoleVoltage"),
+                                       ("dataLogAvgInletPoleCurrent", "inletPoleCurrent"),
+                                       ("dataLogMaxInletPoleCurrent", "inletPoleCurrent"),
+                                       ("dataLogMinInletPoleCurrent", "inletPoleCurrent"),
+                                       ("dataLogAvgInletPoleVoltage", "inletPoleVoltage"),
+                                       ("dataLogMaxInletPoleVoltage", "inletPoleVoltage"),
+                                       ("dataLogMinInletPoleVoltage", "inletPoleVoltage")):
+                    self.set_value(PDU_MODULE, symbol, (index, inlet, pole),
+                                   int(self.get_value(PDU_MODULE, source, (inlet, pole))), sort=True)
+        count = min(int(self.get_value(PDU_MODULE, "dataLogCount", (0,))) + 1, self.data_log_size)
+        self.set_value(PDU_MODULE, "dataLogCount", (0,), count)
+        self.set_value(PDU_MODULE, "dataLogLatestIndex", (0,), index)
+
+    def get(self, oid: tuple[int, ...]) -> any:
+        value = self.values.get(oid)
+        if value is None:
+            return rfc1905.noSuchInstance
+        return value
+
+    def get_next(self, oid: tuple[int, ...]) -> tuple[tuple[int, ...], any]:
+        low, high = 0, len(self.sorted_oids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sorted_oids[middle] <= oid:
+                low = middle + 1
+            else:
+                high = middle
+        if low >= len(self.sorted_oids):
+            return oid, rfc1905.endOfMibView
+        next_oid = self.sorted_oids[low]
+        return next_oid, self.values[next_oid]
+
+    def set(self, oid: tuple[int, ...], value: any) -> bool:
+        if oid not in self.writable:
+            return False
+        self.values[oid] = self.values[oid].clone(value)
+        return True
+
+
+class SimulatedAgentProtocol(asyncio.DatagramProtocol):
+    """SNMPv1/v2c command responder for a SimulatedRaritanPDU with injectable network faults."""
+
+    def __init__(self, pdu: SimulatedRaritanPDU, community: str = "public", write_community: str = "private",
+                 latency: float = 0.0, packet_loss: float = 0.0, max_response_size: int = None,
+                 seed: int = 0) -> None:
+        """Initialize."""
+        self.pdu = pdu
+        self.community = community
+        self.write_community = write_community
+        self.latency = latency
+        self.packet_loss = packet_loss
+        self.max_response_size = max_response_size
+        self.random = random.Random(seed)
+        self.transport: asyncio.DatagramTransport = None
+
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        self.requests += 1
+        self.bytes_received += len(data)
+        if self.packet_loss and self.random.random() < self.packet_loss:
+            return
+
+        response = self.handle_message(data)
+        if response is None:
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.send, response, addr)
+        else:
+            self.send(response, addr)
+
+    def send(self, response: bytes, addr):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.bytes_sent += len(response)
+        self.transport.sendto(response, addr)
+
+    def handle_message(self, data: bytes) -> bytes:
+        version = int(api.decodeMessageVersion(data))
+        protocol = api.PROTOCOL_MODULES[version]
+        request, _ = decoder.decode(data, asn1Spec=protocol.Message())
+        community = str(protocol.apiMessage.get_community(request))
+        request_pdu = protocol.apiMessage.get_pdu(request)
+
+        is_set = request_pdu.isSameTypeWith(protocol.SetRequestPDU())
+        if community != (self.write_community if is_set else self.community) and community != self.write_community:
+            return None
+
+        response = protocol.apiMessage.get_response(request)
+        response_pdu = protocol.apiMessage.get_pdu(response)
+        var_binds = protocol.apiPDU.get_varbinds(request_pdu)
+        response_var_binds = []
+        error_status = error_index = 0
+
+        if request_pdu.isSameTypeWith(protocol.GetRequestPDU()):
+            response_var_binds = [(oid, self.pdu.get(tuple(oid))) for oid, _ in var_binds]
+        elif request_pdu.isSameTypeWith(protocol.GetNextRequestPDU()):
+            response_var_binds = [self.pdu.get_next(tuple(oid)) for oid, _ in var_binds]
+        elif version == api.SNMP_VERSION_2C and request_pdu.isSameTypeWith(protocol.GetBulkRequestPDU()):
+            non_repeaters = min(int(protocol.apiBulkPDU.get_non_repeaters(request_pdu)), len(var_binds))
+            max_repetitions = int(protocol.apiBulkPDU.get_max_repetitions(request_pdu))
+            response_var_binds = [self.pdu.get_next(tuple(oid)) for oid, _ in var_binds[:non_repeaters]]
+            repeaters = [tuple(oid) for oid, _ in var_binds[non_repeaters:]]
+            for _ in range(max_repetitions):
+                if not repeaters:
+                    break
+                row = [self.pdu.get_next(oid) for oid in repeaters]
+                response_var_binds.extend(row)
+                repeaters = [oid for oid, _ in row]
+        elif is_set:
+            for i, (oid, value) in enumerate(var_binds):
+                if not self.pdu.set(tuple(oid), value):
+                    error_status, error_index = NOT_WRITABLE, i + 1
+                    break
+            response_var_binds = [(oid, self.pdu.get(tuple(oid))) for oid, _ in var_binds]
+        else:
+            return None
+
+        if version == api.SNMP_VERSION_1:
+            response_var_binds = [(oid, value if not value.isSameTypeWith(rfc1905.noSuchInstance) else
+                                   protocol.Null()) for oid, value in response_var_binds]
+        protocol.apiPDU.set_error_status(response_pdu, error_status)
+        protocol.apiPDU.set_error_index(response_pdu, error_index)
+        protocol.apiPDU.set_varbinds(response_pdu, response_var_binds)
+        encoded = encoder.encode(response)
+
+        # GETBULK responses are truncated to fit (RFC 3416 4.2.3), any other request fails with tooBig
+        is_bulk = version == api.SNMP_VERSION_2C and request_pdu.isSameTypeWith(protocol.GetBulkRequestPDU())
+        while is_bulk and self.max_response_size is not None and len(encoded) > self.max_response_size and \
+                len(response_var_binds) > 1:
+            response_var_binds = response_var_binds[:max(1, len(response_var_binds) * self.max_response_size //
+                                                         len(encoded))]
+            protocol.apiPDU.set_varbinds(response_pdu, response_var_binds)
+            encoded = encoder.encode(response)
+
+        if self.max_response_size is not None and len(encoded) > self.max_response_size:
+            protocol.apiPDU.set_error_status(response_pdu, TOO_BIG)
+            protocol.apiPDU.set_error_index(response_pdu, 0)
+            protocol.apiPDU.set_varbinds(response_pdu, [(oid, protocol.Null()) for oid, _ in var_binds])
+            encoded = encoder.encode(response)
+        return encoded
+
+
+async def start_agent(pdu: SimulatedRaritanPDU, host: str = "127.0.0.1", port: int = 0, **kwargs):
+    """Serve the simulated PDU, returning the transport, the protocol and the bound port."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: SimulatedAgentProtocol(pdu, **kwargs), local_addr=(host, port))
+    return transport, protocol, transport.get_extra_info("sockname")[1]
@@ -1,39 +1,109 @@
 """Raritan PDU Integration."""
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 
-from .coordinator import RaritanPDUCoordinator
+from .coordinator import RaritanPDUCoordinator, get_topology_store, get_usm_key_store
+from .scheduler import get_scheduler
+from .history import RaritanPDUHistory, get_history_store
+from .traps import async_get_trap_receiver, unregister_trap_receivers
+from .services import async_setup_services
 from .raritan_pdu import RaritanPDU
-from .const import _LOGGER, DOMAIN, PLATFORMS, CONF_READ_COMMUNITY, CONF_WRITE_COMMUNITY, CONF_POLLING_INTERVAL, \
-    CONF_HOST, CONF_PORT
+from .snmp import get_usm_user
+from .const import DOMAIN, PLATFORMS, CONF_READ_COMMUNITY, CONF_WRITE_COMMUNITY, CONF_POLLING_INTERVAL, \
+    CONF_HOST, CONF_PORT, CONF_MAX_REPETITIONS, DEFAULT_MAX_REPETITIONS, CONF_DATA_LOG, \
+    CONF_TRAP_PORT, CONF_COMPACT_ENTITIES, CONF_PUBLISH_INTERVAL, \
+    CONF_HEARTBEAT_INTERVAL, CONF_PUBLISH_DEADBANDS
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the services shared by all Raritan PDUs."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Raritan PDU from a config entry."""
     # Set up the sensor platform
 
+    usm_user = get_usm_user(entry.data)
+    if usm_user is not None:
+        usm_keys = await get_usm_key_store(hass, entry.entry_id).async_load()
+        if usm_keys is not None:
+            usm_user.restore_keys(usm_keys)
+
     pdu = RaritanPDU(entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_READ_COMMUNITY],
-                     entry.data[CONF_WRITE_COMMUNITY])
-    if not await pdu.authenticate():
-        _LOGGER.error("Failed to connect to Raritan PDU at %s", entry.data[CONF_HOST])
-        raise ConfigEntryNotReady("Unable to connect")
+                     entry.data[CONF_WRITE_COMMUNITY],
+                     entry.data.get(CONF_MAX_REPETITIONS, DEFAULT_MAX_REPETITIONS),
+                     entry.data.get(CONF_DATA_LOG, False), usm_user, entry.data[CONF_POLLING_INTERVAL])
+    topology_store = get_topology_store(hass, entry.entry_id)
+    topology = await topology_store.async_load()
+    if topology is not None:
+        pdu.restore_topology(topology)
 
-    # initial update
-    await pdu.update_data()
     raritan_pdu_coordinator = RaritanPDUCoordinator(hass, pdu, entry.data[CONF_POLLING_INTERVAL])
-    await raritan_pdu_coordinator.async_config_entry_first_refresh()
+    raritan_pdu_coordinator.topology_store = topology_store
+    raritan_pdu_coordinator.compact_entities = entry.data.get(CONF_COMPACT_ENTITIES, False)
+    raritan_pdu_coordinator.publish_interval = entry.data.get(CONF_PUBLISH_INTERVAL, 0)
+    raritan_pdu_coordinator.heartbeat_interval = entry.data.get(CONF_HEARTBEAT_INTERVAL, 0)
+    raritan_pdu_coordinator.publish_deadbands = {device_class: entry.options[key]
+                                                 for device_class, key in CONF_PUBLISH_DEADBANDS.items()
+                                                 if key in entry.options}
+    if usm_user is not None:
+        raritan_pdu_coordinator.usm_key_store = get_usm_key_store(hass, entry.entry_id)
+    if pdu.data_log is not None:
+        raritan_pdu_coordinator.history = RaritanPDUHistory(hass, entry.entry_id, pdu)
+        await raritan_pdu_coordinator.history.async_load()
+
+    if topology is None:
+        # First start, the entities need the topology of the PDU
+        await raritan_pdu_coordinator.async_config_entry_first_refresh()
+    else:
+        # The entities are created from the cached topology right away, unavailable until the first poll verified it
+        raritan_pdu_coordinator.data = pdu.get_data()
+        raritan_pdu_coordinator.last_update_success = False
+        entry.async_create_background_task(hass, raritan_pdu_coordinator.async_refresh(),
+                                           f"{DOMAIN} first poll {pdu.name}")
+    raritan_pdu_coordinator.topology_key = pdu.get_topology_key()
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = raritan_pdu_coordinator
 
+    scheduler = get_scheduler(hass)
+    scheduler.register(entry.entry_id, raritan_pdu_coordinator, entry.data[CONF_POLLING_INTERVAL])
+    raritan_pdu_coordinator.poll_state = scheduler.get_poll_state(entry.entry_id)
+
+    if entry.data.get(CONF_TRAP_PORT, 0):
+        trap_receiver = await async_get_trap_receiver(hass, entry.data[CONF_TRAP_PORT])
+        await trap_receiver.register(entry.entry_id, raritan_pdu_coordinator)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry to apply the changed options, the entities take their deadbands when created."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Raritan PDU config entry."""
     unload_ok = True
     for platform in PLATFORMS:
         unload_ok = unload_ok and await hass.config_entries.async_forward_entry_unload(entry, platform)
 
+    if unload_ok:
+        get_scheduler(hass).unregister(entry.entry_id)
+        unregister_trap_receivers(hass, entry.entry_id)
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data log import state, topology and SNMPv3 keys of a deleted config entry."""
+    await get_history_store(hass, entry.entry_id).async_remove()
+    await get_topology_store(hass, entry.entry_id).async_remove()
+    await get_usm_key_store(hass, entry.entry_id).async_remove()
@@ -0,0 +1,42 @@
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .entity import RaritanPDUTableEntity
+from .metrics import EXTERNAL_BINARY_SENSOR_ON_STATES, get_external_binary_sensor_description
+from .coordinator import RaritanPDUCoordinator
+from .const import DOMAIN, _LOGGER, TABLE_EXTERNAL_SENSOR
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    """Set up the Raritan PDU binary sensor platform."""
+    coordinator: RaritanPDUCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    entities = []
+    table = coordinator.pdu.tables.get(TABLE_EXTERNAL_SENSOR)
+    if table is not None:
+        for slot in range(len(table.indexes)):
+            description = get_external_binary_sensor_description(table.current["type"][slot])
+            if description is not None:
+                entities.append(RaritanPDUBinarySensor(coordinator, description, table, slot, "state"))
+
+    _LOGGER.info(f"Discovered {len(entities)} binary sensors")
+    async_add_entities(entities)
+
+
+class RaritanPDUBinarySensor(RaritanPDUTableEntity, BinarySensorEntity):
+    """Representation of a discrete external sensor, e.g. a door contact or a water detector."""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.is_changed((self.get_row_value(),)):
+            super()._handle_coordinator_update()
+
+    @property
+    def is_on(self) -> bool | None:
+        """Is the sensor open, on, detecting or alarmed."""
+        state = self.get_row_value()
+        if state is None or state == "unavailable":
+            return None
+        return state in EXTERNAL_BINARY_SENSOR_ON_STATES
@@ -2,7 +2,8 @@ from typing import Any
 
 from homeassistant.components.button import ButtonEntityDescription, ButtonDeviceClass, ButtonEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 
 from .entity import RaritanPDUEntity
 from .const import DOMAIN
@@ -36,10 +37,18 @@ class RaritanPDUSwitch(RaritanPDUEntity, ButtonEntity):
 
     async def async_press(self, **kwargs: Any) -> None:
         """Power cycle outlet"""
-        await self.outlet.power_cycle()
-        await self.coordinator.async_request_refresh()
+        if await self.outlet.power_cycle() is None:
+            raise HomeAssistantError(f"Outlet {self.outlet_index} of {self.coordinator.pdu.name} was not power cycled")
+        # The outlet already holds the confirmed value, publish it without waiting for a poll
+        self.coordinator.async_update_listeners()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.is_changed((self.coordinator.data[self.outlet_index]["operational_state"],)):
+            super()._handle_coordinator_update()
 
     @property
     def available(self) -> bool:
         """The outlet can be power cycled when it is on."""
-        return self.coordinator.data[self.outlet_index]["operational_state"] == "on"
+        return super().available and self.coordinator.data[self.outlet_index]["operational_state"] == "on"
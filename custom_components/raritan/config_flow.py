@@ -1,33 +1,74 @@
 import voluptuous as vol
 from homeassistant import exceptions
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.config_entries import ConfigFlow, ConfigEntry, OptionsFlow
+from homeassistant.core import callback
 
 from .raritan_pdu import RaritanPDU
+from .snmp import get_usm_user
 from .const import _LOGGER, DOMAIN, CONF_READ_COMMUNITY, CONF_WRITE_COMMUNITY, CONF_POLLING_INTERVAL, CONF_HOST, \
-    CONF_PORT
+    CONF_PORT, CONF_MAX_REPETITIONS, DEFAULT_MAX_REPETITIONS, DEFAULT_POLLING_INTERVAL, CONF_DATA_LOG, CONF_TRAP_PORT, \
+    CONF_SNMP_VERSION, CONF_V3_USER_NAME, CONF_V3_AUTH_PROTOCOL, CONF_V3_AUTH_PASSWORD, CONF_V3_PRIV_PROTOCOL, \
+    CONF_V3_PRIV_PASSWORD, SNMP_VERSIONS, SNMP_V3_AUTH_PROTOCOLS, SNMP_V3_PRIV_PROTOCOLS, CONF_COMPACT_ENTITIES, \
+    CONF_PUBLISH_INTERVAL, CONF_HEARTBEAT_INTERVAL, CONF_PUBLISH_DEADBANDS, PUBLISH_DEADBANDS
 
 DATA_SCHEMA = vol.Schema({
     vol.Required(CONF_HOST): str,
     vol.Optional(CONF_PORT, default=161): int,
     vol.Optional(CONF_READ_COMMUNITY, default="public"): str,
     vol.Optional(CONF_WRITE_COMMUNITY, default="private"): str,
-    vol.Optional(CONF_POLLING_INTERVAL, default=5): int,
+    vol.Optional(CONF_SNMP_VERSION, default="2c"): vol.In(SNMP_VERSIONS),
+    vol.Optional(CONF_V3_USER_NAME, default=""): str,
+    vol.Optional(CONF_V3_AUTH_PROTOCOL, default="SHA"): vol.In(SNMP_V3_AUTH_PROTOCOLS),
+    vol.Optional(CONF_V3_AUTH_PASSWORD, default=""): str,
+    vol.Optional(CONF_V3_PRIV_PROTOCOL, default="AES"): vol.In(SNMP_V3_PRIV_PROTOCOLS),
+    vol.Optional(CONF_V3_PRIV_PASSWORD, default=""): str,
+    vol.Optional(CONF_POLLING_INTERVAL, default=DEFAULT_POLLING_INTERVAL): int,
+    vol.Optional(CONF_MAX_REPETITIONS, default=DEFAULT_MAX_REPETITIONS): vol.All(int, vol.Range(min=0)),
+    vol.Optional(CONF_DATA_LOG, default=False): bool,
+    vol.Optional(CONF_TRAP_PORT, default=0): vol.All(int, vol.Range(min=0, max=65535)),
+    vol.Optional(CONF_COMPACT_ENTITIES, default=False): bool,
+    vol.Optional(CONF_PUBLISH_INTERVAL, default=0): vol.All(int, vol.Range(min=0)),
+    vol.Optional(CONF_HEARTBEAT_INTERVAL, default=0): vol.All(int, vol.Range(min=0)),
 })
 
 
+def get_options_schema(options: dict) -> vol.Schema:
+    """The publish deadbands by device class, defaulting to the current options."""
+    return vol.Schema({
+        vol.Optional(key, default=options.get(key, PUBLISH_DEADBANDS[device_class][0])):
+            vol.All(vol.Coerce(float), vol.Range(min=0))
+        for device_class, key in CONF_PUBLISH_DEADBANDS.items()
+    })
+
+
 class RaritanPDUConfigFlow(ConfigFlow, domain=DOMAIN):
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return RaritanPDUOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
         if user_input is not None:
-            self._async_abort_entries_match({CONF_HOST: user_input[CONF_HOST],
-                                             CONF_PORT: user_input[CONF_PORT],
-                                             CONF_READ_COMMUNITY: user_input[CONF_READ_COMMUNITY],
-                                             CONF_WRITE_COMMUNITY: user_input[CONF_WRITE_COMMUNITY]})
+            usm_user = get_usm_user(user_input)
+            if usm_user is None:
+                self._async_abort_entries_match({CONF_HOST: user_input[CONF_HOST],
+                                                 CONF_PORT: user_input[CONF_PORT],
+                                                 CONF_READ_COMMUNITY: user_input[CONF_READ_COMMUNITY],
+                                                 CONF_WRITE_COMMUNITY: user_input[CONF_WRITE_COMMUNITY]})
+            else:
+                self._async_abort_entries_match({CONF_HOST: user_input[CONF_HOST],
+                                                 CONF_PORT: user_input[CONF_PORT],
+                                                 CONF_V3_USER_NAME: user_input[CONF_V3_USER_NAME]})
 
             try:
+                if usm_user is not None and (not usm_user.user_name or len(usm_user.auth_password) < 8 or (
+                        usm_user.priv_protocol != "none" and len(usm_user.priv_password) < 8)):
+                    # RFC 3414 11.2, passwords are at least 8 characters
+                    raise InvalidCredentials
                 pdu = RaritanPDU(user_input[CONF_HOST], user_input[CONF_PORT], user_input[CONF_READ_COMMUNITY],
-                                 user_input[CONF_WRITE_COMMUNITY])
+                                 user_input[CONF_WRITE_COMMUNITY], usm_user=usm_user)
                 if not await pdu.authenticate():
                     raise InvalidHost
                 else:
@@ -36,6 +77,8 @@ class RaritanPDUConfigFlow(ConfigFlow, domain=DOMAIN):
                     return self.async_create_entry(title=pdu.name, data=user_input)
             except InvalidHost:
                 errors["base"] = "invalid_host"
+            except InvalidCredentials:
+                errors["base"] = "invalid_auth"
             except Exception as e:  # pylint: disable=broad-except
                 _LOGGER.error(f"Unexpected exception occurred: {str(e)}")
                 errors["base"] = f"Unexpected exception occurred: {str(e)}"
@@ -43,5 +86,22 @@ class RaritanPDUConfigFlow(ConfigFlow, domain=DOMAIN):
         return self.async_show_form(step_id="user", data_schema=DATA_SCHEMA, errors=errors)
 
 
+class RaritanPDUOptionsFlow(OptionsFlow):
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Handle the publish deadbands."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(step_id="init", data_schema=get_options_schema(self.config_entry.options))
+
+
 class InvalidHost(exceptions.HomeAssistantError):
     """Error to indicate this is an invalid host."""
+
+
+class InvalidCredentials(exceptions.HomeAssistantError):
+    """Error to indicate the SNMPv3 user name or passwords are unusable."""
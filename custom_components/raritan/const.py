@@ -3,6 +3,8 @@ from typing import Final
 
 from homeassistant.const import Platform
 from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfPower, UnitOfApparentPower, \
+    UnitOfTemperature, PERCENTAGE
 
 _LOGGER = logging.getLogger(__package__)
 
@@ -14,7 +16,107 @@ CONF_PORT = CONF_PORT
 CONF_READ_COMMUNITY: Final = "read community"
 CONF_WRITE_COMMUNITY: Final = "write community"
 CONF_POLLING_INTERVAL: Final = "polling interval(seconds)"
+CONF_MAX_REPETITIONS: Final = "bulk max repetitions(0 to disable)"
+CONF_DATA_LOG: Final = "import data log history"
+CONF_TRAP_PORT: Final = "trap port(0 to disable)"
+CONF_SNMP_VERSION: Final = "snmp version"
+CONF_V3_USER_NAME: Final = "v3 user name(version 3 only)"
+CONF_V3_AUTH_PROTOCOL: Final = "v3 authentication protocol"
+CONF_V3_AUTH_PASSWORD: Final = "v3 authentication password"
+CONF_V3_PRIV_PROTOCOL: Final = "v3 privacy protocol"
+CONF_V3_PRIV_PASSWORD: Final = "v3 privacy password"
+CONF_COMPACT_ENTITIES: Final = "compact entities(outlet entities disabled by default)"
+CONF_PUBLISH_INTERVAL: Final = "publish interval(seconds, 0 to publish every poll)"
+CONF_HEARTBEAT_INTERVAL: Final = "heartbeat interval(seconds, 0 to write every poll)"
+
+# SNMP versions and SNMPv3 USM protocols offered in the config flow, the communities are only used by version 2c
+SNMP_VERSIONS: Final = ("2c", "3")
+SNMP_V3_AUTH_PROTOCOLS: Final = ("MD5", "SHA", "SHA-224", "SHA-256", "SHA-384", "SHA-512")
+SNMP_V3_PRIV_PROTOCOLS: Final = ("none", "DES", "3DES", "AES", "AES-192", "AES-256")
+
+DEFAULT_MAX_REPETITIONS: Final = 16
+DEFAULT_POLLING_INTERVAL: Final = 5
+
+# Polling tiers: static identity and topology, configuration such as labels and thresholds, live readings.
+# Live readings are fetched on every poll, the other tiers at most once per interval (seconds).
+# The environment tier reads slowly changing external sensors such as temperature and humidity.
+# The data log tier imports the entries the PDU recorded since the last import, when enabled.
+TIER_STATIC: Final = "static"
+TIER_CONFIG: Final = "config"
+TIER_LIVE: Final = "live"
+TIER_ENVIRONMENT: Final = "environment"
+TIER_DATA_LOG: Final = "data log"
+TIER_INTERVALS: Final = {TIER_STATIC: 3600, TIER_CONFIG: 300, TIER_LIVE: 0, TIER_ENVIRONMENT: 60, TIER_DATA_LOG: 300}
+
+# PDU component tables polled in the same requests as the outlet table
+TABLE_OUTLET: Final = "outlet"
+TABLE_INLET: Final = "inlet"
+TABLE_INLET_POLE: Final = "inlet pole"
+TABLE_CIRCUIT_BREAKER: Final = "circuit breaker"
+TABLE_LINE_CURRENT: Final = "line current"
+TABLE_LINE_VOLTAGE: Final = "line voltage"
+TABLE_EXTERNAL_SENSOR: Final = "external sensor"
+TABLE_TEMPERATURE_SENSOR: Final = "temperature sensor"
+TABLE_HUMIDITY_SENSOR: Final = "humidity sensor"
+
+# hass.data[DOMAIN] key of the poll scheduler shared by all config entries
+DATA_SCHEDULER: Final = "scheduler"
+MAX_CONCURRENT_POLLS: Final = 8
+
+# Circuit breaker of unreachable PDUs: after this many failed polls in a row the PDU is only probed, with a delay
+# between probes doubling up to the max (seconds), until it responds again
+CIRCUIT_BREAKER_FAILURES: Final = 3
+PROBE_INITIAL_DELAY: Final = 30
+PROBE_MAX_DELAY: Final = 600
+
+# Change a sensor reading needs before its state is written again, by device class, when a heartbeat interval is set.
+# The deadband applies to sensors with this native unit, other sensors are written on any change.
+PUBLISH_DEADBANDS: Final = {
+    "current": (20, UnitOfElectricCurrent.MILLIAMPERE),
+    "voltage": (1000, UnitOfElectricPotential.MILLIVOLT),
+    "power": (1, UnitOfPower.WATT),
+    "apparent_power": (1, UnitOfApparentPower.VOLT_AMPERE),
+    "power_factor": (1, PERCENTAGE),
+    "temperature": (0.2, UnitOfTemperature.CELSIUS),
+    "humidity": (1, PERCENTAGE),
+}
+# Config entry option keys overriding the deadbands above, by device class, in the same units
+CONF_PUBLISH_DEADBANDS: Final = {
+    "current": "current deadband(mA)",
+    "voltage": "voltage deadband(mV)",
+    "power": "power deadband(W)",
+    "apparent_power": "apparent power deadband(VA)",
+    "power_factor": "power factor deadband(%)",
+    "temperature": "temperature deadband(°C)",
+    "humidity": "humidity deadband(%)",
+}
+
+# Polls and requests over which the rolling percentiles of the poll statistics are computed
+POLL_STATS_WINDOW: Final = 100
+
+# hass.data[DOMAIN] key of the SNMP notification receivers, by UDP port, shared by the config entries
+DATA_TRAP_RECEIVERS: Final = "trap receivers"
+
+# Storage of the last imported data log entry, per config entry
+DATA_LOG_STORAGE_KEY: Final = f"{DOMAIN}.data_log"
+DATA_LOG_STORAGE_VERSION: Final = 1
+
+# Storage of the identity and topology of the PDU from the last run, per config entry
+TOPOLOGY_STORAGE_KEY: Final = f"{DOMAIN}.topology"
+TOPOLOGY_STORAGE_VERSION: Final = 1
+TOPOLOGY_SAVE_DELAY: Final = 10  # seconds
+
+# Storage of the SNMPv3 keys localized to the engine ID of the PDU, per config entry
+USM_KEY_STORAGE_KEY: Final = f"{DOMAIN}.usm_keys"
+USM_KEY_STORAGE_VERSION: Final = 1
 
 MIB_SOURCE_DIR: Final = f"./custom_components/{DOMAIN}/mibs"
+MIB_CACHE_DIR: Final = f"{MIB_SOURCE_DIR}/compiled"
+MIB_MODULES: Final = ('PDU-MIB', 'SNMPv2-SMI', 'INET-ADDRESS-MIB', 'SNMPv2-TC', 'SNMPv2-CONF', 'SNMPv2-MIB')
+
+SERVICE_SET_OUTLETS_POWER: Final = "set_outlets_power"
+ATTR_OPERATIONAL_STATE: Final = "operational_state"
+ATTR_GROUP_SIZE: Final = "group_size"
+ATTR_GROUP_DELAY: Final = "group_delay"
 
-PLATFORMS = [Platform.SENSOR, Platform.SWITCH, Platform.BUTTON, Platform.TEXT]
+PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SWITCH, Platform.BUTTON, Platform.TEXT]
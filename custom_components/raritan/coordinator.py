@@ -1,11 +1,58 @@
+import asyncio
+import logging
+import time
 from datetime import timedelta
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .raritan_pdu import RaritanPDU
-from .const import _LOGGER, DOMAIN, MANUFACTURER
+from .scheduler import RaritanPDUPollState
+from .history import RaritanPDUHistory
+from .traps import get_notification_outlet, get_notification_row
+from .stats import PHASE_ENTITY_WRITE
+from .const import _LOGGER, DOMAIN, MANUFACTURER, TIER_STATIC, TIER_CONFIG, TOPOLOGY_STORAGE_KEY, \
+    TOPOLOGY_STORAGE_VERSION, TOPOLOGY_SAVE_DELAY, CIRCUIT_BREAKER_FAILURES, PROBE_INITIAL_DELAY, PROBE_MAX_DELAY, \
+    USM_KEY_STORAGE_KEY, USM_KEY_STORAGE_VERSION
+
+
+def get_topology_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Storage of the PDU topology of a config entry, the entities are created from it on the next start."""
+    return Store(hass, TOPOLOGY_STORAGE_VERSION, f"{TOPOLOGY_STORAGE_KEY}.{entry_id}")
+
+
+def get_usm_key_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Storage of the SNMPv3 keys of a config entry, localized to the engine ID of its PDU."""
+    return Store(hass, USM_KEY_STORAGE_VERSION, f"{USM_KEY_STORAGE_KEY}.{entry_id}")
+
+
+class RaritanPDUCircuitBreaker:
+    """Stops polling a PDU that failed several polls in a row, probing it with a growing delay instead."""
+    __slots__ = ("failures", "probe_delay", "next_probe")
+
+    def __init__(self):
+        self.failures = 0  # polls failed in a row
+        self.probe_delay = 0.0  # seconds between probes, 0 while the PDU is polled normally
+        self.next_probe = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.probe_delay > 0
+
+    def record_success(self):
+        self.failures = 0
+        self.probe_delay = 0.0
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        if self.is_open:
+            self.probe_delay = min(self.probe_delay * 2, PROBE_MAX_DELAY)
+        elif self.failures >= CIRCUIT_BREAKER_FAILURES:
+            self.probe_delay = PROBE_INITIAL_DELAY
+        self.next_probe = now + self.probe_delay
 
 
 class RaritanPDUCoordinator(DataUpdateCoordinator):
@@ -16,15 +63,86 @@ class RaritanPDUCoordinator(DataUpdateCoordinator):
             polling_interval: int,
     ) -> None:
         """Initialise a custom coordinator."""
+        # Polls are started by the RaritanPDUScheduler rather than by the coordinator's own timer
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=polling_interval),
+            update_interval=None,
         )
+        self.polling_interval = timedelta(seconds=polling_interval)
+        self.poll_state: RaritanPDUPollState = None
+        self.history: RaritanPDUHistory = None
+        self.topology_store: Store = None
+        self.topology_key: tuple = None  # topology the entities were created for
+        self.usm_key_store: Store = None
+        self.compact_entities = False  # outlet entities are disabled by default
+        # Sensors sample every poll and publish every publish interval (seconds), 0 publishes every poll
+        self.publish_interval = 0
+        self.next_publish = 0.0
+        self.publishing = True  # the sensors write their states in this update of the listeners
+        self.poll_count = 0  # successful polls, a sensor samples each poll once
+        # Entities write their state only when it changed, beyond the deadband of sensors, or at least once per
+        # heartbeat interval (seconds), 0 writes every update
+        self.heartbeat_interval = 0
+        self.publish_deadbands: dict[str, float] = {}  # by device class, the defaults apply to the others
+        self.circuit_breaker = RaritanPDUCircuitBreaker()
+        # Polls and notification-driven updates must not interleave on the outlet store
+        self.update_lock = asyncio.Lock()
         self.pdu: RaritanPDU = pdu
         self.device_id = self.pdu.unique_id
-        self.device_info = DeviceInfo(
+        self.device_info = self.get_device_info()
+        # Incremented when the PDU or one of its outlets or rows was renamed, the entities then rename themselves
+        self.naming_version = 0
+        self.naming = self.pdu.get_naming()
+
+    async def _async_update_data(self) -> RaritanPDU:
+        """Fetch the data from the device."""
+        breaker = self.circuit_breaker
+        if breaker.is_open:
+            # Only a single request until the PDU responds again, the entities stay unavailable meanwhile
+            now = time.monotonic()
+            if now < breaker.next_probe:
+                raise UpdateFailed(f"{self.get_pdu_name()} is unreachable, "
+                                   f"next probe in {breaker.next_probe - now:.0f}s")
+            if not await self.pdu.authenticate():
+                self.record_poll_failure()
+                raise UpdateFailed(f"{self.get_pdu_name()} is unreachable, next probe in {breaker.probe_delay:.0f}s")
+
+        config_update = self.pdu.tier_updates[TIER_CONFIG]
+        async with self.update_lock:
+            if not await self.pdu.update_data():
+                self.record_poll_failure()
+                raise UpdateFailed(f"Failed to poll {self.get_pdu_name()}")
+            if self.history is not None:
+                await self.history.async_update()
+        self.record_poll_success()
+        self.poll_count += 1
+        if not self.last_update_success:
+            # Publish right away when the PDU responds again, the sensors are unavailable until then
+            self.next_publish = 0.0
+
+        usm_user = self.pdu.snmp_manager.usm_user
+        if self.usm_key_store is not None and not usm_user.keys_saved:
+            # Keys were localized to a newly discovered engine ID, the next start reuses them
+            usm_user.keys_saved = True
+            await self.usm_key_store.async_save(usm_user.get_keys())
+
+        if self.topology_key is not None and self.pdu.get_topology_key() != self.topology_key:
+            # Create the entities of the new topology, from a cache that already holds it
+            _LOGGER.info(f"Topology of {self.pdu.name} changed, reloading")
+            self.topology_key = None
+            if self.topology_store is not None:
+                await self.topology_store.async_save(self.pdu.get_topology())
+            self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+        elif self.topology_store is not None and self.pdu.tier_updates[TIER_CONFIG] != config_update:
+            # Labels and the topology are fetched with the config tier
+            self.topology_store.async_delay_save(self.pdu.get_topology, TOPOLOGY_SAVE_DELAY)
+
+        return self.pdu.get_data()
+
+    def get_device_info(self) -> DeviceInfo:
+        return DeviceInfo(
             manufacturer=MANUFACTURER,
             identifiers={(DOMAIN, self.pdu.unique_id)},
             name=self.pdu.name,
@@ -32,13 +150,93 @@ class RaritanPDUCoordinator(DataUpdateCoordinator):
             model=self.pdu.model,
         )
 
-    async def _async_update_data(self) -> dict:
-        """Fetch the data from the device."""
-        await self.pdu.update_data()
-        self.device_info = DeviceInfo(
-            manufacturer=MANUFACTURER,
-            identifiers={(DOMAIN, self.pdu.unique_id)},
-            name=self.pdu.name
-        )
+    def update_naming(self):
+        """Bump the naming version when the PDU or a label was renamed, updating the device registry entry."""
+        naming = self.pdu.get_naming()
+        if naming == self.naming:
+            return
+        self.naming = naming
+        self.naming_version += 1
 
-        return self.pdu.get_data()
+        device_info = self.get_device_info()
+        if device_info != self.device_info:
+            self.device_info = device_info
+            device_registry = dr.async_get(self.hass)
+            device = device_registry.async_get_device(identifiers=device_info["identifiers"])
+            if device is not None:
+                device_registry.async_update_device(device.id, name=device_info["name"],
+                                                    sw_version=device_info["sw_version"], model=device_info["model"])
+
+    def get_pdu_name(self) -> str:
+        return self.pdu.name or f"{self.pdu.snmp_manager.host}:{self.pdu.snmp_manager.port}"
+
+    def record_poll_failure(self):
+        breaker = self.circuit_breaker
+        was_open = breaker.is_open
+        breaker.record_failure(time.monotonic())
+        if breaker.is_open and not was_open:
+            _LOGGER.warning(f"{self.get_pdu_name()} failed {breaker.failures} polls in a row, probing it every "
+                            f"{PROBE_INITIAL_DELAY}s to {PROBE_MAX_DELAY}s until it responds")
+            self.pdu.snmp_manager.error_log_level = logging.DEBUG
+
+    def record_poll_success(self):
+        if self.circuit_breaker.is_open:
+            _LOGGER.warning(f"{self.get_pdu_name()} responds again, polling resumed")
+            self.pdu.snmp_manager.error_log_level = logging.ERROR
+        self.circuit_breaker.record_success()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Write the entity states, timed as the last phase of a poll."""
+        start = time.perf_counter()
+        self.update_naming()
+        if self.publish_interval:
+            now = time.monotonic()
+            self.publishing = now >= self.next_publish
+            if self.publishing:
+                self.next_publish = now + self.publish_interval
+        super().async_update_listeners()
+        self.pdu.stats.add_phase(PHASE_ENTITY_WRITE, time.perf_counter() - start)
+
+    @property
+    def poll_lag(self) -> float:
+        """Seconds between the scheduled and the actual start of the last poll."""
+        return self.poll_state.poll_lag if self.poll_state is not None else 0.0
+
+    async def async_handle_notification(self, notification: str, objects: dict[str, tuple[tuple, any]]):
+        """Refresh only what an SNMP notification of the PDU is about, the whole PDU when it cannot tell."""
+        if notification == "rebootStarted":
+            return  # refreshed when the reboot completed
+        # The PDU is reachable when it sends notifications, probe it right away
+        self.circuit_breaker.next_probe = 0.0
+        if notification == "rebootCompleted":
+            self.pdu.request_tier_update(TIER_STATIC)
+
+        # The refreshed rows are published with async_update_listeners, only polls decide last_update_success so
+        # entities of a PDU whose circuit breaker is open stay unavailable until a probe succeeds
+        index = get_notification_outlet(objects)
+        if index is None or not 1 <= index <= self.pdu.outlet_count:
+            # A circuit breaker or external sensor row, or the whole PDU when the notification names no known row
+            row = get_notification_row(objects)
+            table = self.pdu.tables.get(row[0]) if row is not None else None
+            if table is None or row[1] not in table.slots:
+                await self.async_request_refresh()
+                return
+
+            async with self.update_lock:
+                if await self.pdu.update_table_row(*row):
+                    self.async_update_listeners()
+            return
+
+        async with self.update_lock:
+            outlet = self.pdu.get_outlet_by_index(index)
+            if "outletOperationalState" in objects:
+                # The notification carries the new state, publish it before the readings are fetched
+                new_sensor_data = {"operational_state": objects["outletOperationalState"][1]}
+                if "outletLabel" in objects:
+                    new_sensor_data["label"] = objects["outletLabel"][1]
+                outlet.update_sensor_data(new_sensor_data)
+                self.async_update_listeners()
+
+            if await self.pdu.update_outlet_sensors(index):
+                self.async_update_listeners()
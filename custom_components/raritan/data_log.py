@@ -0,0 +1,192 @@
+from .snmp import SNMPManager
+from .const import _LOGGER, TABLE_OUTLET, TABLE_INLET, TABLE_INLET_POLE
+
+# Readings recorded in dataLogOutletTable, dataLogInletTable and dataLogInletPoleTable:
+# table -> sensor name -> average, maximum and minimum column. Inlet currents are only logged per pole.
+DATA_LOG_MEASUREMENTS = {
+    TABLE_OUTLET: {
+        "current": ("dataLogAvgOutletCurrent", "dataLogMaxOutletCurrent", "dataLogMinOutletCurrent"),
+        "voltage": ("dataLogAvgOutletVoltage", "dataLogMaxOutletVoltage", "dataLogMinOutletVoltage"),
+        "power_factor": ("dataLogAvgOutletPowerFactor", "dataLogMaxOutletPowerFactor", "dataLogMinOutletPowerFactor"),
+    },
+    TABLE_INLET: {
+        "active_power": ("dataLogAvgInletActivePower", "dataLogMaxInletActivePower", "dataLogMinInletActivePower"),
+        "apparent_power": ("dataLogAvgInletApparentPower", "dataLogMaxInletApparentPower",
+                           "dataLogMinInletApparentPower"),
+    },
+    TABLE_INLET_POLE: {
+        "current": ("dataLogAvgInletPoleCurrent", "dataLogMaxInletPoleCurrent", "dataLogMinInletPoleCurrent"),
+        "voltage": ("dataLogAvgInletPoleVoltage", "dataLogMaxInletPoleVoltage", "dataLogMinInletPoleVoltage"),
+    },
+}
+
+# Energy counters recorded in the data log tables, only on PDUs with outlet energy support
+DATA_LOG_COUNTERS = {
+    TABLE_OUTLET: {
+        "watt_hours": "dataLogAvgOutletWattHours",
+    },
+    TABLE_INLET: {
+        "active_energy": "dataLogAvgInletActiveEnergy",
+    },
+}
+
+# Name of a row of a data log table, from the index of the component it records
+DATA_LOG_ROW_NAMES = {
+    TABLE_OUTLET: "outlet_{}",
+    TABLE_INLET: "inlet_{}",
+    TABLE_INLET_POLE: "inlet_{}_pole_{}",
+}
+
+# Entries imported per update, a long backlog (e.g. the whole buffer on the first import) is caught up over
+# several updates
+MAX_DATA_LOG_ENTRIES = 32
+
+
+class RaritanPDUDataLogEntry:
+    """One entry of the PDU's data log with the readings of every outlet, inlet and inlet pole."""
+    __slots__ = ("index", "timestamp", "measurements", "counters")
+
+    def __init__(self, index: int, timestamp: int):
+        self.index = index
+        self.timestamp = timestamp  # seconds since the epoch, UTC
+        self.measurements: dict[tuple[str, str], tuple[int, int, int]] = {}  # (row, sensor) -> (avg, max, min)
+        self.counters: dict[tuple[str, str], int] = {}  # (row, sensor) -> counter reading, e.g. ("outlet_1", ...)
+
+
+class RaritanPDUDataLog:
+    """Reads the entries the PDU appended to its circular data log since the last imported one."""
+
+    def __init__(self, snmp_manager: SNMPManager) -> None:
+        """Initialize."""
+        self.snmp_manager = snmp_manager
+
+        # The newest imported entry, restored from storage so nothing is imported twice or missed after a restart
+        self.last_index = 0
+        self.last_timestamp = 0
+        self.bulk_supported = True  # False once the PDU mishandled a GETBULK request, the rows are then read with GET
+
+    def get_candidate_indexes(self, count: int, latest_index: int) -> list[int]:
+        """Indexes of the entries newer than the last imported one, oldest first."""
+        indexes = []
+        for i in range(count):
+            index = (latest_index - 1 - i) % count + 1  # walk back from the latest entry around the ring
+            if index == self.last_index:
+                break
+            indexes.append(index)
+        indexes.reverse()
+        return indexes
+
+    async def fetch_new_entries(self, rows: dict[str, list[tuple]], energy_support: bool,
+                                max_repetitions: int) -> list[RaritanPDUDataLogEntry] | None:
+        """Fetch the entries not imported yet, with the given component indexes of each table.
+
+        Return None when the PDU did not respond.
+        """
+        result = await self.snmp_manager.snmp_get(["PDU-MIB", "dataLogCount", 0],
+                                                  ["PDU-MIB", "dataLogLatestIndex", 0])
+        if result is None or None in result:
+            return None
+
+        [count, latest_index] = result
+        if count <= 0 or not any(rows.values()):
+            return []
+
+        indexes = self.get_candidate_indexes(count, latest_index)
+        if not indexes:
+            return []
+
+        # The PDU may have rebooted or wrapped around since the last import, only the timestamps tell new entries
+        timestamps = await self.snmp_manager.snmp_get(*[["PDU-MIB", "dataLogTimeStamp", index] for index in indexes])
+        if timestamps is None:
+            return None
+        if len(indexes) == 1:
+            timestamps = [timestamps]
+
+        entries = [RaritanPDUDataLogEntry(index, timestamp) for index, timestamp in zip(indexes, timestamps)
+                   if timestamp is not None and timestamp > self.last_timestamp][:MAX_DATA_LOG_ENTRIES]
+        if not entries:
+            return []
+
+        symbols = {}
+        for table_name, indexes in rows.items():
+            if indexes:
+                symbols[table_name] = [symbol for columns in DATA_LOG_MEASUREMENTS[table_name].values()
+                                       for symbol in columns]
+                if energy_support:
+                    symbols[table_name].extend(DATA_LOG_COUNTERS.get(table_name, {}).values())
+
+        values = []
+        if max_repetitions > 0 and self.bulk_supported:
+            values = await self.fetch_columns_bulk(entries, symbols, max_repetitions)
+            if values == []:
+                _LOGGER.warning(f"{self.snmp_manager.host}:{self.snmp_manager.port} mishandled GETBULK, reading the "
+                                f"data log with GET")
+                self.bulk_supported = False
+        if values == []:
+            values = await self.fetch_columns(entries, symbols, rows)
+        if values is None:
+            return None
+
+        for entry in entries:
+            for table_name, table_symbols in symbols.items():
+                measurements = DATA_LOG_MEASUREMENTS[table_name]
+                for index in rows[table_name]:
+                    row = DATA_LOG_ROW_NAMES[table_name].format(*index)
+                    readings = [values.get((symbol, entry.index, tuple(index))) for symbol in table_symbols]
+                    for i, sensor_name in enumerate(measurements):
+                        measurement = readings[i * 3:i * 3 + 3]
+                        if None not in measurement:
+                            entry.measurements[(row, sensor_name)] = tuple(measurement)
+                    for sensor_name, reading in zip(DATA_LOG_COUNTERS.get(table_name, {}),
+                                                    readings[len(measurements) * 3:]):
+                        if reading is not None:
+                            entry.counters[(row, sensor_name)] = reading
+
+        _LOGGER.debug(f"Fetched data log entries {entries[0].index}..{entries[-1].index} "
+                      f"from {self.snmp_manager.host}:{self.snmp_manager.port}")
+        self.last_index = entries[-1].index
+        self.last_timestamp = entries[-1].timestamp
+        return entries
+
+    async def fetch_columns_bulk(self, entries: list[RaritanPDUDataLogEntry], symbols: dict[str, list[str]],
+                                 max_repetitions: int) -> dict | list | None:
+        """Walk only the rows of the given entries with GETBULK, one walk per run of consecutive indexes.
+
+        The columns of all tables are walked side by side, they are all indexed by the entry first.
+        Return None when the PDU did not respond and an empty list when it mishandled the GETBULK request.
+        """
+        runs = []
+        for entry in entries:
+            if runs and entry.index == runs[-1][1] + 1:
+                runs[-1][1] = entry.index
+            else:
+                runs.append([entry.index, entry.index])
+
+        values = {}
+        all_symbols = [symbol for table_symbols in symbols.values() for symbol in table_symbols]
+        columns = [["PDU-MIB", symbol] for symbol in all_symbols]
+        for first_index, last_index in runs:
+            # GETNEXT of column.first_index returns the first component row of that entry
+            results = await self.snmp_manager.snmp_bulk_get_columns(max_repetitions, *columns,
+                                                                    start_index=(first_index,),
+                                                                    stop_index=(last_index,))
+            if not results:
+                return results
+            for symbol, column in zip(all_symbols, results):
+                for (index, *component), value in column.items():
+                    values[(symbol, index, tuple(component))] = value
+        return values
+
+    async def fetch_columns(self, entries: list[RaritanPDUDataLogEntry], symbols: dict[str, list[str]],
+                            rows: dict[str, list[tuple]]) -> dict | None:
+        """GET the rows of the given entries, for agents without GETBULK support."""
+        keys = [(symbol, entry.index, tuple(index)) for entry in entries
+                for table_name, table_symbols in symbols.items() for index in rows[table_name]
+                for symbol in table_symbols]
+        results = await self.snmp_manager.snmp_get(*[["PDU-MIB", symbol, entry_index, *index]
+                                                     for symbol, entry_index, index in keys])
+        if results is None:
+            return None
+        if len(keys) == 1:
+            results = [results]
+        return dict(zip(keys, results))
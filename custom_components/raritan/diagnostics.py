@@ -0,0 +1,48 @@
+import time
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .coordinator import RaritanPDUCoordinator
+from .const import DOMAIN, CONF_READ_COMMUNITY, CONF_WRITE_COMMUNITY, CONF_V3_AUTH_PASSWORD, CONF_V3_PRIV_PASSWORD
+
+TO_REDACT = {CONF_READ_COMMUNITY, CONF_WRITE_COMMUNITY, CONF_V3_AUTH_PASSWORD, CONF_V3_PRIV_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the PDU topology, the polling state and the poll statistics of a config entry."""
+    coordinator: RaritanPDUCoordinator = hass.data[DOMAIN][entry.entry_id]
+    pdu = coordinator.pdu
+    snmp_manager = pdu.snmp_manager
+    now = time.monotonic()
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "pdu": {
+            "name": pdu.name,
+            "model": pdu.model,
+            "firmware_version": pdu.firmware_version,
+            "energy_support": pdu.energy_support,
+            "outlet_count": pdu.outlet_count,
+            "tables": {name: len(table.indexes) for name, table in pdu.tables.items()},
+        },
+        "polling": {
+            "bulk_supported": pdu.bulk_supported,
+            "max_repetitions": pdu.max_repetitions,
+            "snmp_engine_id": snmp_manager.usm_user.engine_id.hex()
+            if snmp_manager.usm_user is not None and snmp_manager.usm_user.engine_id is not None else None,
+            "chunk_size": snmp_manager.chunk_size,
+            "chunk_size_limit": snmp_manager.chunk_size_limit,
+            "request_plans": len(pdu.request_plans),
+            "poll_lag": coordinator.poll_lag,
+            "timeout": snmp_manager.round_trip.timeout,
+            "smoothed_round_trip": snmp_manager.round_trip.srtt,
+            "failed_polls": coordinator.circuit_breaker.failures,
+            # Seconds between the probes of an unreachable PDU, 0 while it is polled normally
+            "probe_delay": coordinator.circuit_breaker.probe_delay,
+            # Seconds since each tier was last fetched, None when it is due at the next poll
+            "tier_ages": {tier: now - updated if updated else None for tier, updated in pdu.tier_updates.items()},
+        },
+        "poll_stats": pdu.stats.as_dict(),
+    }
@@ -0,0 +1,40 @@
+from .const import _LOGGER
+
+# Readings further apart than this many polling intervals are not integrated, e.g. while the PDU was unreachable
+MAX_INTEGRATION_GAP_POLLS = 10
+
+
+def get_max_integration_gap(polling_interval: float) -> float:
+    """Seconds between two power readings above which they are not integrated."""
+    return MAX_INTEGRATION_GAP_POLLS * polling_interval
+
+
+def get_counter_delta(previous_watt_hours: int, watt_hours: int) -> int:
+    """Energy in Wh delivered between two readings of a device energy counter, such as outletWattHours."""
+    if watt_hours < previous_watt_hours:
+        # The counter was reset (or wrapped), count the energy delivered since the reset
+        _LOGGER.debug(f"Energy counter reset from {previous_watt_hours} to {watt_hours}")
+        return watt_hours
+    return watt_hours - previous_watt_hours
+
+
+def integrate_power(previous_power: float, power: float, previous_timestamp: float, timestamp: float,
+                    max_gap: float) -> float:
+    """Energy in Wh delivered between two power readings, calculated using the trapezoidal rule.
+
+    Timestamps are time.monotonic() values, 0 when there is no reading yet.
+    """
+    # not enough data to estimate
+    if previous_timestamp == 0 or timestamp == 0:
+        return 0.0
+
+    time_diff_seconds = timestamp - previous_timestamp
+    if time_diff_seconds <= 0:
+        return 0.0
+
+    if time_diff_seconds > max_gap:
+        _LOGGER.debug(f"Not integrating power across a {time_diff_seconds:.0f}s gap between readings")
+        return 0.0
+
+    time_diff_hours = time_diff_seconds / (60.0 * 60.0)  # 3600s in 1 hour
+    return (previous_power + power) / 2.0 * time_diff_hours
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import Entity, EntityDescription
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .raritan_pdu import RaritanPDUOutlet
+from .raritan_pdu import RaritanPDUOutlet, RaritanPDUTable
+from .metrics import get_publish_deadband
 from .coordinator import RaritanPDUCoordinator
-from .const import _LOGGER
+
+
+def get_outlet_unique_id_prefix(pdu_name: str) -> str:
+    """Start of the unique ids of a PDU's outlet entities, followed by the outlet index and the entity key."""
+    return f"{pdu_name}-outlet-".replace(" ", "-").lower()
+
+
+def is_beyond_deadband(value: any, published_value: any, deadband: float) -> bool:
+    if isinstance(value, (int, float)) and isinstance(published_value, (int, float)):
+        return abs(value - published_value) > deadband
+    return value != published_value
 
 
 class RaritanPDUEntity(CoordinatorEntity, Entity):
-    """Dyson entity base class."""
+    """Base class of the entities of a Raritan PDU and its outlets.
+
+    The name, unique id and device info are computed once and kept in the _attr_ fields Home Assistant caches, they
+    are only computed again when the coordinator's naming version says the PDU or a label was renamed.
+    """
 
     def __init__(self, coordinator: RaritanPDUCoordinator, description: EntityDescription, outlet_index: int):
         """Initialize the entity."""
@@ -21,17 +40,27 @@ class RaritanPDUEntity(CoordinatorEntity, Entity):
         self.outlet: RaritanPDUOutlet = None
         if self.outlet_index > 0:
             self.outlet = self.coordinator.pdu.get_outlet_by_index(self.outlet_index)
+            # In compact mode the PDU's outlet summary stands in for the outlet entities, which are enabled one by one
+            if coordinator.compact_entities:
+                self._attr_entity_registry_enabled_default = False
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
+        self.naming_version = coordinator.naming_version
+        self._attr_name = self.get_name()
+        self._attr_unique_id = self.get_unique_id()
+        self._attr_device_info = coordinator.device_info
+
+        # State last written, compared with the new one to skip writes when nothing changed
+        self.deadband = get_publish_deadband(description, coordinator.publish_deadbands)
+        self.published_state: tuple = None
+        self.published_at = 0.0
+
+    def get_name(self) -> str:
         default_name = self.entity_description.key.replace('_', ' ').lower()
         default_name = default_name.replace('cpu', 'CPU')  # handle special term
 
         name_prefix = self.coordinator.pdu.name
-        _LOGGER.debug(f"description {self.entity_description.key}, {default_name}, {self.entity_description.name}")
         if self.outlet is not None:
-            outlet_label = self.outlet.sensor_data['label']
+            outlet_label = self.outlet['label']
             name_prefix = f"{name_prefix} Outlet {self.outlet_index}"
             if outlet_label != f"Outlet {self.outlet_index}":
                 name_prefix = f"{name_prefix} {outlet_label}"
@@ -39,13 +68,80 @@ class RaritanPDUEntity(CoordinatorEntity, Entity):
         else:
             return f"{name_prefix} {default_name}"
 
-    @property
-    def unique_id(self) -> str:
-        """Return the entity unique id."""
-        return f"{self.coordinator.pdu.name}-outlet-{self.outlet_index}-{self.entity_description.key}".replace(
-            " ", "-").lower()
+    def get_unique_id(self) -> str:
+        return f"{get_outlet_unique_id_prefix(self.coordinator.pdu.name)}{self.outlet_index}-" \
+               f"{self.entity_description.key}"
+
+    def update_naming(self):
+        """Compute the name, unique id and device info again, moving the entity registry entry along."""
+        self.naming_version = self.coordinator.naming_version
+        name = self.get_name()
+        unique_id = self.get_unique_id()
+        self._attr_device_info = self.coordinator.device_info
+
+        changes = {}
+        if name != self._attr_name:
+            self._attr_name = changes["original_name"] = name
+        if unique_id != self._attr_unique_id:
+            self._attr_unique_id = changes["new_unique_id"] = unique_id
+        if changes and self.registry_entry is not None:
+            er.async_get(self.hass).async_update_entity(self.entity_id, **changes)
+
+    def is_changed(self, state: tuple) -> bool:
+        """Whether the state is to be written: it changed beyond the deadband, or the heartbeat interval passed.
 
-    @property
-    def device_info(self) -> dict:
-        """Return device info of the entity."""
-        return self.coordinator.device_info
+        Always true without a heartbeat interval, while the coordinator fails, and after a rename.
+        """
+        coordinator = self.coordinator
+        now = time.monotonic()
+        if (coordinator.heartbeat_interval and coordinator.last_update_success
+                and self.published_state is not None and self.naming_version == coordinator.naming_version
+                and now < self.published_at + coordinator.heartbeat_interval
+                and not any(is_beyond_deadband(value, published_value, self.deadband)
+                            for value, published_value in zip(state, self.published_state))):
+            return False
+
+        # The state after a failure is written again once the PDU responds
+        self.published_state = state if coordinator.last_update_success else None
+        self.published_at = now
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.naming_version != self.coordinator.naming_version:
+            self.update_naming()
+        super()._handle_coordinator_update()
+
+
+class RaritanPDUTableEntity(RaritanPDUEntity):
+    """Entity of one row of a component table, e.g. a circuit breaker or an external sensor."""
+
+    def __init__(self, coordinator: RaritanPDUCoordinator, description: EntityDescription, table: RaritanPDUTable,
+                 slot: int, value_key: str = None):
+        """Initialize the entity."""
+        self.table_name = table.name
+        self.row_index = table.indexes[slot]
+        self.value_key = value_key or description.key  # the table reading shown by the entity
+        RaritanPDUEntity.__init__(self, coordinator, description, 0)
+
+    def get_row_value(self) -> any:
+        """The reading of the row, None when the PDU no longer has the row."""
+        table = self.coordinator.pdu.tables.get(self.table_name)
+        if table is None or self.row_index not in table.slots:
+            return None
+        return table.current[self.value_key][table.slots[self.row_index]]
+
+    def get_name(self) -> str:
+        # The PDU recreates its tables when the topology changes, the row may have moved or be gone
+        table = self.coordinator.pdu.tables.get(self.table_name)
+        if table is None or self.row_index not in table.slots:
+            return self._attr_name
+        row_name = table.get_row_name(table.slots[self.row_index])
+        default_name = self.entity_description.key.replace('_', ' ').lower()
+        return f"{self.coordinator.pdu.name} {row_name} {default_name}"
+
+    def get_unique_id(self) -> str:
+        index = "-".join(str(number) for number in self.row_index)
+        return f"{self.coordinator.pdu.name}-{self.table_name}-{index}-{self.entity_description.key}".replace(
+            " ", "-").lower()
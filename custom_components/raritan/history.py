@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfEnergy, UnitOfPower, \
+    UnitOfApparentPower, PERCENTAGE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .data_log import RaritanPDUDataLogEntry, DATA_LOG_COUNTERS
+from .energy import get_counter_delta
+from .raritan_pdu import RaritanPDU
+from .const import _LOGGER, DOMAIN, DATA_LOG_STORAGE_KEY, DATA_LOG_STORAGE_VERSION
+
+# Units of the data log readings, the same native units as the outlet and inlet sensors
+DATA_LOG_UNITS = {
+    "current": UnitOfElectricCurrent.MILLIAMPERE,
+    "voltage": UnitOfElectricPotential.MILLIVOLT,
+    "power_factor": PERCENTAGE,
+    "active_power": UnitOfPower.WATT,
+    "apparent_power": UnitOfApparentPower.VOLT_AMPERE,
+    "watt_hours": UnitOfEnergy.WATT_HOUR,
+    "active_energy": UnitOfEnergy.WATT_HOUR,
+}
+
+# Readings summed as counters instead of averaged
+DATA_LOG_COUNTER_NAMES = frozenset(sensor_name for counters in DATA_LOG_COUNTERS.values() for sensor_name in counters)
+
+HOUR = 3600
+
+
+def get_history_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Storage of the data log import state of a config entry."""
+    return Store(hass, DATA_LOG_STORAGE_VERSION, f"{DATA_LOG_STORAGE_KEY}.{entry_id}")
+
+
+class RaritanPDUHistory:
+    """Imports the PDU's data log into Home Assistant as hourly external statistics.
+
+    Long-term statistics only take whole hours, so the entries of the hour still being recorded are kept as running
+    aggregates and the hour is imported again, replacing the earlier rows, as its later entries arrive.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, pdu: RaritanPDU) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.pdu = pdu
+        self.store = get_history_store(hass, entry_id)
+
+        # Running aggregates of the latest hour: "row:sensor" -> [count, total, max, min] or [reading, sum],
+        # where the row is e.g. "outlet_1" or "inlet_1_pole_2"
+        self.hour_start = 0
+        self.hour_measurements: dict[str, list] = {}
+        self.hour_counters: dict[str, list] = {}
+        # Last imported counter reading and the energy summed up to it, "row:sensor" -> [reading, sum]
+        self.counter_sums: dict[str, list] = {}
+
+    async def async_load(self):
+        """Restore the last imported entry and the aggregates of the latest hour."""
+        data = await self.store.async_load()
+        if not data:
+            return
+
+        self.pdu.data_log.last_index = data["last_index"]
+        self.pdu.data_log.last_timestamp = data["last_timestamp"]
+        self.hour_start = data["hour_start"]
+        self.hour_measurements = data["hour_measurements"]
+        self.hour_counters = data["hour_counters"]
+        self.counter_sums = data["counter_sums"]
+
+    async def async_update(self):
+        """Import the data log entries the PDU recorded since the last import."""
+        entries = await self.pdu.update_data_log()
+        if not entries:
+            return
+
+        await self.async_load_counter_sums(entries)
+        self.import_entries(entries)
+        await self.store.async_save({
+            "last_index": self.pdu.data_log.last_index,
+            "last_timestamp": self.pdu.data_log.last_timestamp,
+            "hour_start": self.hour_start,
+            "hour_measurements": self.hour_measurements,
+            "hour_counters": self.hour_counters,
+            "counter_sums": self.counter_sums,
+        })
+
+    async def async_load_counter_sums(self, entries: list[RaritanPDUDataLogEntry]):
+        """Continue the sums of counters without a stored sum from their last imported statistics."""
+        keys = {f"{row}:{sensor_name}" for entry in entries for row, sensor_name in entry.counters}
+        for key in keys - self.counter_sums.keys():
+            row, sensor_name = key.split(":")
+            statistic_id = self.get_metadata(row, sensor_name)["statistic_id"]
+            last_statistics = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, False, {"state", "sum"})
+            rows = last_statistics.get(statistic_id)
+            if rows and rows[0].get("state") is not None and rows[0].get("sum") is not None:
+                self.counter_sums[key] = [rows[0]["state"], rows[0]["sum"]]
+
+    def import_entries(self, entries: list[RaritanPDUDataLogEntry]):
+        """Aggregate the entries by hour and add the statistics of every hour they touch."""
+        statistics: dict[str, list[StatisticData]] = {}
+
+        for entry in entries:
+            hour_start = entry.timestamp - entry.timestamp % HOUR
+            if hour_start != self.hour_start:
+                if self.hour_start:
+                    self.add_hour_statistics(statistics)
+                self.hour_start = hour_start
+                self.hour_measurements = {}
+                self.hour_counters = {}
+
+            for (row, sensor_name), (average, maximum, minimum) in entry.measurements.items():
+                key = f"{row}:{sensor_name}"
+                aggregate = self.hour_measurements.get(key)
+                if aggregate is None:
+                    self.hour_measurements[key] = [1, average, maximum, minimum]
+                else:
+                    aggregate[0] += 1
+                    aggregate[1] += average
+                    aggregate[2] = max(aggregate[2], maximum)
+                    aggregate[3] = min(aggregate[3], minimum)
+
+            for (row, sensor_name), reading in entry.counters.items():
+                # The sum grows by the energy delivered between readings, a counter reset does not decrease it
+                key = f"{row}:{sensor_name}"
+                counter_sum = self.counter_sums.get(key)
+                total = 0 if counter_sum is None else counter_sum[1] + get_counter_delta(counter_sum[0], reading)
+                self.counter_sums[key] = [reading, total]
+                self.hour_counters[key] = [reading, total]
+
+        # The latest hour is imported with what is known so far and completed by later imports
+        self.add_hour_statistics(statistics)
+
+        for key, rows in statistics.items():
+            row, sensor_name = key.split(":")
+            async_add_external_statistics(self.hass, self.get_metadata(row, sensor_name), rows)
+
+        _LOGGER.debug(f"Imported {len(entries)} data log entries of {self.pdu.name} into {len(statistics)} statistics")
+
+    def add_hour_statistics(self, statistics: dict[str, list[StatisticData]]):
+        start = datetime.fromtimestamp(self.hour_start, timezone.utc)
+        for key, (count, total, maximum, minimum) in self.hour_measurements.items():
+            statistics.setdefault(key, []).append(
+                StatisticData(start=start, mean=total / count, max=maximum, min=minimum))
+        for key, (reading, total) in self.hour_counters.items():
+            statistics.setdefault(key, []).append(StatisticData(start=start, state=reading, sum=total))
+
+    def get_metadata(self, row: str, sensor_name: str) -> StatisticMetaData:
+        counter = sensor_name in DATA_LOG_COUNTER_NAMES
+        return StatisticMetaData(
+            has_mean=not counter,
+            has_sum=counter,
+            name=f"{self.pdu.name} {row.replace('_', ' ').capitalize()} {sensor_name.replace('_', ' ')}",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{slugify(self.pdu.name)}_{row}_{sensor_name}",
+            unit_of_measurement=DATA_LOG_UNITS[sensor_name],
+        )
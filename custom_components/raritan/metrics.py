@@ -0,0 +1,510 @@
+import re
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntityDescription
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass, SensorEntityDescription
+from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfPower, PERCENTAGE, UnitOfEnergy, \
+    UnitOfTemperature, UnitOfApparentPower, UnitOfPressure, UnitOfSpeed, UnitOfFrequency
+from homeassistant.helpers.entity import EntityDescription
+
+from .const import TIER_STATIC, TIER_CONFIG, TIER_LIVE, TIER_ENVIRONMENT, TABLE_INLET, TABLE_INLET_POLE, \
+    TABLE_CIRCUIT_BREAKER, TABLE_LINE_CURRENT, TABLE_LINE_VOLTAGE, TABLE_TEMPERATURE_SENSOR, TABLE_HUMIDITY_SENSOR, \
+    PUBLISH_DEADBANDS
+
+
+class RaritanPDUMetric:
+    """A reading of the PDU or of each row of a table such as outletTable: its MIB column, scaling and entity."""
+    __slots__ = ("key", "symbol", "tier", "default", "scale", "convert", "derive", "counter", "description",
+                 "energy_support")
+
+    def __init__(self, key: str, symbol: str | None, tier: str = TIER_LIVE, default: any = 0, scale: float = None,
+                 convert=None, derive=None, counter: str = None, description: EntityDescription = None,
+                 energy_support: bool = False):
+        self.key = key
+        self.symbol = symbol  # PDU-MIB object, None for readings derived from others such as energy_delivered
+        self.tier = tier
+        self.default = default
+        self.scale = scale  # factor from the reported value to the native unit of the entity
+        self.convert = convert  # parses reported values that are not numbers, e.g. DisplayString percentages
+        self.derive = derive  # derive(readings, slot) computes a derived metric from the row's other readings
+        self.counter = counter  # key of the device counter whose increments the metric sums across counter resets
+        self.description = description  # sensor shown for the metric, None when shown by other platforms or not at all
+        self.energy_support = energy_support  # only available on PDUs with outlet energy support
+
+
+def parse_number(value: str) -> float | None:
+    """Number in a DisplayString reading such as inletCurrentUnbalance "12%", None for "NA"."""
+    match = re.search(r"-?\d+(\.\d+)?", value)
+    return float(match.group()) if match else None
+
+
+def get_current_headroom(readings: dict[str, list], slot: int) -> int | None:
+    """Current that can still be drawn before the breaker reaches its rating, in milliamps."""
+    rating = readings["current_rating"][slot]
+    current = readings["current"][slot]
+    if rating is None or current is None:
+        return None
+    return rating - current
+
+
+# PDU readings, scalars with index 0
+PDU_METRICS = (
+    # The value for the unit's CPU temperature sensor in tenth degrees celsius.
+    RaritanPDUMetric("cpu_temperature", "unitCpuTemp", scale=0.1, description=SensorEntityDescription(
+        key="cpu_temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        suggested_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:thermometer",
+    )),
+)
+
+# Outlet readings, one row per outlet in outletTable. Ignore some data for performance optimization.
+# To add an outlet sensor, uncomment/update the corresponding metric. SensorEntityDescription.name will be assigned
+# based on outlet label inside the sensor class.
+OUTLET_METRICS = (
+    # A textual string containing information about the outlet.
+    RaritanPDUMetric("label", "outletLabel", tier=TIER_CONFIG, default=""),
+
+    # A value for each outlet which describes the operational state of the outlet. It is also used to set the operational state of the outlet Enumeration: 'on': 1, 'cycling': 2, 'off': 0, 'error': -1.
+    RaritanPDUMetric("operational_state", "outletOperationalState", default=""),
+
+    # A unique value for the current sensor attached to the outlet. This value is reported in milliamps (1/1000th of an amp)
+    RaritanPDUMetric("current", "outletCurrent", description=SensorEntityDescription(
+        key="current",
+        device_class=SensorDeviceClass.CURRENT,
+        native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
+        suggested_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-ac",
+    )),
+
+    # A unique value for the max. current sensor attached to the outlet. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("max_current", "outletMaxCurrent"),
+
+    # A unique value for the voltage sensor attached to the outlet.This value is reported in millivolts (1/1000th of a volt)
+    RaritanPDUMetric("voltage", "outletVoltage", description=SensorEntityDescription(
+        key="voltage",
+        device_class=SensorDeviceClass.VOLTAGE,
+        native_unit_of_measurement=UnitOfElectricPotential.MILLIVOLT,
+        suggested_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:sine-wave",
+    )),
+
+    # A unique value for the active power sensor attached to the outlet. This value is reported in Watts. The real power consumption.
+    RaritanPDUMetric("active_power", "outletActivePower", description=SensorEntityDescription(
+        key="active_power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        suggested_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:flash",
+    )),
+
+    # A unique value for the apparent power sensor attached to the outlet. This value is reported in Volt-Amps. This is the product of current and voltage.
+    # RaritanPDUMetric("apparent_power", "outletApparentPower"),
+
+    # A unique value for the power factor of the outlet. The reading represents a percentage in the range of 0% to 100%. The power factor, a ratio of real power to apparent power.
+    RaritanPDUMetric("power_factor", "outletPowerFactor", description=SensorEntityDescription(
+        key="power_factor",
+        device_class=SensorDeviceClass.POWER_FACTOR,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:angle-acute",
+    )),
+
+    # The value of the upper warning (non-critical) current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("current_upper_warning", "outletCurrentUpperWarning", tier=TIER_CONFIG),
+
+    # The value of the upper critical current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("current_upper_critical", "outletCurrentUpperCritical", tier=TIER_CONFIG),
+
+    # The value of the lower warning (non-critical) current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("current_lower_warning", "outletCurrentLowerWarning", tier=TIER_CONFIG),
+
+    # The value of the lower critical current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("current_lower_critical", "outletCurrentLowerCritical", tier=TIER_CONFIG),
+
+    # The hysteresis used for deassertions. This value is reported in milliamps (1/1000th of an amp)
+    # RaritanPDUMetric("current_hysteresis", "outletCurrentHysteresis", tier=TIER_CONFIG),
+
+    # The current rating of the outlet. This value is reported in milliamps (1/1000th of an amp). The rated maximum current that the system can safely handle, in milliamps
+    # RaritanPDUMetric("current_rating", "outletCurrentRating", tier=TIER_CONFIG),
+
+    # NOT SUPPORTED by all PDUs. The value of the cumulative active energy for this outlet. This value is reported in WattHours. The total energy consumption in watt-hours (accumulated over time)
+    RaritanPDUMetric("watt_hours", "outletWattHours", energy_support=True),
+
+    # Energy delivered since the integration was set up, from the watt-hour counter or integrated active power
+    RaritanPDUMetric("energy_delivered", None, description=SensorEntityDescription(
+        key="energy_delivered",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL,
+        icon="mdi:lightning-bolt",
+    )),
+)
+
+OUTLET_METRICS_BY_KEY = {metric.key: metric for metric in OUTLET_METRICS}
+
+
+def current_sensor(key: str = "current") -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key=key,
+        device_class=SensorDeviceClass.CURRENT,
+        native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
+        suggested_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-ac",
+    )
+
+
+def voltage_sensor() -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key="voltage",
+        device_class=SensorDeviceClass.VOLTAGE,
+        native_unit_of_measurement=UnitOfElectricPotential.MILLIVOLT,
+        suggested_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:sine-wave",
+    )
+
+
+def active_power_sensor() -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key="active_power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:flash",
+    )
+
+
+# Inlet readings, one row per inlet in inletTable
+INLET_METRICS = (
+    RaritanPDUMetric("current", "inletCurrent", description=current_sensor()),
+    RaritanPDUMetric("voltage", "inletVoltage", description=voltage_sensor()),
+    RaritanPDUMetric("active_power", "inletActivePower", description=active_power_sensor()),
+    RaritanPDUMetric("apparent_power", "inletApparentPower", description=SensorEntityDescription(
+        key="apparent_power",
+        device_class=SensorDeviceClass.APPARENT_POWER,
+        native_unit_of_measurement=UnitOfApparentPower.VOLT_AMPERE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:flash-outline",
+    )),
+    RaritanPDUMetric("power_factor", "inletPowerFactor", description=SensorEntityDescription(
+        key="power_factor",
+        device_class=SensorDeviceClass.POWER_FACTOR,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:angle-acute",
+    )),
+
+    # The cumulative active energy of the inlet in WattHours, reset only by the PDU. Like the outlet counters it is
+    # only valid on PDUs with outlet energy support. None until the first reading, which is only the baseline.
+    RaritanPDUMetric("active_energy", "inletActiveEnergy", default=None, energy_support=True),
+
+    # Energy delivered since the integration was set up, summed from the inlet's counter across counter resets
+    RaritanPDUMetric("energy_delivered", None, default=0.0, counter="active_energy", energy_support=True,
+                     description=SensorEntityDescription(
+                         key="energy_delivered",
+                         device_class=SensorDeviceClass.ENERGY,
+                         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+                         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                         state_class=SensorStateClass.TOTAL,
+                         icon="mdi:lightning-bolt",
+                     )),
+
+    # The current unbalance of 3-phase inlets in percent, reported as a string that is NA on single phase inlets
+    RaritanPDUMetric("current_unbalance", "inletCurrentUnbalance", default=None, convert=parse_number,
+                     description=SensorEntityDescription(
+                         key="current_unbalance",
+                         native_unit_of_measurement=PERCENTAGE,
+                         state_class=SensorStateClass.MEASUREMENT,
+                         icon="mdi:scale-unbalanced",
+                     )),
+    RaritanPDUMetric("current_rating", "inletCurrentRating", tier=TIER_CONFIG),
+)
+
+# Inlet pole readings, one row per pole of each inlet in inletPoleTable, indexed by inlet and pole
+INLET_POLE_METRICS = (
+    RaritanPDUMetric("label", "inletPoleLabel", tier=TIER_CONFIG, default=""),
+    RaritanPDUMetric("current", "inletPoleCurrent", description=current_sensor()),
+    RaritanPDUMetric("voltage", "inletPoleVoltage", description=voltage_sensor()),
+    RaritanPDUMetric("active_power", "inletPoleActivePower", description=active_power_sensor()),
+)
+
+# Circuit breaker readings, one row per breaker in circuitBreakerTable
+CIRCUIT_BREAKER_METRICS = (
+    RaritanPDUMetric("label", "circuitBreakerLabel", tier=TIER_CONFIG, default=""),
+    RaritanPDUMetric("state", "circuitBreakerState", default=None, description=SensorEntityDescription(
+        key="state",
+        device_class=SensorDeviceClass.ENUM,
+        options=["ok", "tripped"],
+        icon="mdi:electric-switch",
+    )),
+    RaritanPDUMetric("current_rating", "circuitBreakerCurrentRating", tier=TIER_CONFIG),
+    RaritanPDUMetric("current", "circuitBreakerCurrent", description=current_sensor()),
+
+    # Current that can still be drawn before the breaker trips, the closest limit of a loaded PDU
+    RaritanPDUMetric("current_headroom", None, default=None, derive=get_current_headroom,
+                     description=current_sensor("current_headroom")),
+)
+
+# Line readings of PDUs without inlet pole support, one row per line in lineCurrentTable and lineVoltageTable
+LINE_CURRENT_METRICS = (
+    RaritanPDUMetric("label", "lineCurrentLabel", tier=TIER_CONFIG, default=""),
+    RaritanPDUMetric("current", "lineCurrent", description=current_sensor()),
+)
+LINE_VOLTAGE_METRICS = (
+    RaritanPDUMetric("label", "lineVoltageLabel", tier=TIER_CONFIG, default=""),
+    RaritanPDUMetric("voltage", "lineVoltage", description=voltage_sensor()),
+)
+
+# Environmental sensors of PDUs without externalSensorTable, one row per sensor in tempSensorTable and
+# humiditySensorTable. Both are deprecated in favor of externalSensors.
+TEMPERATURE_SENSOR_METRICS = (
+    RaritanPDUMetric("label", "tempSensorLabel", tier=TIER_CONFIG, default=""),
+
+    # The value of the external temperature sensor reported in tenth degrees celsius.
+    RaritanPDUMetric("temperature", "temperature", tier=TIER_ENVIRONMENT, default=None, scale=0.1,
+                     description=SensorEntityDescription(
+                         key="temperature",
+                         device_class=SensorDeviceClass.TEMPERATURE,
+                         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+                         state_class=SensorStateClass.MEASUREMENT,
+                         icon="mdi:thermometer",
+                     )),
+)
+HUMIDITY_SENSOR_METRICS = (
+    RaritanPDUMetric("label", "humiditySensorLabel", tier=TIER_CONFIG, default=""),
+
+    # The value of the external humidity sensor reported as relative humidity (a percentage).
+    RaritanPDUMetric("humidity", "humidity", tier=TIER_ENVIRONMENT, default=None, description=SensorEntityDescription(
+        key="humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:water-percent",
+    )),
+)
+
+# Metrics of the PDU component tables polled alongside the outlet table
+TABLE_METRICS = {
+    TABLE_INLET: INLET_METRICS,
+    TABLE_INLET_POLE: INLET_POLE_METRICS,
+    TABLE_CIRCUIT_BREAKER: CIRCUIT_BREAKER_METRICS,
+    TABLE_LINE_CURRENT: LINE_CURRENT_METRICS,
+    TABLE_LINE_VOLTAGE: LINE_VOLTAGE_METRICS,
+    TABLE_TEMPERATURE_SENSOR: TEMPERATURE_SENSOR_METRICS,
+    TABLE_HUMIDITY_SENSOR: HUMIDITY_SENSOR_METRICS,
+}
+
+# Discrete external sensor types, their externalSensorValue does not apply and they are shown as binary sensors
+EXTERNAL_BINARY_SENSOR_CLASSES = {
+    "onOff": BinarySensorDeviceClass.POWER,
+    "trip": BinarySensorDeviceClass.PROBLEM,
+    "vibration": BinarySensorDeviceClass.VIBRATION,
+    "waterDetection": BinarySensorDeviceClass.MOISTURE,
+    "smokeDetection": BinarySensorDeviceClass.SMOKE,
+    "binary": None,
+    "contact": BinarySensorDeviceClass.OPENING,
+}
+
+# States of discrete external sensors, the others mean the sensor is off
+EXTERNAL_BINARY_SENSOR_ON_STATES = ("open", "on", "detected", "alarmed")
+
+# Poll tier of each external sensor type. Slowly changing readings are read in the environment tier so they do not
+# add var-binds to every poll, all other types including the discrete ones are read on every poll.
+EXTERNAL_SENSOR_TIERS = {
+    "temperature": TIER_ENVIRONMENT,
+    "humidity": TIER_ENVIRONMENT,
+    "airFlow": TIER_ENVIRONMENT,
+    "airPressure": TIER_ENVIRONMENT,
+}
+
+# Device class of the numeric external sensor types
+EXTERNAL_SENSOR_CLASSES = {
+    "rmsCurrent": SensorDeviceClass.CURRENT,
+    "peakCurrent": SensorDeviceClass.CURRENT,
+    "rmsVoltage": SensorDeviceClass.VOLTAGE,
+    "activePower": SensorDeviceClass.POWER,
+    "apparentPower": SensorDeviceClass.APPARENT_POWER,
+    "powerFactor": SensorDeviceClass.POWER_FACTOR,
+    "activeEnergy": SensorDeviceClass.ENERGY,
+    "temperature": SensorDeviceClass.TEMPERATURE,
+    "humidity": SensorDeviceClass.HUMIDITY,
+    "airFlow": SensorDeviceClass.WIND_SPEED,
+    "airPressure": SensorDeviceClass.PRESSURE,
+}
+
+# Home Assistant unit of each externalSensorUnits value
+EXTERNAL_SENSOR_UNITS = {
+    "volt": UnitOfElectricPotential.VOLT,
+    "amp": UnitOfElectricCurrent.AMPERE,
+    "watt": UnitOfPower.WATT,
+    "voltamp": UnitOfApparentPower.VOLT_AMPERE,
+    "wattHour": UnitOfEnergy.WATT_HOUR,
+    "degreeC": UnitOfTemperature.CELSIUS,
+    "degreeF": UnitOfTemperature.FAHRENHEIT,
+    "hertz": UnitOfFrequency.HERTZ,
+    "percent": PERCENTAGE,
+    "meterpersec": UnitOfSpeed.METERS_PER_SECOND,
+    "pascal": UnitOfPressure.PA,
+    "psi": UnitOfPressure.PSI,
+}
+
+
+def get_external_sensor_value(readings: dict[str, list], slot: int) -> float | None:
+    """The reading of a numeric external sensor, externalSensorValue has externalSensorDecimalDigits decimals."""
+    reading = readings["reading"][slot]
+    if reading is None or readings["type"][slot] in EXTERNAL_BINARY_SENSOR_CLASSES:
+        return None
+    return reading / 10 ** (readings["decimal_digits"][slot] or 0)
+
+
+# External sensor readings, one row per sensor in externalSensorTable. The static metrics are the sensor topology,
+# read when the sensor count changes, and the type of each sensor decides how often its row is polled.
+EXTERNAL_SENSOR_METRICS = (
+    RaritanPDUMetric("type", "externalSensorType", tier=TIER_STATIC, default=None),
+    RaritanPDUMetric("label", "externalSensorName", tier=TIER_STATIC, default=""),
+    RaritanPDUMetric("units", "externalSensorUnits", tier=TIER_STATIC, default=None),
+    RaritanPDUMetric("decimal_digits", "externalSensorDecimalDigits", tier=TIER_STATIC),
+    RaritanPDUMetric("state", "externalSensorState", default=None),
+    RaritanPDUMetric("reading", "externalSensorValue", default=None),
+    RaritanPDUMetric("value", None, default=None, derive=get_external_sensor_value),
+)
+
+
+def get_external_sensor_description(sensor_type: str, units: str) -> SensorEntityDescription | None:
+    """Sensor showing the value of a numeric external sensor, None for discrete sensors."""
+    if sensor_type is None or sensor_type in EXTERNAL_BINARY_SENSOR_CLASSES:
+        return None
+
+    device_class = EXTERNAL_SENSOR_CLASSES.get(sensor_type)
+    return SensorEntityDescription(
+        key=sensor_type,
+        device_class=device_class,
+        native_unit_of_measurement=EXTERNAL_SENSOR_UNITS.get(units),
+        state_class=(SensorStateClass.TOTAL_INCREASING if device_class == SensorDeviceClass.ENERGY
+                     else SensorStateClass.MEASUREMENT),
+    )
+
+
+def get_external_binary_sensor_description(sensor_type: str) -> BinarySensorEntityDescription | None:
+    """Binary sensor showing the state of a discrete external sensor, None for numeric sensors."""
+    if sensor_type not in EXTERNAL_BINARY_SENSOR_CLASSES:
+        return None
+    return BinarySensorEntityDescription(key=sensor_type, device_class=EXTERNAL_BINARY_SENSOR_CLASSES[sensor_type])
+
+
+def get_publish_deadband(description: EntityDescription, deadbands: dict[str, float]) -> float:
+    """Change of the native value below which an entity's state is not written again, 0 to write on any change.
+
+    The configured deadbands by device class override the defaults of PUBLISH_DEADBANDS.
+    """
+    device_class = getattr(description, "device_class", None)
+    deadband, unit = PUBLISH_DEADBANDS.get(device_class, (0, None))
+    if unit != getattr(description, "native_unit_of_measurement", None):
+        return 0
+    return deadbands.get(device_class, deadband)
+
+
+def get_polled_metrics(metrics: tuple[RaritanPDUMetric, ...], energy_support: bool) -> tuple[RaritanPDUMetric, ...]:
+    """The metrics read from the PDU, without derived ones and those the PDU does not support."""
+    return tuple(metric for metric in metrics
+                 if metric.symbol is not None and (energy_support or not metric.energy_support))
+
+
+def convert_values(metric: RaritanPDUMetric, values: list) -> list:
+    """Convert reported values to the native unit of the metric, None stays None."""
+    if metric.convert is not None:
+        values = [None if value is None else metric.convert(value) for value in values]
+    if metric.scale is not None:
+        values = [None if value is None else value * metric.scale for value in values]
+    return values
+
+
+class RaritanPDURequestSection:
+    """The rows and metrics of one table in a request plan."""
+    __slots__ = ("table", "metrics", "keys", "indexes", "offset", "walked", "bulk_offset")
+
+    def __init__(self, table: str, metrics: tuple[RaritanPDUMetric, ...], indexes: list[tuple[int, ...]], offset: int,
+                 walked: bool, bulk_offset: int):
+        self.table = table
+        self.metrics = metrics
+        self.keys = tuple(metric.key for metric in metrics)
+        self.indexes = indexes
+        self.offset = offset  # of the first GET result, the readings of metric i start at offset + i * len(indexes)
+        self.walked = walked  # columns walked with GETBULK, or rows fetched as instances of the bulk requests
+        self.bulk_offset = bulk_offset  # of the first bulk column, or of the first bulk instance laid out as for GET
+
+
+class RaritanPDURequestPlan:
+    """The flat request of some polling tiers, compiled once per PDU topology and reused by every poll.
+
+    The PDU scalars, the outlet table and the other component tables are sections of the same request, so they
+    share its round trips. GET results are laid out scalar by scalar, then table by table and metric by metric at
+    fixed offsets. With GETBULK only the columns of the walked table are walked, the scalars and the planned rows of
+    the smaller tables are fetched as non-repeaters of the same requests, in the GET layout.
+    """
+    __slots__ = ("scalars", "sections", "columns", "instances", "oids", "row_count")
+
+    def __init__(self, tables: list[tuple[str, tuple[RaritanPDUMetric, ...], list[tuple[int, ...]]]],
+                 scalars: tuple[RaritanPDUMetric, ...] = (), walked_table: str = None):
+        self.scalars = scalars
+        self.sections: dict[str, RaritanPDURequestSection] = {}
+        self.columns = []  # bulk column walks
+        self.oids = [["PDU-MIB", metric.symbol, 0] for metric in scalars]  # the equivalent GET var-binds
+        self.instances = list(self.oids)  # bulk non-repeaters
+        self.row_count = 0  # of the walked table
+        for table, metrics, indexes in tables:
+            if not metrics or not indexes:
+                continue
+            oids = [["PDU-MIB", metric.symbol, *index] for metric in metrics for index in indexes]
+            if table == walked_table:
+                self.sections[table] = RaritanPDURequestSection(table, metrics, indexes, len(self.oids), True,
+                                                                len(self.columns))
+                self.columns.extend(["PDU-MIB", metric.symbol] for metric in metrics)
+                self.row_count = len(indexes)
+            else:
+                self.sections[table] = RaritanPDURequestSection(table, metrics, indexes, len(self.oids), False,
+                                                                len(self.instances))
+                self.instances.extend(oids)
+            self.oids.extend(oids)
+
+    def split_get_results(self, results: list) -> dict[str, list[list]]:
+        """Per table, per metric readings of all rows indexed by row slot, from the GET results."""
+        values = {}
+        for table, section in self.sections.items():
+            row_count = len(section.indexes)
+            values[table] = []
+            for i, metric in enumerate(section.metrics):
+                offset = section.offset + i * row_count
+                values[table].append(convert_values(metric, results[offset:offset + row_count]))
+        return values
+
+    def split_bulk_results(self, results: list) -> dict[str, list[list]] | None:
+        """Per table, per metric readings of all rows indexed by row slot, from the bulk column walks followed by
+        the instance values.
+
+        Return None when a column is incomplete.
+        """
+        instances = results[len(self.columns):]
+        values = {}
+        for table, section in self.sections.items():
+            row_count = len(section.indexes)
+            if not section.walked:
+                values[table] = []
+                for i, metric in enumerate(section.metrics):
+                    offset = section.bulk_offset + i * row_count
+                    values[table].append(convert_values(metric, instances[offset:offset + row_count]))
+                continue
+
+            columns = results[section.bulk_offset:section.bulk_offset + len(section.metrics)]
+            if any(len(column) < row_count for column in columns):
+                return None
+            values[table] = [convert_values(metric, [column.get(index) for index in section.indexes])
+                             for metric, column in zip(section.metrics, columns)]
+        return values
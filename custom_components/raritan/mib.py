@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import shutil
+from pathlib import Path
+
+from pyasn1.type import univ
+from pysnmp.proto import rfc1902
+from pysnmp.smi import builder, view, compiler
+
+from .const import _LOGGER, MIB_SOURCE_DIR, MIB_CACHE_DIR, MIB_MODULES
+
+
+def make_decoder(syntax: any):
+    """Build a function converting a raw response value of the given MIB syntax straight to a Python value."""
+    if isinstance(syntax, univ.Integer) and syntax.namedValues:
+        # Enumerations are reported by name, e.g. outletOperationalState 'on'
+        names = {int(number): name for name, number in syntax.namedValues.items()}
+        return lambda value: names.get(int(value), int(value))
+    if isinstance(syntax, univ.Integer):
+        # Integer32, Unsigned32, Gauge32, Counter32, Counter64 and TimeTicks
+        return int
+    if isinstance(syntax, rfc1902.IpAddress):
+        return lambda value: value.prettyPrint()
+    if isinstance(syntax, univ.OctetString):
+        return lambda value: value.asOctets().decode(errors="replace")
+    return lambda value: value.prettyPrint()
+
+
+def decode(decoder: any, value: any) -> any:
+    """Convert a raw response value with the decoder of the requested MIB object."""
+    # noSuchObject, noSuchInstance and endOfMibView carry no reading
+    if isinstance(value, univ.Null):
+        return None
+    return decoder(value)
+
+
+class MibStore:
+    """Process-wide store of the compiled MIB modules, the resolved numeric OIDs and their value decoders."""
+
+    def __init__(self, source_dir: str, cache_dir: str) -> None:
+        """Initialize."""
+        self.source_dir = Path(source_dir)
+        self.cache_dir = Path(cache_dir)
+        self.mib_builder: builder.MibBuilder = None
+        self.mib_view_controller: view.MibViewController = None
+
+        # (module, symbol) -> numeric OID of the MIB object without instance index, and its value decoder
+        self.objects: dict[tuple[str, str], tuple[tuple[int, ...], any]] = {}
+
+    def get_source_digest(self) -> str:
+        """Hash of all MIB source files, used to key the compiled cache."""
+        digest = hashlib.sha256()
+        for mib_file in sorted(self.source_dir.glob("*.mib")):
+            digest.update(mib_file.name.encode())
+            digest.update(mib_file.read_bytes())
+        return digest.hexdigest()[:16]
+
+    def load(self):
+        """Load the MIB modules, compiling them only when the on-disk cache is missing or stale."""
+        if not self.source_dir.is_dir():
+            _LOGGER.error(f"mibs directory does not exist: {self.source_dir}, cwd: {Path.cwd()}")
+
+        compiled_dir = self.cache_dir / self.get_source_digest()
+        compiled = (compiled_dir / f"{MIB_MODULES[0]}.py").is_file()
+
+        mib_builder = builder.MibBuilder()
+        mib_builder.add_mib_sources(builder.DirMibSource(str(compiled_dir)))
+        if not compiled:
+            _LOGGER.info(f"Compiling MIB modules into {compiled_dir}")
+            self.prune_cache(compiled_dir)
+            compiler.add_mib_compiler(mib_builder, sources=[str(self.source_dir)], destination=str(compiled_dir))
+        mib_builder.load_modules(*MIB_MODULES)
+
+        self.mib_builder = mib_builder
+        self.mib_view_controller = view.MibViewController(mib_builder)
+
+    def prune_cache(self, keep_dir: Path):
+        """Remove compiled caches of previous MIB source revisions."""
+        if not self.cache_dir.is_dir():
+            return
+        for cached_dir in self.cache_dir.iterdir():
+            if cached_dir.is_dir() and cached_dir != keep_dir:
+                shutil.rmtree(cached_dir, ignore_errors=True)
+
+    def resolve(self, module: str, symbol: str) -> tuple[tuple[int, ...], any]:
+        """Return the numeric OID and value decoder of a MIB object, resolving the symbol only once."""
+        mib_object = self.objects.get((module, symbol))
+        if mib_object is None:
+            mib_node, = self.mib_builder.import_symbols(module, symbol)
+            # Notifications have an OID but no value syntax
+            decoder = make_decoder(mib_node.getSyntax()) if hasattr(mib_node, "getSyntax") else None
+            mib_object = (tuple(mib_node.getName()), decoder)
+            self.objects[(module, symbol)] = mib_object
+        return mib_object
+
+    def get_oid(self, module: str, symbol: str, *index: int) -> tuple[int, ...]:
+        """Return the numeric OID of a MIB object instance."""
+        return self.resolve(module, symbol)[0] + index
+
+    def get_decoder(self, module: str, symbol: str, *index: int):
+        """Return the value decoder of a MIB object, the instance index is ignored."""
+        return self.resolve(module, symbol)[1]
+
+
+_mib_store: MibStore = None
+_mib_store_lock = asyncio.Lock()
+
+
+async def async_get_mib_store() -> MibStore:
+    """Return the shared MIB store, loading it in the executor on first use."""
+    global _mib_store
+    if _mib_store is not None:
+        return _mib_store
+
+    async with _mib_store_lock:
+        if _mib_store is None:
+            mib_store = MibStore(MIB_SOURCE_DIR, MIB_CACHE_DIR)
+
+            # https://developers.home-assistant.io/docs/asyncio_blocking_operations
+            await asyncio.get_running_loop().run_in_executor(None, mib_store.load)
+            _mib_store = mib_store
+    return _mib_store
@@ -1,190 +1,374 @@
 import asyncio
 import time
 
-from .snmp import SNMPManager
-from .const import _LOGGER
-
-
-class RaritanPDUOutlet:
-    def __init__(self, snmp_manager: SNMPManager, index: int, energy_support: bool):
-        self.snmp_manager: SNMPManager = snmp_manager
-        self.index = index
-        self.energy_support = energy_support
-
-        # Ignore some data for performance optimization
-        self.sensor_data = {
-            "label": "",
-
-            # A value for each outlet which describes the operational state of the outlet. It is also used to set the operational state of the outlet Enumeration: 'on': 1, 'cycling': 2, 'off': 0, 'error': -1.
-            "operational_state": "",
-
-            # A unique value for the current sensor attached to the outlet. This value is reported in milliamps (1/1000th of an amp)
-            "current": 0,
-
-            # A unique value for the max. current sensor attached to the outlet. This value is reported in milliamps (1/1000th of an amp)
-            # "max_current": 0,
+from .snmp import SNMPManager, SNMPv3User
+from .data_log import RaritanPDUDataLog, RaritanPDUDataLogEntry
+from .metrics import PDU_METRICS, OUTLET_METRICS, OUTLET_METRICS_BY_KEY, TABLE_METRICS, EXTERNAL_SENSOR_METRICS, \
+    EXTERNAL_SENSOR_TIERS, RaritanPDUMetric, RaritanPDURequestPlan, RaritanPDURequestSection, get_polled_metrics, \
+    convert_values
+from .energy import get_counter_delta, integrate_power, get_max_integration_gap
+from .stats import RaritanPDUPollStats, PHASE_BUILD, PHASE_DECODE, PHASE_UPDATE
+from .const import _LOGGER, DEFAULT_MAX_REPETITIONS, DEFAULT_POLLING_INTERVAL, TIER_STATIC, TIER_CONFIG, TIER_LIVE, \
+    TIER_ENVIRONMENT, TIER_DATA_LOG, TIER_INTERVALS, TABLE_OUTLET, TABLE_INLET, TABLE_INLET_POLE, \
+    TABLE_CIRCUIT_BREAKER, TABLE_LINE_CURRENT, TABLE_LINE_VOLTAGE, TABLE_EXTERNAL_SENSOR, TABLE_TEMPERATURE_SENSOR, \
+    TABLE_HUMIDITY_SENSOR
+
+
+# Confirmation of outlet writes: delay before the second read, growing twice as long up to the max (seconds)
+CONFIRM_INITIAL_DELAY = 0.05
+CONFIRM_MAX_DELAY = 1.0
+CONFIRM_TIMEOUT = 10
+
+# Readings that also confirm a written value, e.g. a power cycle that already completed when read
+CONFIRMING_VALUES = {"cycling": ("on",)}
+
+# Names of the index components of the component table rows, e.g. "Inlet 1 Pole 2"
+TABLE_ROW_NAMES = {
+    TABLE_INLET: ("Inlet",),
+    TABLE_INLET_POLE: ("Inlet", "Pole"),
+    TABLE_CIRCUIT_BREAKER: ("Circuit breaker",),
+    TABLE_LINE_CURRENT: ("Line",),
+    TABLE_LINE_VOLTAGE: ("Line",),
+    TABLE_EXTERNAL_SENSOR: ("Sensor",),
+    TABLE_TEMPERATURE_SENSOR: ("Temperature sensor",),
+    TABLE_HUMIDITY_SENSOR: ("Humidity sensor",),
+}
+
+
+# Identity and topology of the PDU, the first six are required and the component table counts optional
+STATIC_OIDS = (
+    ["SNMPv2-MIB", "sysDescr", 0],
+    ["SNMPv2-MIB", "sysName", 0],
+    ["PDU-MIB", "outletEnergySupport", 0],
+    ["PDU-MIB", "outletCount", 0],
+    ["PDU-MIB", "firmwareVersion", 0],
+    ["PDU-MIB", "objectName", 0],
+    ["PDU-MIB", "inletCount", 0],
+    ["PDU-MIB", "circuitBreakerCount", 0],
+    ["PDU-MIB", "lineCurrentCount", 0],
+    ["PDU-MIB", "lineVoltageCount", 0],
+    ["PDU-MIB", "externalSensorCount", 0],
+    ["PDU-MIB", "tempSensorCount", 0],
+    ["PDU-MIB", "humiditySensorCount", 0],
+)
+
+# Tiers of the values cached with the topology, such as labels and sensor types
+CACHED_TIERS = (TIER_STATIC, TIER_CONFIG)
+
+
+def is_raritan_pdu(sys_descr: any) -> bool:
+    return str(sys_descr).startswith("Raritan Dominion PX")
+
+
+async def poll_with_backoff(check) -> bool:
+    """Await check() right away and then with exponential backoff until it returns True or CONFIRM_TIMEOUT passed."""
+    deadline = time.monotonic() + CONFIRM_TIMEOUT
+    delay = CONFIRM_INITIAL_DELAY
+    while True:
+        if await check():
+            return True
+        if time.monotonic() + delay > deadline:
+            return False
 
-            # A unique value for the voltage sensor attached to the outlet.This value is reported in millivolts (1/1000th of a volt)
-            "voltage": 0,
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CONFIRM_MAX_DELAY)
 
-            # A unique value for the active power sensor attached to the outlet. This value is reported in Watts. The real power consumption.
-            "active_power": 0,
 
-            # A unique value for the apparent power sensor attached to the outlet. This value is reported in Volt-Amps. This is the product of current and voltage.
-            # "apparent_power": 0,
+class RaritanPDUOutletStore:
+    """Readings of all outlets of a PDU, one list per sensor indexed by outlet slot (outlet index - 1).
 
-            # A unique value for the power factor of the outlet. The reading represents a percentage in the range of 0% to 100%. The power factor, a ratio of real power to apparent power.
-            "power_factor": 0,
+    The current and previous snapshots are two buffers that swap roles on every poll instead of being copied.
+    """
+    __slots__ = ("sensor_names", "current", "previous", "timestamps", "previous_timestamps", "energy_delivered",
+                 "initial_energy_delivered", "max_integration_gap")
 
-            # The value of the upper warning (non-critical) current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
-            # "current_upper_warning": 0,
+    def __init__(self, sensor_names: tuple[str, ...], outlet_count: int, max_integration_gap: float):
+        self.sensor_names = sensor_names
+        self.max_integration_gap = max_integration_gap  # seconds between power readings that are still integrated
+        self.current = {name: [OUTLET_METRICS_BY_KEY[name].default] * outlet_count for name in sensor_names}
+        self.previous = {name: [OUTLET_METRICS_BY_KEY[name].default] * outlet_count for name in sensor_names}
+        self.timestamps = [0.0] * outlet_count  # time.monotonic() of the readings, 0 before the first one
+        self.previous_timestamps = [0.0] * outlet_count
 
-            # The value of the upper critical current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
-            # "current_upper_critical": 0,
+        self.initial_energy_delivered = [0.0] * outlet_count  # energy delivered from previous sessions
+        self.energy_delivered = [0.0] * outlet_count  # energy delivered in current session
 
-            # The value of the lower warning (non-critical) current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
-            # "current_lower_warning": 0,
+    def swap(self):
+        """Turn the current snapshot into the previous one, the older buffer is overwritten by the next poll."""
+        self.current, self.previous = self.previous, self.current
+        self.timestamps, self.previous_timestamps = self.previous_timestamps, self.timestamps
 
-            # The value of the lower critical current threshold for the outlet. This value is reported in milliamps (1/1000th of an amp)
-            # "current_lower_critical": 0,
+    def backup_slot(self, slot: int):
+        """Copy the current readings of one outlet into the previous snapshot, for updates outside a poll."""
+        for name in self.sensor_names:
+            self.previous[name][slot] = self.current[name][slot]
+        self.previous_timestamps[slot] = self.timestamps[slot]
 
-            # The hysteresis used for deassertions. This value is reported in milliamps (1/1000th of an amp)
-            # "current_hysteresis": 0,
 
-            # The current rating of the outlet. This value is reported in milliamps (1/1000th of an amp). The rated maximum current that the system can safely handle, in milliamps
-            # "current_rating": 0,
+class RaritanPDUTable:
+    """Readings of the rows of a component table such as inletTable, one list per metric indexed by row slot."""
+    __slots__ = ("name", "energy_support", "metrics", "polled_metrics", "indexes", "slots", "row_tiers", "current",
+                 "counters", "counted", "restored")
 
-            # NOT SUPPORTED by all PDUs. The value of the cumulative active energy for this outlet. This value is reported in WattHours. The total energy consumption in watt-hours (accumulated over time)
-            # "watt_hours": 0,
-        }
+    def __init__(self, name: str, metrics: tuple[RaritanPDUMetric, ...], indexes: list[tuple[int, ...]],
+                 energy_support: bool = False):
+        self.name = name
+        self.energy_support = energy_support
+        self.metrics = tuple(metric for metric in metrics if energy_support or not metric.energy_support)
+        self.polled_metrics = get_polled_metrics(self.metrics, energy_support)
+        self.indexes = indexes
+        self.slots = {index: slot for slot, index in enumerate(indexes)}
+        self.row_tiers = [TIER_LIVE] * len(indexes)  # a row is only read when its tier is due
+        self.current = {metric.key: [metric.default] * len(indexes) for metric in self.metrics}
+
+        # Energy summed from the device counters, by counter key: the total's key, the energy counted in this session
+        # and the energy restored from earlier sessions, by total key
+        self.counters = {metric.counter: metric.key for metric in self.metrics if metric.counter is not None}
+        self.counted = {key: [0.0] * len(indexes) for key in self.counters.values()}
+        self.restored = {key: [0.0] * len(indexes) for key in self.counters.values()}
+
+    def update(self, section: RaritanPDURequestSection, values: list[list]):
+        """Write a poll's readings of the planned rows, keeping the previous value of rows that were not read."""
+        for metric, readings in zip(section.metrics, values):
+            if metric.key in self.counters:
+                for index, value in zip(section.indexes, readings):
+                    if value is not None:
+                        self.update_counter(metric.key, self.slots[index], value)
+                continue
+
+            current = self.current[metric.key]
+            for index, value in zip(section.indexes, readings):
+                if value is not None:
+                    current[self.slots[index]] = value
+
+        for metric in self.metrics:
+            if metric.derive is not None:
+                self.current[metric.key] = [metric.derive(self.current, slot) for slot in range(len(self.indexes))]
+
+    def update_row(self, slot: int, readings: dict[str, any]):
+        """Write the readings of one row, e.g. fetched after the PDU notified a change of that row."""
+        for key, value in readings.items():
+            if key in self.counters:
+                self.update_counter(key, slot, value)
+            else:
+                self.current[key][slot] = value
+        for metric in self.metrics:
+            if metric.derive is not None:
+                self.current[metric.key][slot] = metric.derive(self.current, slot)
+
+    def update_counter(self, key: str, slot: int, value: int):
+        """Write a counter reading and add the energy counted since the previous one, the first is only the baseline."""
+        total_key = self.counters[key]
+        previous_value = self.current[key][slot]
+        if previous_value is not None:
+            self.counted[total_key][slot] += get_counter_delta(previous_value, value)
+        self.current[key][slot] = value
+        self.current[total_key][slot] = self.counted[total_key][slot] + self.restored[total_key][slot]
+
+    def initialize_counter_total(self, key: str, slot: int, initial_value: float):
+        """Continue a total summed from a device counter from the value restored from earlier sessions."""
+        self.restored[key][slot] = initial_value
+        self.current[key][slot] = self.counted[key][slot] + initial_value
+
+    def get_row_name(self, slot: int) -> str:
+        name = " ".join(f"{row_name} {number}" for row_name, number in zip(TABLE_ROW_NAMES[self.name],
+                                                                           self.indexes[slot]))
+        label = self.current["label"][slot] if "label" in self.current else ""
+        if label and not name.endswith(label):
+            name = f"{name} {label}"
+        return name
 
-        # A snapshot of previous sensor data
-        self.previous_sensor_data = {}
 
-        self.sensor_data_update_timestamp = 0
-        self.previous_sensor_data_update_timestamp = 0
+class RaritanPDUOutlet:
+    """View of one outlet's slot in the RaritanPDUOutletStore."""
+    __slots__ = ("snmp_manager", "store", "index", "slot", "energy_support", "confirmation")
 
-        self.initial_energy_delivered = 0  # energy delivered from previous sessions
-        self.energy_delivered = 0  # energy delivered in current session
+    def __init__(self, snmp_manager: SNMPManager, store: RaritanPDUOutletStore, index: int, energy_support: bool):
+        self.snmp_manager: SNMPManager = snmp_manager
+        self.store = store
+        self.index = index
+        self.slot = index - 1
+        self.energy_support = energy_support
+        self.confirmation: asyncio.Future = None  # pending confirmation of the last write
 
-        if energy_support:
-            self.sensor_data["watt_hours"] = 0
+    def __getitem__(self, sensor_name: str) -> any:
+        if sensor_name == "energy_delivered":
+            return self.store.energy_delivered[self.slot] + self.store.initial_energy_delivered[self.slot]
+        return self.store.current[sensor_name][self.slot]
 
     def get_outlet_index_and_label(self):
-        outlet_label = self.sensor_data['label']
+        outlet_label = self["label"]
         if outlet_label == f"Outlet {self.index}":
             return outlet_label
         else:
             return f"Outlet {self.index} {outlet_label}"
 
     def get_sensor_oid_from_sensor_name(self, sensor_name: str) -> str:
-        mib_object_name = f"outlet{sensor_name.title().replace('_', '')}"
-        return mib_object_name
+        return OUTLET_METRICS_BY_KEY[sensor_name].symbol
 
-    def get_sensor_oids(self):
+    def get_sensor_oids(self, sensor_names: tuple[str, ...] = None):
         oids = []
-        for data_name in self.sensor_data.keys():
+        for data_name in sensor_names or self.store.sensor_names:
             oids.append(["PDU-MIB", self.get_sensor_oid_from_sensor_name(data_name), self.index])
         return oids
 
     def get_sensor_names(self):
-        return self.sensor_data.keys()
+        return self.store.sensor_names
 
     def update_sensor_data(self, new_sensor_data: dict[str, any]):
         # backup
-        self.previous_sensor_data_update_timestamp = self.sensor_data_update_timestamp
-        self.previous_sensor_data = self.sensor_data.copy()
+        self.store.backup_slot(self.slot)
 
         # update
-        self.sensor_data_update_timestamp = time.time()
+        self.store.timestamps[self.slot] = time.monotonic()
         for key in new_sensor_data.keys():
-            self.sensor_data[key] = new_sensor_data[key]
+            self.store.current[key][self.slot] = new_sensor_data[key]
 
         self.update_energy_delivered()
 
     def initialize_energy_delivered(self, initial_value: float):
-        self.initial_energy_delivered = initial_value
-        _LOGGER.debug(f"Initialize Outlet {self.index} initial_energy_delivered to {self.initial_energy_delivered}")
+        self.store.initial_energy_delivered[self.slot] = initial_value
+        _LOGGER.debug(f"Initialize Outlet {self.index} initial_energy_delivered to {initial_value}")
 
     def update_energy_delivered(self):
-        """Calculated using Left Riemann Sum"""
-
-        # not enough data to estimate
-        if self.previous_sensor_data_update_timestamp == 0 or self.sensor_data_update_timestamp == 0:
-            return  # abort
-
-        time_diff_seconds = self.sensor_data_update_timestamp - self.previous_sensor_data_update_timestamp
-        if time_diff_seconds < 0:
-            return  # abort
-
-        time_diff_hours = time_diff_seconds / (60.0 * 60.0)  # 3600s in 1 hour
-        new_energy_delivered = self.previous_sensor_data["active_power"] * time_diff_hours
-        self.energy_delivered += new_energy_delivered
-
-    async def power_on(self):
-        await self.set_operational_state("on")
-
-    async def power_off(self):
-        await self.set_operational_state("off")
-
-    async def power_cycle(self):
-        await self.set_operational_state("cycling")
-
-    async def set_operational_state(self, operational_state: str):
-        expected_new_operational_state = await self.snmp_manager.snmp_set(
-            [["PDU-MIB", self.get_sensor_oid_from_sensor_name("operational_state"), self.index], operational_state])
-        new_operational_state = ""
-
-        # Wait for the PDU to process
-        start = time.time()
-        while expected_new_operational_state != new_operational_state:
-            await asyncio.sleep(1)
-            new_operational_state = await self.snmp_manager.snmp_get(
-                ["PDU-MIB", self.get_sensor_oid_from_sensor_name("operational_state"), self.index])
-            if time.time() - start > 10:
-                break  # timeout to set state
-
-        self.update_sensor_data({"operational_state": new_operational_state})
-
-    async def set_label(self, label: str):
-        expected_new_label = await self.snmp_manager.snmp_set(
-            [["PDU-MIB", self.get_sensor_oid_from_sensor_name("label"), self.index], label])
-        new_label = ""
-
-        # Wait for the PDU to process
-        start = time.time()
-        while expected_new_label != new_label:
-            await asyncio.sleep(1)
-            new_label = await self.snmp_manager.snmp_get(
-                ["PDU-MIB", self.get_sensor_oid_from_sensor_name("label"), self.index])
-            if time.time() - start > 10:
-                break  # timeout to set state
-
-        self.update_sensor_data({"label": new_label})
-
+        """Prefer the outlet's watt-hour counter, integrate active power when the PDU has no energy support."""
+        store = self.store
+        previous_timestamp = store.previous_timestamps[self.slot]
+        timestamp = store.timestamps[self.slot]
+
+        if self.energy_support:
+            # The first counter reading is only the baseline
+            if previous_timestamp != 0:
+                store.energy_delivered[self.slot] += get_counter_delta(store.previous["watt_hours"][self.slot],
+                                                                       store.current["watt_hours"][self.slot])
+            return
+
+        store.energy_delivered[self.slot] += integrate_power(store.previous["active_power"][self.slot],
+                                                             store.current["active_power"][self.slot],
+                                                             previous_timestamp, timestamp, store.max_integration_gap)
+
+    async def power_on(self) -> float | None:
+        return await self.set_operational_state("on")
+
+    async def power_off(self) -> float | None:
+        return await self.set_operational_state("off")
+
+    async def power_cycle(self) -> float | None:
+        return await self.set_operational_state("cycling")
+
+    async def set_operational_state(self, operational_state: str) -> float | None:
+        return await self.set_sensor_value("operational_state", operational_state)
+
+    async def set_label(self, label: str) -> float | None:
+        # A label is in effect once the SET succeeded, its echo needs no confirmation
+        return await self.set_sensor_value("label", label, confirm=False)
+
+    async def set_sensor_value(self, sensor_name: str, value: any, confirm: bool = True) -> float | None:
+        """Write a sensor and wait until the PDU reports the written value.
+
+        Return the seconds the confirmation took, None when the write failed, timed out or was superseded.
+        """
+        oid = ["PDU-MIB", self.get_sensor_oid_from_sensor_name(sensor_name), self.index]
+        start = time.monotonic()
+        expected_value = await self.snmp_manager.snmp_set([oid, value])
+        if expected_value is None:
+            return None
+
+        if not confirm:
+            self.update_sensor_data({sensor_name: expected_value})
+            return time.monotonic() - start
+
+        # A newer write to this outlet cancels the confirmation of the previous one
+        if self.confirmation is not None:
+            self.confirmation.cancel()
+        accepted_values = (expected_value,) + CONFIRMING_VALUES.get(expected_value, ())
+        confirmation = asyncio.ensure_future(self.confirm_sensor_value(oid, accepted_values))
+        self.confirmation = confirmation
+        try:
+            new_value = await confirmation
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                confirmation.cancel()
+                raise
+            _LOGGER.debug(f"Outlet {self.index} {sensor_name} confirmation superseded by a newer write")
+            return None
+        finally:
+            if self.confirmation is confirmation:
+                self.confirmation = None
+
+        elapsed = time.monotonic() - start
+        if new_value is not None:
+            self.update_sensor_data({sensor_name: new_value})
+        if new_value not in accepted_values:
+            _LOGGER.warning(f"Outlet {self.index} {sensor_name} is {new_value} instead of {expected_value} "
+                            f"after {elapsed:.1f}s")
+            return None
+
+        _LOGGER.debug(f"Outlet {self.index} {sensor_name} confirmed {expected_value} after {elapsed * 1000:.0f}ms")
+        return elapsed
+
+    async def confirm_sensor_value(self, oid: list, accepted_values: tuple) -> any:
+        """Read the sensor until it has an accepted value, return the last value read."""
+        value = None
+
+        async def check() -> bool:
+            nonlocal value
+            new_value = await self.snmp_manager.snmp_get(oid)
+            if new_value is not None:
+                value = new_value
+            return value in accepted_values
+
+        await poll_with_backoff(check)
+        return value
 
     def is_on(self):
-        return self.sensor_data["operational_state"] == "on"
+        return self["operational_state"] == "on"
 
-    def get_data(self):
-        data = self.sensor_data.copy()
-        # add energy_delivered data
-        data["energy_delivered"] = self.energy_delivered + self.initial_energy_delivered
-        return data
+    def get_data(self) -> "RaritanPDUOutlet":
+        """The outlet view itself serves the readings, including energy_delivered, without copying them."""
+        return self
 
 
 class RaritanPDU:
-    def __init__(self, host: str, port: int, read_community: str, write_community: str) -> None:
+    def __init__(self, host: str, port: int, read_community: str, write_community: str,
+                 max_repetitions: int = DEFAULT_MAX_REPETITIONS, data_log: bool = False,
+                 usm_user: SNMPv3User = None, polling_interval: int = DEFAULT_POLLING_INTERVAL) -> None:
         """Initialize."""
-        self.unique_id = f"{host}:{port}, read community: {read_community}, write community: {write_community}"
-        self.snmp_manager: SNMPManager = SNMPManager(host, port, read_community, write_community)
+        if usm_user is None:
+            self.unique_id = f"{host}:{port}, read community: {read_community}, write community: {write_community}"
+        else:
+            self.unique_id = f"{host}:{port}, user: {usm_user.user_name}"
+        self.snmp_manager: SNMPManager = SNMPManager(host, port, read_community, write_community, usm_user)
+        self.stats: RaritanPDUPollStats = self.snmp_manager.stats
         self.name = ""
+        self.polling_interval = polling_interval  # seconds, to not integrate power across missed polls
         self.energy_support = False
         self.outlet_count = 0
-        self.cpu_temperature = 0
+        for metric in PDU_METRICS:
+            setattr(self, metric.key, metric.default)
         self.firmware_version = ""
         self.model = ""
         self.outlets: [RaritanPDUOutlet] = []
+        self.outlet_store: RaritanPDUOutletStore = None
+        self.tables: dict[str, RaritanPDUTable] = {}  # inlets, poles, circuit breakers, lines and sensors, by table
+        self.external_sensor_count = 0  # of the cached external sensor topology
+        self.topology_restored = False  # outlets and tables restored from an earlier run, not verified yet
+
+        # Metrics read from this PDU, and the request plan of each combination of polling tiers for its topology
+        self.pdu_metrics = get_polled_metrics(PDU_METRICS, False)
+        self.outlet_metrics = get_polled_metrics(OUTLET_METRICS, False)
+        self.request_plans: dict[frozenset[str], RaritanPDURequestPlan] = {}
+
+        # Walk the outlet table with GETBULK, disabled when the agent does not handle it properly
+        self.max_repetitions = max_repetitions
+        self.bulk_supported = max_repetitions > 0
+
+        # Monotonic time of the last successful update of each polling tier, 0 when due at the next poll
+        self.tier_intervals = dict(TIER_INTERVALS)
+        self.tier_updates = {tier: 0.0 for tier in self.tier_intervals}
+
+        # Reader of the PDU's own data log, None when history import is disabled
+        self.data_log: RaritanPDUDataLog = RaritanPDUDataLog(self.snmp_manager) if data_log else None
 
     async def authenticate(self) -> bool:
         """Test if we can authenticate with the host."""
@@ -192,67 +376,500 @@ class RaritanPDU:
             result = await self.snmp_manager.snmp_get(["SNMPv2-MIB", "sysDescr", 0])
             if result is None:
                 return False
-            return str(result).startswith("Raritan Dominion PX")
+            return is_raritan_pdu(result)
         except Exception:
             return False
 
-    async def update_data(self):
-        _LOGGER.info("Initializing RaritanPDU")
+    def is_tier_due(self, tier: str, now: float) -> bool:
+        return self.tier_updates[tier] == 0 or now - self.tier_updates[tier] >= self.tier_intervals[tier]
+
+    def request_tier_update(self, tier: str):
+        """Fetch the tier on the next poll, e.g. after the PDU rebooted or an outlet was relabelled."""
+        self.tier_updates[tier] = 0.0
+
+    def get_request_plan(self, tiers: set[str]) -> RaritanPDURequestPlan:
+        """The request of the given tiers, compiled on first use after a topology change."""
+        key = frozenset(tiers)
+        plan = self.request_plans.get(key)
+        if plan is None:
+            start = time.perf_counter()
+            tables = [(TABLE_OUTLET, tuple(metric for metric in self.outlet_metrics if metric.tier in tiers),
+                       [(outlet.index,) for outlet in self.outlets])]
+            # Rows of tiers that are not due, e.g. slow external sensors, stay out of the GET and GETBULK requests
+            # alike: only the outlet columns are walked, the rows of the other tables are requested one by one
+            for name, table in self.tables.items():
+                tables.append((name, tuple(metric for metric in table.polled_metrics if metric.tier in tiers),
+                               [index for index, tier in zip(table.indexes, table.row_tiers) if tier in tiers]))
+            plan = RaritanPDURequestPlan(tables, tuple(metric for metric in self.pdu_metrics if metric.tier in tiers),
+                                         TABLE_OUTLET)
+            self.request_plans[key] = plan
+            self.stats.add_phase(PHASE_BUILD, time.perf_counter() - start)
+        return plan
+
+    async def update_data(self) -> bool:
+        """Poll the tiers that are due, timing the phases of the poll. Return whether the poll succeeded."""
+        self.stats.start_poll()
+        try:
+            return await self.update_tiers()
+        finally:
+            self.stats.end_poll()
+
+    async def update_tiers(self) -> bool:
+        now = time.monotonic()
+        if self.topology_restored:
+            self.topology_restored = False
+            updated = await self.update_restored_data(now)
+            if updated is not None:
+                return updated
+
+        if self.is_tier_due(TIER_STATIC, now):
+            if not await self.update_static_data():
+                return False  # abort update
+            self.tier_updates[TIER_STATIC] = now
+
+        tiers = {TIER_LIVE}
+        for tier in (TIER_CONFIG, TIER_ENVIRONMENT):
+            if self.is_tier_due(tier, now):
+                tiers.add(tier)
+
+        tables_updated = await self.update_table_data(self.get_request_plan(tiers))
+        if tables_updated:
+            for tier in tiers:
+                self.tier_updates[tier] = now
+        return tables_updated
+
+    async def update_restored_data(self, now: float) -> bool | None:
+        """First poll after restore_topology(): verify the identity and fetch every other tier in one batch of GETs.
+
+        Return None when the topology of the PDU changed, to poll it like a newly added one.
+        """
+        tiers = {TIER_LIVE, TIER_CONFIG, TIER_ENVIRONMENT}
+        plan = self.get_request_plan(tiers)
+        results = await self.snmp_manager.snmp_get(*STATIC_OIDS, *plan.oids)
+        if results is None:
+            return False
 
-        result = await self.snmp_manager.snmp_get(
-            ["SNMPv2-MIB", "sysDescr", 0],
-            ["SNMPv2-MIB", "sysName", 0],
-            ["PDU-MIB", "outletEnergySupport", 0],
-            ["PDU-MIB", "outletCount", 0],
-            ["PDU-MIB", "unitCpuTemp", 0],  # The value for the unit's CPU temperature sensor in tenth degrees celsius.
-            ["PDU-MIB", "firmwareVersion", 0],
-            ["PDU-MIB", "objectName", 0]
-        )
+        topology_key = self.get_topology_key()
+        if not await self.update_static_data(results[:len(STATIC_OIDS)]):
+            return False
+        self.tier_updates[TIER_STATIC] = now
+        if self.get_topology_key() != topology_key:
+            _LOGGER.info(f"Topology of {self.name} changed since it was cached")
+            return None
+
+        self.update_plan_results(plan, results[len(STATIC_OIDS):])
+        for tier in tiers:
+            self.tier_updates[tier] = now
+        return True
+
+    async def update_data_log(self) -> list[RaritanPDUDataLogEntry]:
+        """Fetch the data log entries recorded since the last import, when the data log tier is due."""
+        now = time.monotonic()
+        if self.data_log is None or not self.outlets or not self.is_tier_due(TIER_DATA_LOG, now):
+            return []
+
+        rows = {TABLE_OUTLET: [(outlet.index,) for outlet in self.outlets]}
+        for table_name in (TABLE_INLET, TABLE_INLET_POLE):
+            if table_name in self.tables:
+                rows[table_name] = self.tables[table_name].indexes
+        entries = await self.data_log.fetch_new_entries(rows, self.energy_support,
+                                                        self.max_repetitions if self.bulk_supported else 0)
+        if entries is None:
+            return []  # retry at the next poll
+
+        self.tier_updates[TIER_DATA_LOG] = now
+        return entries
+
+    async def update_static_data(self, result: list = None) -> bool:
+        """Fetch the identity and topology of the PDU, recreating the outlets when the outlet count changed.
+
+        result holds the values of STATIC_OIDS when they were already fetched along with other var-binds.
+        """
+        _LOGGER.info("Initializing RaritanPDU")
 
         if result is None:
-            return  # abort update
+            result = await self.snmp_manager.snmp_get(*STATIC_OIDS)
 
-        [desc, name, energy_support, outlet_count, cpu_temperature, firmware_version, model] = result
+        if result is None or None in result[:6]:
+            return False
+
+        [desc, name, energy_support, outlet_count, firmware_version, model] = result[:6]
+        [inlet_count, circuit_breaker_count, line_current_count, line_voltage_count, external_sensor_count,
+         temperature_sensor_count, humidity_sensor_count] = [count or 0 for count in result[6:]]
+        if not is_raritan_pdu(desc):
+            _LOGGER.error(f"{self.snmp_manager.host}:{self.snmp_manager.port} is not a Raritan PDU: {desc}")
+            return False
 
         self.name = f"{str(desc).split(' - ')[0]} {model} {name}"
         self.energy_support = energy_support == "Yes"
-        self.cpu_temperature = cpu_temperature / 10.0  # The value for the unit's CPU temperature sensor in tenth degrees celsius.
         self.firmware_version = firmware_version
         self.model = model
 
         # If the outlet count has changed, reinitialize the outlets list. This should only run when first initialized.
         if outlet_count != self.outlet_count:
-            self.outlet_count = outlet_count
-            self.outlets = []
-            for i in range(outlet_count):
-                # Create an outlet (index starts from 1) and append it to the outlets list
-                outlet = RaritanPDUOutlet(self.snmp_manager, i + 1, self.energy_support)
-                self.outlets.append(outlet)
-
-        # For each outlet, append all relevant MIB OIDs
-        outlet_sensor_oids = []
-        for outlet in self.outlets:
-            outlet_sensor_oids.extend(outlet.get_sensor_oids())
+            self.create_outlets(outlet_count)
 
-        # Fetch all the outlet data in one go using the OIDs
-        results = await self.snmp_manager.snmp_get(*outlet_sensor_oids)
-        if result is None:
-            return  # abort update
+            # The new outlets have no labels yet
+            self.request_tier_update(TIER_CONFIG)
 
-        # Update outlet data with the fetched results
-        for i, outlet in enumerate(self.outlets):
-            new_sensor_data = results[i * len(outlet.get_sensor_oids()): (i + 1) * len(outlet.get_sensor_oids())]
-            outlet.update_sensor_data(dict(zip(outlet.get_sensor_names(), new_sensor_data)))
+        # The poles of each inlet are a column of inletTable, read again only when the inlet count changed
+        if TABLE_INLET in self.tables and len(self.tables[TABLE_INLET].indexes) == inlet_count:
+            pole_indexes = self.tables[TABLE_INLET_POLE].indexes if TABLE_INLET_POLE in self.tables else []
+        else:
+            pole_counts = []
+            if inlet_count > 0:
+                pole_counts = await self.snmp_manager.snmp_get(
+                    *[["PDU-MIB", "inletPoleCount", inlet] for inlet in range(1, inlet_count + 1)])
+                if pole_counts is None:
+                    return False
+                if inlet_count == 1:
+                    pole_counts = [pole_counts]
+            pole_indexes = [(inlet, pole) for inlet, pole_count in enumerate(pole_counts, 1)
+                            for pole in range(1, (pole_count or 0) + 1)]
+
+        self.update_tables({
+            TABLE_INLET: [(inlet,) for inlet in range(1, inlet_count + 1)],
+            TABLE_INLET_POLE: pole_indexes,
+            TABLE_CIRCUIT_BREAKER: [(breaker,) for breaker in range(1, circuit_breaker_count + 1)],
+            TABLE_LINE_CURRENT: [(line,) for line in range(1, line_current_count + 1)],
+            TABLE_LINE_VOLTAGE: [(line,) for line in range(1, line_voltage_count + 1)],
+            # The deprecated environmental tables, only read on PDUs without external sensor support
+            TABLE_TEMPERATURE_SENSOR: [(sensor,) for sensor in range(1, temperature_sensor_count + 1)
+                                       if not external_sensor_count],
+            TABLE_HUMIDITY_SENSOR: [(sensor,) for sensor in range(1, humidity_sensor_count + 1)
+                                    if not external_sensor_count],
+        })
+        return await self.update_external_sensors(external_sensor_count)
+
+    def create_outlets(self, outlet_count: int):
+        self.outlet_count = outlet_count
+        self.outlet_metrics = get_polled_metrics(OUTLET_METRICS, self.energy_support)
+        self.request_plans = {}
+        self.outlet_store = RaritanPDUOutletStore(tuple(metric.key for metric in self.outlet_metrics), outlet_count,
+                                                  get_max_integration_gap(self.polling_interval))
+        self.outlets = []
+        for i in range(outlet_count):
+            # Create an outlet (index starts from 1) and append it to the outlets list
+            outlet = RaritanPDUOutlet(self.snmp_manager, self.outlet_store, i + 1, self.energy_support)
+            self.outlets.append(outlet)
+
+    def get_topology(self) -> dict:
+        """The identity, outlets and component table rows with their static and config values, as stored JSON."""
+        return {
+            "name": self.name,
+            "energy_support": self.energy_support,
+            "firmware_version": self.firmware_version,
+            "model": self.model,
+            "outlet_count": self.outlet_count,
+            "outlets": {metric.key: self.outlet_store.current[metric.key] for metric in self.outlet_metrics
+                        if metric.tier in CACHED_TIERS} if self.outlet_store is not None else {},
+            "external_sensor_count": self.external_sensor_count,
+            "tables": {name: {
+                "indexes": table.indexes,
+                "row_tiers": table.row_tiers,
+                "values": {metric.key: table.current[metric.key] for metric in table.polled_metrics
+                           if metric.tier in CACHED_TIERS},
+            } for name, table in self.tables.items()},
+        }
 
-    def get_outlet_by_index(self, index: int) -> RaritanPDUOutlet:
-        return self.outlets[index - 1]  # Outlet index starts from 1
+    def restore_topology(self, topology: dict):
+        """Recreate the outlets and tables from get_topology() of an earlier run, verified by the next poll."""
+        self.name = topology["name"]
+        self.energy_support = topology["energy_support"]
+        self.firmware_version = topology["firmware_version"]
+        self.model = topology["model"]
+        self.create_outlets(topology["outlet_count"])
+        for key, values in topology["outlets"].items():
+            if key in self.outlet_store.current:
+                self.outlet_store.current[key][:] = values
+
+        self.tables = {}
+        for name, cached in topology["tables"].items():
+            metrics = EXTERNAL_SENSOR_METRICS if name == TABLE_EXTERNAL_SENSOR else TABLE_METRICS[name]
+            table = RaritanPDUTable(name, metrics, [tuple(index) for index in cached["indexes"]], self.energy_support)
+            table.row_tiers = cached["row_tiers"]
+            table.current.update(cached["values"])
+            self.tables[name] = table
+        self.external_sensor_count = topology["external_sensor_count"]
+        self.request_plans = {}
+        self.topology_restored = True
+
+    def get_naming(self) -> tuple:
+        """What the names of the entities are made of: the identity of the PDU and the labels of its outlets and rows."""
+        return (self.name, self.firmware_version, self.model,
+                tuple(self.outlet_store.current["label"]) if self.outlet_store is not None else (),
+                tuple(tuple(table.current["label"]) for table in self.tables.values() if "label" in table.current))
+
+    def get_topology_key(self) -> tuple:
+        """What the entities of the PDU are created from, a change needs new entities."""
+        return (self.outlet_count, self.energy_support,
+                tuple((name, tuple(table.indexes), tuple(table.current.get("type", ())),
+                       tuple(table.current.get("units", ()))) for name, table in sorted(self.tables.items())))
+
+    def update_tables(self, topology: dict[str, list[tuple[int, ...]]]):
+        """Recreate the component tables whose rows or energy support changed, they are polled in the same requests
+        as the outlets."""
+        topology = {name: indexes for name, indexes in topology.items() if indexes}
+        tables = {name: table for name, table in self.tables.items() if name in TABLE_METRICS}
+        if topology == {name: table.indexes for name, table in tables.items()} and all(
+                table.energy_support == self.energy_support for table in tables.values()):
+            return
+
+        self.tables = {name: table for name, table in self.tables.items() if name not in TABLE_METRICS}
+        for name, indexes in topology.items():
+            self.tables[name] = RaritanPDUTable(name, TABLE_METRICS[name], indexes, self.energy_support)
+        self.request_plans = {}
+        _LOGGER.info(f"{self.name} has " + ", ".join(f"{len(indexes)} {name} rows" for name, indexes in
+                                                     topology.items()))
+
+        # The new rows have no labels and ratings yet
+        self.request_tier_update(TIER_CONFIG)
+
+    async def update_external_sensors(self, count: int) -> bool:
+        """Walk the type, name and units of the external sensors when their count changed, they are cached otherwise."""
+        if count == self.external_sensor_count:
+            return True
+
+        if count > 0:
+            table = RaritanPDUTable(TABLE_EXTERNAL_SENSOR, EXTERNAL_SENSOR_METRICS,
+                                    [(sensor,) for sensor in range(1, count + 1)])
+            plan = RaritanPDURequestPlan([(table.name, tuple(metric for metric in table.polled_metrics
+                                                             if metric.tier == TIER_STATIC), table.indexes)])
+            results = await self.snmp_manager.snmp_get(*plan.oids)
+            if results is None:
+                return False
+            table.update(plan.sections[table.name], plan.split_get_results(results)[table.name])
+            table.row_tiers = [EXTERNAL_SENSOR_TIERS.get(sensor_type, TIER_LIVE)
+                               for sensor_type in table.current["type"]]
+            self.tables[table.name] = table
+            _LOGGER.info(f"{self.name} has external sensors " +
+                         ", ".join(f"{index[0]}: {sensor_type}" for index, sensor_type in zip(table.indexes,
+                                                                                             table.current["type"])))
+        else:
+            self.tables.pop(TABLE_EXTERNAL_SENSOR, None)
+
+        self.external_sensor_count = count
+        self.request_plans = {}
+        self.request_tier_update(TIER_ENVIRONMENT)
+        return True
+
+    def update_unit_values(self, metrics: tuple[RaritanPDUMetric, ...], results: list):
+        start = time.perf_counter()
+        for metric, value in zip(metrics, results):
+            if value is not None:
+                setattr(self, metric.key, convert_values(metric, [value])[0])
+        self.stats.add_phase(PHASE_UPDATE, time.perf_counter() - start)
+
+    async def update_table_data(self, plan: RaritanPDURequestPlan) -> bool:
+        """Fetch the planned PDU sensors and the sensors of every outlet and component table row. Return whether the
+        tables were updated."""
+        if not plan.oids:
+            return True
+
+        if self.bulk_supported:
+            updated = await self.update_table_data_bulk(plan)
+            if updated is not None:
+                return updated
+
+        # Fetch all the data in one go using the planned OIDs
+        results = await self.snmp_manager.snmp_get(*plan.oids)
+        if results is None:
+            return False  # abort update
+        if len(plan.oids) == 1:
+            results = [results]
+
+        self.update_plan_results(plan, results)
+        return True
+
+    def update_plan_results(self, plan: RaritanPDURequestPlan, results: list):
+        """Update the PDU sensors and the tables from the GET results of a plan."""
+        self.update_unit_values(plan.scalars, results[:len(plan.scalars)])
+        start = time.perf_counter()
+        values = plan.split_get_results(results)
+        self.stats.add_phase(PHASE_DECODE, time.perf_counter() - start)
+        self.update_table_stores(plan, values)
+
+    async def update_table_data_bulk(self, plan: RaritanPDURequestPlan) -> bool | None:
+        """Walk the outlet columns side by side with GETBULK, fetching the PDU sensors and the planned rows of the
+        other tables in the same requests. Return None to fall back to plain GET."""
+        if len(plan.instances) > self.snmp_manager.chunk_size:
+            # Too many instances to add to every response of the walk, GET them alongside instead
+            results, instance_values = await asyncio.gather(
+                self.snmp_manager.snmp_bulk_get_columns(self.max_repetitions, *plan.columns, row_count=plan.row_count),
+                self.snmp_manager.snmp_get(*plan.instances))
+            if instance_values is None:
+                return False  # abort update
+            if results is not None and len(results) == len(plan.columns):
+                results += instance_values
+        else:
+            results = await self.snmp_manager.snmp_bulk_get_columns(self.max_repetitions, *plan.columns,
+                                                                     row_count=plan.row_count,
+                                                                     instances=plan.instances)
+
+        if results is None:
+            return False  # abort update
+
+        # Agents that reject GETBULK or return incomplete columns are polled with plain GET from now on
+        start = time.perf_counter()
+        values = None
+        if len(results) == len(plan.columns) + len(plan.instances):
+            values = plan.split_bulk_results(results)
+        self.stats.add_phase(PHASE_DECODE, time.perf_counter() - start)
+        if values is None:
+            _LOGGER.warning(f"GETBULK table walk failed for {self.name}, falling back to GET")
+            self.bulk_supported = False
+            return None
+
+        self.update_unit_values(plan.scalars, results[len(plan.columns):len(plan.columns) + len(plan.scalars)])
+        self.update_table_stores(plan, values)
+        return True
+
+    def update_table_stores(self, plan: RaritanPDURequestPlan, values: dict[str, list[list]]):
+        start = time.perf_counter()
+        if TABLE_OUTLET in plan.sections:
+            self.update_outlet_store(plan.sections[TABLE_OUTLET], values[TABLE_OUTLET])
+        for name, table in self.tables.items():
+            if name in plan.sections:
+                table.update(plan.sections[name], values[name])
+        self.stats.add_phase(PHASE_UPDATE, time.perf_counter() - start)
+
+    async def update_outlet_sensors(self, index: int) -> bool:
+        """Fetch every sensor of one outlet, e.g. after the PDU notified a change of that outlet."""
+        outlet = self.get_outlet_by_index(index)
+        sensor_names = outlet.get_sensor_names()
+        results = await self.snmp_manager.snmp_get(*outlet.get_sensor_oids(sensor_names))
+        if results is None:
+            return False
+
+        if len(sensor_names) == 1:
+            results = [results]
+        outlet.update_sensor_data({name: convert_values(OUTLET_METRICS_BY_KEY[name], [value])[0]
+                                   for name, value in zip(sensor_names, results) if value is not None})
+        return True
+
+    async def update_table_row(self, table_name: str, index: tuple[int, ...]) -> bool:
+        """Fetch the readings of one row of a component table, e.g. after the PDU notified a change of that row."""
+        table = self.tables[table_name]
+        metrics = table.polled_metrics
+        results = await self.snmp_manager.snmp_get(*[["PDU-MIB", metric.symbol, *index] for metric in metrics])
+        if results is None:
+            return False
 
-    def get_data(self) -> dict:
-        data = {}
-        # Add data from outlets
+        if len(metrics) == 1:
+            results = [results]
+        table.update_row(table.slots[index], {metric.key: convert_values(metric, [value])[0]
+                                              for metric, value in zip(metrics, results) if value is not None})
+        return True
+
+    async def set_outlets_operational_state(self, indexes: list[int], operational_state: str, group_size: int = 0,
+                                            group_delay: float = 0.0) -> float | None:
+        """Switch several outlets with as few SET requests as possible, in groups started group_delay seconds apart.
+
+        All outlets are confirmed together by reading their states in one batch. Return the seconds until every
+        outlet was confirmed, None when a write failed or was not confirmed in time.
+        """
+        start = time.monotonic()
+        group_size = group_size or len(indexes)
+        expected_values = {}
+        for offset in range(0, len(indexes), group_size):
+            if offset:
+                await asyncio.sleep(group_delay)  # e.g. to limit inrush current
+
+            group = indexes[offset:offset + group_size]
+            chunk_size = self.snmp_manager.chunk_size
+            for chunk_offset in range(0, len(group), chunk_size):
+                chunk = group[chunk_offset:chunk_offset + chunk_size]
+                results = await self.snmp_manager.snmp_set(
+                    *[[["PDU-MIB", "outletOperationalState", index], operational_state] for index in chunk])
+                if results is None:
+                    # Do not switch later groups out of sequence
+                    _LOGGER.error(f"Switching outlets {chunk} of {self.name} {operational_state} failed")
+                    return None
+                if len(chunk) == 1:
+                    results = [results]
+                expected_values.update(zip(chunk, results))
+
+        pending = {index: (value,) + CONFIRMING_VALUES.get(value, ()) for index, value in expected_values.items()}
+
+        async def check() -> bool:
+            pending_indexes = list(pending)
+            results = await self.snmp_manager.snmp_get(
+                *[["PDU-MIB", "outletOperationalState", index] for index in pending_indexes])
+            if results is None:
+                return False
+            if len(pending_indexes) == 1:
+                results = [results]
+
+            for index, value in zip(pending_indexes, results):
+                if value is None:
+                    continue
+                self.get_outlet_by_index(index).update_sensor_data({"operational_state": value})
+                if value in pending[index]:
+                    del pending[index]
+            return not pending
+
+        confirmed = await poll_with_backoff(check)
+        elapsed = time.monotonic() - start
+        if not confirmed:
+            _LOGGER.warning(f"Outlets {sorted(pending)} of {self.name} not {operational_state} after {elapsed:.1f}s")
+            return None
+
+        _LOGGER.debug(f"{len(indexes)} outlets of {self.name} confirmed {operational_state} "
+                      f"after {elapsed * 1000:.0f}ms")
+        return elapsed
+
+    def update_outlet_store(self, section: RaritanPDURequestSection, values: list[list]):
+        """Write a poll's readings into the outlet store, values holds the readings of each planned metric by slot."""
+        store = self.outlet_store
+        store.swap()
+
+        for name in store.sensor_names:
+            current = store.current[name]
+            previous = store.previous[name]
+            if name not in section.keys:
+                # Not polled in this tier, carry the readings over
+                current[:] = previous
+                continue
+
+            readings = values[section.keys.index(name)]
+            current[:] = readings
+            if None in readings:
+                # Readings of a failed request chunk are None, keep the previous values for them
+                for slot, value in enumerate(readings):
+                    if value is None:
+                        current[slot] = previous[slot]
+
+        timestamp = time.monotonic()
         for outlet in self.outlets:
-            data[outlet.index] = outlet.get_data()
+            store.timestamps[outlet.slot] = timestamp
+            outlet.update_energy_delivered()
+
+    def get_outlet_by_index(self, index: int) -> RaritanPDUOutlet:
+        return self.outlets[index - 1]  # Outlet index starts from 1
 
-        # Add data from PDU
-        data["cpu_temperature"] = self.cpu_temperature
-        return data
+    @property
+    def outlets_on(self) -> int:
+        return self.outlet_store.current["operational_state"].count("on") if self.outlet_store is not None else 0
+
+    @property
+    def outlet_active_power(self) -> float:
+        """Sum of the active power of the outlets, in Watts."""
+        if self.outlet_store is None:
+            return 0
+        return sum(power for power in self.outlet_store.current["active_power"] if power is not None)
+
+    def get_outlet_readings(self, sensor_names: tuple[str, ...]) -> list[dict]:
+        """Readings of every outlet, one dict per outlet read from the columns of the outlet store."""
+        columns = [self.outlet_store.current[name] for name in sensor_names]
+        return [{"index": outlet.index, **dict(zip(sensor_names, row))} for outlet, row in zip(self.outlets,
+                                                                                            zip(*columns))]
+
+    def __getitem__(self, key: int | str) -> any:
+        """Coordinator data access: an outlet index returns the outlet view, a name returns the PDU reading."""
+        if isinstance(key, int):
+            return self.get_outlet_by_index(key)
+        return getattr(self, key)
+
+    def get_data(self) -> "RaritanPDU":
+        """The PDU itself serves the coordinator data, without building a nested dict on every poll."""
+        return self
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+
+from .const import _LOGGER, DOMAIN, DATA_SCHEDULER, MAX_CONCURRENT_POLLS
+
+if TYPE_CHECKING:
+    from .coordinator import RaritanPDUCoordinator
+
+
+class RaritanPDUPollState:
+    """Polling schedule of one coordinator."""
+    __slots__ = ("coordinator", "interval", "next_poll", "task", "poll_lag", "missed_polls")
+
+    def __init__(self, coordinator: RaritanPDUCoordinator, interval: float):
+        self.coordinator = coordinator
+        self.interval = interval
+        self.next_poll = 0.0
+        self.task: asyncio.Task = None
+        self.poll_lag = 0.0  # seconds between the scheduled and the actual start of the last poll
+        self.missed_polls = 0
+
+
+class RaritanPDUScheduler:
+    """Polls every Raritan PDU of the Home Assistant instance.
+
+    PDUs sharing a polling interval get evenly spread start times, and at most MAX_CONCURRENT_POLLS PDUs are polled
+    at the same time.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_concurrent_polls: int = MAX_CONCURRENT_POLLS) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.poll_states: dict[str, RaritanPDUPollState] = {}
+        self.poll_semaphore = asyncio.Semaphore(max_concurrent_polls)
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task = None
+
+    def register(self, key: str, coordinator: RaritanPDUCoordinator, interval: float):
+        self.poll_states[key] = RaritanPDUPollState(coordinator, interval)
+        self.stagger(interval)
+
+        if self.task is None:
+            self.task = self.hass.async_create_background_task(self.run(), f"{DOMAIN} poll scheduler")
+        self.wakeup.set()
+
+    def unregister(self, key: str):
+        poll_state = self.poll_states.pop(key, None)
+        if poll_state is not None and poll_state.task is not None:
+            poll_state.task.cancel()
+        if poll_state is not None:
+            self.stagger(poll_state.interval)
+
+        if not self.poll_states and self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.wakeup.set()
+
+    def stagger(self, interval: float):
+        """Spread the polls of the PDUs sharing an interval evenly across that interval.
+
+        The first scheduled PDU of the group keeps its phase, the others only move when their slot moved, and the PDUs
+        with other intervals are not touched.
+        """
+        poll_states = [poll_state for poll_state in self.poll_states.values() if poll_state.interval == interval]
+        if not poll_states:
+            return
+
+        now = time.monotonic()
+        anchor = next((poll_state.next_poll for poll_state in poll_states if poll_state.next_poll), 0.0)
+        if not anchor:
+            anchor = now + interval / len(poll_states)
+        for i, poll_state in enumerate(poll_states):
+            slot = anchor + interval * i / len(poll_states)
+            if poll_state.next_poll and math.isclose((slot - poll_state.next_poll + interval / 2) % interval,
+                                                     interval / 2, abs_tol=1e-3):
+                continue  # already polled in its slot
+            while slot <= now:
+                slot += interval
+            poll_state.next_poll = slot
+
+    def get_poll_state(self, key: str) -> RaritanPDUPollState | None:
+        return self.poll_states.get(key)
+
+    async def run(self):
+        while self.poll_states:
+            now = time.monotonic()
+            for poll_state in self.poll_states.values():
+                if poll_state.next_poll > now:
+                    continue
+
+                if poll_state.task is not None and not poll_state.task.done():
+                    # The previous poll is still running, skip this interval
+                    poll_state.missed_polls += 1
+                    _LOGGER.debug(f"Skipping poll of {poll_state.coordinator.pdu.name}, previous poll still running")
+                else:
+                    poll_state.task = self.hass.async_create_background_task(
+                        self.poll(poll_state, poll_state.next_poll), f"{DOMAIN} poll {poll_state.coordinator.pdu.name}")
+
+                # Keep the staggered phase, skipping intervals that already passed
+                missed_intervals = int((now - poll_state.next_poll) // poll_state.interval)
+                poll_state.missed_polls += missed_intervals
+                poll_state.next_poll += poll_state.interval * (missed_intervals + 1)
+
+            next_poll = min((poll_state.next_poll for poll_state in self.poll_states.values()), default=now)
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), max(0.0, next_poll - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self, poll_state: RaritanPDUPollState, scheduled: float):
+        async with self.poll_semaphore:
+            poll_state.poll_lag = time.monotonic() - scheduled
+            if poll_state.poll_lag > poll_state.interval / 2:
+                _LOGGER.debug(f"Poll of {poll_state.coordinator.pdu.name} started {poll_state.poll_lag:.2f}s late")
+            await poll_state.coordinator.async_refresh()
+
+
+def get_scheduler(hass: HomeAssistant) -> RaritanPDUScheduler:
+    """Return the scheduler shared by all Raritan config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SCHEDULER not in domain_data:
+        domain_data[DATA_SCHEDULER] = RaritanPDUScheduler(hass)
+    return domain_data[DATA_SCHEDULER]
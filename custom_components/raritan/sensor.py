@@ -1,67 +1,73 @@
-from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass, SensorEntityDescription, RestoreSensor, \
-    UNIT_CONVERTERS, SensorEntity
-from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfPower, PERCENTAGE, UnitOfEnergy, \
-    UnitOfTemperature
+from homeassistant.components.sensor import SensorEntityDescription, RestoreSensor, UNIT_CONVERTERS, SensorEntity, \
+    SensorDeviceClass, SensorStateClass, SensorExtraStoredData
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime, EntityCategory, UnitOfPower
 from homeassistant.core import HomeAssistant, callback
 
-from .entity import RaritanPDUEntity
+from .entity import RaritanPDUEntity, RaritanPDUTableEntity
+from .stats import RollingStats, WindowStats
+from .metrics import PDU_METRICS, OUTLET_METRICS, get_external_sensor_description
 from .coordinator import RaritanPDUCoordinator
-from .const import DOMAIN, _LOGGER
+from .const import DOMAIN, _LOGGER, TABLE_EXTERNAL_SENSOR
 
-PDU_SENSOR_DESCRIPTIONS = (
+PDU_SENSOR_DESCRIPTIONS = tuple(metric.description for metric in PDU_METRICS if metric.description is not None)
+
+# SensorEntityDescription.name will be assigned based on outlet label inside the sensor class
+OUTLET_SENSOR_DESCRIPTIONS = tuple(metric.description for metric in OUTLET_METRICS if metric.description is not None)
+
+# Summary of the outlets, the entities of a PDU in compact mode where the outlet entities are disabled by default.
+# The key is the RaritanPDU attribute.
+OUTLET_SUMMARY_SENSOR_DESCRIPTIONS = (
     SensorEntityDescription(
-        key="cpu_temperature",
-        device_class=SensorDeviceClass.TEMPERATURE,
-        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-        suggested_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        key="outlet_active_power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        suggested_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:thermometer",
+        icon="mdi:flash",
+    ),
+    SensorEntityDescription(
+        key="outlets_on",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:power-socket-us",
     ),
 )
 
-# SensorEntityDescription.name will be assigned based on outlet label inside the sensor class
-OUTLET_SENSOR_DESCRIPTIONS = (
+# Outlet readings in the outlets attribute of the outlet active power sensor, in the native units of the outlet sensors
+OUTLET_SUMMARY_READINGS = ("label", "operational_state", "current", "voltage", "active_power", "power_factor")
+
+# Poll statistics of the PDU, the key is the RaritanPDUPollStats attribute. Rolling statistics show their median.
+DIAGNOSTIC_SENSOR_DESCRIPTIONS = (
     SensorEntityDescription(
-        key="current",
-        device_class=SensorDeviceClass.CURRENT,
-        native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
-        suggested_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        key="poll_duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_unit_of_measurement=UnitOfTime.MILLISECONDS,
         state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:current-ac",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:timer-outline",
     ),
     SensorEntityDescription(
-        key="voltage",
-        device_class=SensorDeviceClass.VOLTAGE,
-        native_unit_of_measurement=UnitOfElectricPotential.MILLIVOLT,
-        suggested_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        key="snmp_round_trip",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_unit_of_measurement=UnitOfTime.MILLISECONDS,
         state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:sine-wave",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:swap-horizontal",
     ),
     SensorEntityDescription(
-        key="active_power",
-        device_class=SensorDeviceClass.POWER,
-        native_unit_of_measurement=UnitOfPower.WATT,
-        suggested_unit_of_measurement=UnitOfPower.WATT,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:flash",
+        key="snmp_timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:timer-alert-outline",
     ),
     SensorEntityDescription(
-        key="power_factor",
-        device_class=SensorDeviceClass.POWER_FACTOR,
-        native_unit_of_measurement=PERCENTAGE,
+        key="varbinds_per_poll",
         state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:angle-acute",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:format-list-numbered",
     ),
-    SensorEntityDescription(
-        key="energy_delivered",
-        device_class=SensorDeviceClass.ENERGY,
-        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
-        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
-        state_class=SensorStateClass.TOTAL,
-        icon="mdi:lightning-bolt",
-    )
-    # To add new outlet sensor, uncomment/update the corresponding line in RaritanPDUOutlet.sensor_data
 )
 
 
@@ -77,11 +83,92 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     for description in PDU_SENSOR_DESCRIPTIONS:
         entities.append(RaritanPDUSensor(coordinator, description, 0))
 
+    for description in OUTLET_SUMMARY_SENSOR_DESCRIPTIONS:
+        if description.key == "outlet_active_power":
+            entities.append(RaritanPDUOutletSummarySensor(coordinator, description, 0))
+        else:
+            entities.append(RaritanPDUSensor(coordinator, description, 0))
+
+    for description in DIAGNOSTIC_SENSOR_DESCRIPTIONS:
+        entities.append(RaritanPDUDiagnosticSensor(coordinator, description, 0))
+
+    for table in coordinator.pdu.tables.values():
+        for slot in range(len(table.indexes)):
+            if table.name == TABLE_EXTERNAL_SENSOR:
+                # The sensor type decides what the value of an external sensor is
+                description = get_external_sensor_description(table.current["type"][slot],
+                                                               table.current["units"][slot])
+                if description is not None:
+                    entities.append(RaritanPDUTableSensor(coordinator, description, table, slot, "value"))
+                continue
+
+            for metric in table.metrics:
+                if metric.description is not None:
+                    entities.append(RaritanPDUTableSensor(coordinator, metric.description, table, slot))
+
     _LOGGER.info(f"Discovered {len(entities)} sensors")
     async_add_entities(entities)
 
 
-class RaritanPDUSensor(RaritanPDUEntity, RestoreSensor, SensorEntity):
+def get_restored_value(last_sensor_data: SensorExtraStoredData | None,
+                       description: SensorEntityDescription) -> float | None:
+    """The restored native value in the native unit of the sensor, None when it was unavailable or unknown."""
+    if last_sensor_data is None:
+        return None
+    try:
+        value = float(last_sensor_data.native_value)
+    except (TypeError, ValueError):
+        return None
+
+    # native_value is stored in the unit the sensor had then
+    converter = UNIT_CONVERTERS[description.device_class]
+    return converter.convert(
+        value,
+        last_sensor_data.native_unit_of_measurement or description.native_unit_of_measurement,
+        description.native_unit_of_measurement,
+    )
+
+
+class RaritanPDUWindowedSensor(SensorEntity):
+    """Sensor sampled on every poll and written once per publish interval of the coordinator, when it changed.
+
+    A measurement publishes the mean of its samples since the last publish, with their minimum, maximum and last value
+    as attributes, so spikes between publishes are still seen.
+    """
+    windowed = True  # False for sensors that are only published less often
+    window: WindowStats = None
+    sampled_poll = 0  # coordinator.poll_count of the last sample
+
+    def sample_value(self, value: any) -> dict | None:
+        """Sample a reading, set the state to publish and return its window attributes, None when not writing."""
+        coordinator = self.coordinator
+        attributes = {}
+        if not coordinator.publish_interval or not coordinator.last_update_success:
+            self._attr_native_value = value
+        elif not self.windowed or self.entity_description.state_class != SensorStateClass.MEASUREMENT:
+            self._attr_native_value = value
+            if not coordinator.publishing:
+                return None
+        else:
+            if self.window is None:
+                self.window = WindowStats()
+            if self.sampled_poll != coordinator.poll_count:
+                self.sampled_poll = coordinator.poll_count
+                self.window.add(value)
+            if not coordinator.publishing:
+                return None
+
+            if self.window.count:
+                self._attr_native_value = self.window.mean
+            attributes = self.window.as_dict()
+            self.window.reset()
+
+        if not self.is_changed((self._attr_native_value, attributes.get("min"), attributes.get("max"))):
+            return None
+        return attributes
+
+
+class RaritanPDUSensor(RaritanPDUEntity, RaritanPDUWindowedSensor, RestoreSensor, SensorEntity):
     """Representation of an SNMP sensor for Raritan PDU."""
 
     def __init__(self, coordinator: RaritanPDUCoordinator, description: SensorEntityDescription, outlet_index: int):
@@ -91,22 +178,16 @@ class RaritanPDUSensor(RaritanPDUEntity, RestoreSensor, SensorEntity):
     async def async_added_to_hass(self):
         """Restore the previous state when the entity is added to Home Assistant."""
         await super().async_added_to_hass()
-        last_state = await self.async_get_last_state()
+        last_sensor_data = await self.async_get_last_sensor_data()
 
-        _LOGGER.debug(f"Restoring sensor {self._attr_unique_id}'s to {str(last_state)}")
+        _LOGGER.debug(f"Restoring sensor {self._attr_unique_id}'s to {str(last_sensor_data)}")
 
         # For now, only need to restore energy delivered
-        if last_state is not None and self.outlet is not None and self.entity_description.key == "energy_delivered":
-            # Restore the last known state
-            value = float(last_state.state)
-
-            # state is stored in suggested_unit_of_measurement
-            converter = UNIT_CONVERTERS[self.entity_description.device_class]
-            converted_value = converter.convert(
-                value,
-                self.entity_description.suggested_unit_of_measurement,
-                self.entity_description.native_unit_of_measurement,
-            )
+        if self.outlet is not None and self.entity_description.key == "energy_delivered":
+            # Restore the last known value, skipped when the sensor was unavailable or unknown
+            converted_value = get_restored_value(last_sensor_data, self.entity_description)
+            if converted_value is None:
+                return
 
             _LOGGER.debug(f"Restored sensor {self._attr_unique_id}'s to {converted_value}")
             self.coordinator.pdu.get_outlet_by_index(self.outlet_index).initialize_energy_delivered(converted_value)
@@ -115,8 +196,69 @@ class RaritanPDUSensor(RaritanPDUEntity, RestoreSensor, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         if self.outlet is not None:
-            self._attr_native_value = self.coordinator.data[self.outlet_index][self.entity_description.key]
+            attributes = self.sample_value(self.coordinator.data[self.outlet_index][self.entity_description.key])
         else:
-            self._attr_native_value = self.coordinator.data[self.entity_description.key]
+            attributes = self.sample_value(self.coordinator.data[self.entity_description.key])
+
+        if attributes is not None:
+            self._attr_extra_state_attributes = attributes
+            super()._handle_coordinator_update()
+
 
-        self.async_write_ha_state()
+class RaritanPDUTableSensor(RaritanPDUTableEntity, RaritanPDUWindowedSensor, RestoreSensor, SensorEntity):
+    """Sensor of one row of a component table, e.g. the current of a circuit breaker."""
+
+    async def async_added_to_hass(self):
+        """Restore the energy summed from a device counter when the entity is added to Home Assistant."""
+        await super().async_added_to_hass()
+        table = self.coordinator.pdu.tables.get(self.table_name)
+        if table is None or self.value_key not in table.counted or self.row_index not in table.slots:
+            return
+
+        value = get_restored_value(await self.async_get_last_sensor_data(), self.entity_description)
+        if value is not None:
+            _LOGGER.debug(f"Restored sensor {self._attr_unique_id}'s to {value}")
+            table.initialize_counter_total(self.value_key, table.slots[self.row_index], value)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        attributes = self.sample_value(self.get_row_value())
+        if attributes is not None:
+            self._attr_extra_state_attributes = attributes
+            super()._handle_coordinator_update()
+
+
+class RaritanPDUOutletSummarySensor(RaritanPDUEntity, RaritanPDUWindowedSensor, SensorEntity):
+    """Total active power of the outlets, with the readings of every outlet as attributes.
+
+    The attributes change on every poll and are not recorded, the outlet entities keep the history of an outlet.
+    """
+    _unrecorded_attributes = frozenset({"outlets"})
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        attributes = self.sample_value(self.coordinator.data[self.entity_description.key])
+        if attributes is not None:
+            self._attr_extra_state_attributes = {
+                **attributes,
+                "outlets": self.coordinator.pdu.get_outlet_readings(OUTLET_SUMMARY_READINGS),
+            }
+            super()._handle_coordinator_update()
+
+
+class RaritanPDUDiagnosticSensor(RaritanPDUEntity, RaritanPDUWindowedSensor, SensorEntity):
+    """Statistic of the PDU's polls, with the rolling percentiles as attributes."""
+    windowed = False  # the rolling percentiles already summarize the polls
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        value = getattr(self.coordinator.pdu.stats, self.entity_description.key)
+        if isinstance(value, RollingStats):
+            if self.sample_value(value.percentile(0.5)) is not None:
+                self._attr_extra_state_attributes = value.as_dict()
+                super()._handle_coordinator_update()
+        elif self.sample_value(value) is not None:
+            super()._handle_coordinator_update()
@@ -0,0 +1,75 @@
+import asyncio
+
+import voluptuous as vol
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .coordinator import RaritanPDUCoordinator
+from .entity import get_outlet_unique_id_prefix
+from .const import _LOGGER, DOMAIN, SERVICE_SET_OUTLETS_POWER, ATTR_OPERATIONAL_STATE, ATTR_GROUP_SIZE, \
+    ATTR_GROUP_DELAY
+
+SET_OUTLETS_POWER_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Required(ATTR_OPERATIONAL_STATE): vol.In(["on", "off", "cycling"]),
+    vol.Optional(ATTR_GROUP_SIZE, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional(ATTR_GROUP_DELAY, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+
+def get_outlets_by_coordinator(hass: HomeAssistant, entity_ids: list[str]) -> dict[RaritanPDUCoordinator, list[int]]:
+    """Outlet indexes of the given outlet entities, grouped by the PDU they belong to.
+
+    The entities are resolved through the entity registry, outlet entities that are disabled can be targeted too.
+    """
+    entity_registry = er.async_get(hass)
+    outlets: dict[RaritanPDUCoordinator, set[int]] = {}
+    for entity_id in entity_ids:
+        entry = entity_registry.async_get(entity_id)
+        if entry is None or entry.platform != DOMAIN:
+            continue
+        coordinator = hass.data.get(DOMAIN, {}).get(entry.config_entry_id)
+        if not isinstance(coordinator, RaritanPDUCoordinator):
+            continue
+
+        prefix = get_outlet_unique_id_prefix(coordinator.pdu.name)
+        if not entry.unique_id.startswith(prefix):
+            continue  # an entity of the PDU or of one of its tables
+        index = entry.unique_id[len(prefix):].split("-", 1)[0]
+        if index.isdigit() and 1 <= int(index) <= coordinator.pdu.outlet_count:
+            outlets.setdefault(coordinator, set()).add(int(index))
+    return {coordinator: sorted(indexes) for coordinator, indexes in outlets.items()}
+
+
+async def async_set_outlets_power(hass: HomeAssistant, call: ServiceCall):
+    """Switch the outlets of every PDU concurrently, each PDU in as few SET requests as possible."""
+    outlets = get_outlets_by_coordinator(hass, call.data[ATTR_ENTITY_ID])
+    if not outlets:
+        raise HomeAssistantError(f"No Raritan outlets among {call.data[ATTR_ENTITY_ID]}")
+
+    async def set_pdu_outlets(coordinator: RaritanPDUCoordinator, indexes: list[int]):
+        # The new states are written to the outlet store, polls must not interleave
+        async with coordinator.update_lock:
+            elapsed = await coordinator.pdu.set_outlets_operational_state(
+                indexes, call.data[ATTR_OPERATIONAL_STATE], call.data[ATTR_GROUP_SIZE], call.data[ATTR_GROUP_DELAY])
+        coordinator.async_update_listeners()
+        return elapsed
+
+    results = await asyncio.gather(*[set_pdu_outlets(coordinator, indexes)
+                                     for coordinator, indexes in outlets.items()])
+    failed = [coordinator.pdu.name for coordinator, elapsed in zip(outlets, results) if elapsed is None]
+    if failed:
+        raise HomeAssistantError(f"Outlets of {', '.join(failed)} were not switched "
+                                 f"{call.data[ATTR_OPERATIONAL_STATE]}")
+    _LOGGER.debug(f"Switched {sum(len(indexes) for indexes in outlets.values())} outlets "
+                  f"{call.data[ATTR_OPERATIONAL_STATE]} in {max(results):.2f}s")
+
+
+def async_setup_services(hass: HomeAssistant):
+    async def handle_set_outlets_power(call: ServiceCall):
+        await async_set_outlets_power(hass, call)
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_OUTLETS_POWER, handle_set_outlets_power,
+                                 schema=SET_OUTLETS_POWER_SCHEMA)
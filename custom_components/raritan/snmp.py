@@ -1,122 +1,429 @@
 import asyncio
-import os
-from pathlib import Path
+import logging
+import time
+
+from pyasn1.type.univ import OctetString
+from pysnmp.entity.config import AUTH_SERVICES, PRIV_SERVICES
 from pysnmp.entity.engine import SnmpEngine
 from pysnmp.hlapi.v3arch import get_cmd, CommunityData, UdpTransportTarget, ContextData, ObjectIdentity, ObjectType, \
-    set_cmd
-from pysnmp.smi import builder, view, compiler
+    set_cmd, bulk_cmd, UsmUserData, USM_KEY_TYPE_LOCALIZED, USM_AUTH_HMAC96_MD5, USM_AUTH_HMAC96_SHA, \
+    USM_AUTH_HMAC128_SHA224, USM_AUTH_HMAC192_SHA256, USM_AUTH_HMAC256_SHA384, USM_AUTH_HMAC384_SHA512, \
+    USM_PRIV_NONE, USM_PRIV_CBC56_DES, USM_PRIV_CBC168_3DES, USM_PRIV_CFB128_AES, USM_PRIV_CFB192_AES, \
+    USM_PRIV_CFB256_AES
+from pysnmp.proto.errind import RequestTimedOut
+from pysnmp.proto.rfc1905 import EndOfMibView
+
+from .mib import MibStore, async_get_mib_store, decode
+from .stats import RaritanPDUPollStats, PHASE_INIT, PHASE_BUILD, PHASE_DECODE
+from .const import _LOGGER, CONF_SNMP_VERSION, CONF_V3_USER_NAME, CONF_V3_AUTH_PROTOCOL, CONF_V3_AUTH_PASSWORD, \
+    CONF_V3_PRIV_PROTOCOL, CONF_V3_PRIV_PASSWORD
+
+TOO_BIG = 1  # SNMP error-status tooBig
+
+INITIAL_CHUNK_SIZE = 32
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 128
+CHUNK_SIZE_STEP = 8
+
+MAX_CONCURRENT_REQUESTS = 4
+
+# Request timeout derived from the measured round-trip times (seconds), as for TCP retransmissions (RFC 6298)
+MIN_TIMEOUT = 0.5
+MAX_TIMEOUT = 5.0
+TIMEOUT_STEP = 0.1  # every distinct timeout is a target address of its own in the SNMP engine
+RETRIES = 1
+
+# SNMPv3 USM protocols by configuration name
+AUTH_PROTOCOLS = {
+    "MD5": USM_AUTH_HMAC96_MD5,
+    "SHA": USM_AUTH_HMAC96_SHA,
+    "SHA-224": USM_AUTH_HMAC128_SHA224,
+    "SHA-256": USM_AUTH_HMAC192_SHA256,
+    "SHA-384": USM_AUTH_HMAC256_SHA384,
+    "SHA-512": USM_AUTH_HMAC384_SHA512,
+}
+PRIV_PROTOCOLS = {
+    "none": USM_PRIV_NONE,
+    "DES": USM_PRIV_CBC56_DES,
+    "3DES": USM_PRIV_CBC168_3DES,
+    "AES": USM_PRIV_CFB128_AES,
+    "AES-192": USM_PRIV_CFB192_AES,
+    "AES-256": USM_PRIV_CFB256_AES,
+}
+
+# Execution point of the SNMP engine that sees the engine ID of the agent in report PDUs
+ENGINE_ID_EXECPOINT = "rfc3412.prepareDataElements:internal"
+DISCOVERY_USER_NAME = "engine-id-discovery"  # unknown to the agent, which reports its engine ID
+
+_snmp_engine: SnmpEngine = None
+_snmp_engine_lock = asyncio.Lock()
+
+
+async def async_get_snmp_engine() -> SnmpEngine:
+    """Return the SNMP engine shared by all PDUs, creating it in the executor on first use."""
+    global _snmp_engine
+    if _snmp_engine is not None:
+        return _snmp_engine
+
+    async with _snmp_engine_lock:
+        if _snmp_engine is None:
+            mib_store = await async_get_mib_store()
+
+            # https://developers.home-assistant.io/docs/asyncio_blocking_operations
+            snmp_engine = await asyncio.get_running_loop().run_in_executor(None, SnmpEngine)
+            # Resolve var-binds against the preloaded MIBs instead of a per-engine MIB builder
+            snmp_engine.cache["mibViewController"] = mib_store.mib_view_controller
+            _snmp_engine = snmp_engine
+    return _snmp_engine
+
+
+class SNMPv3User:
+    """SNMPv3 USM credentials of a device.
+
+    Keys are derived from the passwords with about 1 MB of hashing each, so they are derived once per engine ID of the
+    device and then used as localized keys, which the SNMP engine takes without hashing.
+    """
+    __slots__ = ("user_name", "auth_protocol", "auth_password", "priv_protocol", "priv_password", "engine_id",
+                 "auth_key", "priv_key", "keys_saved")
+
+    def __init__(self, user_name: str, auth_protocol: str, auth_password: str, priv_protocol: str,
+                 priv_password: str):
+        self.user_name = user_name
+        self.auth_protocol = auth_protocol
+        self.auth_password = auth_password
+        self.priv_protocol = priv_protocol
+        self.priv_password = priv_password
+        self.engine_id: bytes = None  # the keys are localized to this engine ID
+        self.auth_key: bytes = None
+        self.priv_key: bytes = None
+        self.keys_saved = False
+
+    def localize_keys(self, engine_id: bytes):
+        """Derive the keys of an engine ID from the passwords. Blocking, run it in the executor."""
+        auth_protocol = AUTH_PROTOCOLS[self.auth_protocol]
+        priv_protocol = PRIV_PROTOCOLS[self.priv_protocol]
+        auth_service = AUTH_SERVICES[auth_protocol]
+        self.auth_key = auth_service.localize_key(auth_service.hash_passphrase(self.auth_password),
+                                                  OctetString(engine_id)).asOctets()
+        self.priv_key = None
+        if priv_protocol != USM_PRIV_NONE:
+            priv_service = PRIV_SERVICES[priv_protocol]
+            self.priv_key = priv_service.localize_key(auth_protocol,
+                                                      priv_service.hash_passphrase(auth_protocol, self.priv_password),
+                                                      OctetString(engine_id)).asOctets()
+        self.engine_id = engine_id
+        self.keys_saved = False
+
+    def get_auth_data(self) -> UsmUserData:
+        return UsmUserData(self.user_name, authKey=self.auth_key, privKey=self.priv_key,
+                           authProtocol=AUTH_PROTOCOLS[self.auth_protocol],
+                           privProtocol=PRIV_PROTOCOLS[self.priv_protocol],
+                           securityEngineId=OctetString(self.engine_id),
+                           authKeyType=USM_KEY_TYPE_LOCALIZED, privKeyType=USM_KEY_TYPE_LOCALIZED)
+
+    def get_keys(self) -> dict:
+        """The localized keys as stored JSON, along with what they were derived for."""
+        return {
+            "user_name": self.user_name,
+            "auth_protocol": self.auth_protocol,
+            "priv_protocol": self.priv_protocol,
+            "engine_id": self.engine_id.hex(),
+            "auth_key": self.auth_key.hex(),
+            "priv_key": self.priv_key.hex() if self.priv_key is not None else None,
+        }
+
+    def restore_keys(self, keys: dict):
+        """Use the keys of get_keys() from an earlier run, unless they were derived for other credentials."""
+        if (keys["user_name"], keys["auth_protocol"], keys["priv_protocol"]) != (self.user_name, self.auth_protocol,
+                                                                                 self.priv_protocol):
+            return
+        self.engine_id = bytes.fromhex(keys["engine_id"])
+        self.auth_key = bytes.fromhex(keys["auth_key"])
+        self.priv_key = bytes.fromhex(keys["priv_key"]) if keys["priv_key"] is not None else None
+        self.keys_saved = True
+
 
-from .const import _LOGGER, MIB_SOURCE_DIR
+def get_usm_user(config: dict) -> SNMPv3User | None:
+    """The SNMPv3 user of a config entry, None when it uses SNMP version 2c."""
+    if config.get(CONF_SNMP_VERSION, "2c") != "3":
+        return None
+    return SNMPv3User(config[CONF_V3_USER_NAME], config[CONF_V3_AUTH_PROTOCOL], config[CONF_V3_AUTH_PASSWORD],
+                      config[CONF_V3_PRIV_PROTOCOL], config[CONF_V3_PRIV_PASSWORD])
+
+
+def get_preceding_oid(oid: tuple) -> tuple:
+    """The OID whose GETNEXT is the given instance, as the instance indexes of its object have a fixed length."""
+    if oid[-1] > 0:
+        return oid[:-1] + (oid[-1] - 1,)
+    return oid[:-1]  # e.g. the object of a scalar instance
+
+
+class RoundTripEstimator:
+    """Smoothed round-trip time of a device and its variation, the timeout covers all but outlying round trips."""
+    __slots__ = ("srtt", "rttvar", "timeout")
+
+    def __init__(self):
+        self.srtt: float = None
+        self.rttvar = 0.0
+        self.timeout = MAX_TIMEOUT  # until the first round trip was measured
+
+    def add(self, round_trip: float):
+        if self.srtt is None:
+            self.srtt = round_trip
+            self.rttvar = round_trip / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - round_trip)
+            self.srtt = 0.875 * self.srtt + 0.125 * round_trip
+        self.set_timeout(self.srtt + 4 * self.rttvar)
+
+    def backoff(self):
+        """Double the timeout after a request timed out, the next measured round trip brings it down again."""
+        self.set_timeout(self.timeout * 2)
+
+    def set_timeout(self, timeout: float):
+        timeout = round(timeout / TIMEOUT_STEP) * TIMEOUT_STEP
+        self.timeout = round(min(MAX_TIMEOUT, max(MIN_TIMEOUT, timeout)), 1)
 
 
 class SNMPManager:
-    def __init__(self, host: str, port: int, read_community: str, write_community: str) -> None:
+    def __init__(self, host: str, port: int, read_community: str, write_community: str,
+                 usm_user: SNMPv3User = None) -> None:
         """Initialize."""
         self.host = host
         self.port = port
         self.read_community = read_community
         self.write_community = write_community
 
-        self.modules_loaded = False
-        self.snmp_engine = None
+        # SNMPv3 reads and writes as the same user, once the engine ID of the device is known
+        self.usm_user = usm_user
+        self.read_auth = CommunityData(read_community) if usm_user is None else None
+        self.write_auth = CommunityData(write_community) if usm_user is None else None
+
+        self.mib_store: MibStore = None
+        self.snmp_engine: SnmpEngine = None
+
+        # Created once and reused, re-resolved only after a request failed
+        self.transport_target: UdpTransportTarget = None
+
+        # Var-binds per GET request, learned from tooBig responses, and the limit of requests in flight
+        self.chunk_size = INITIAL_CHUNK_SIZE
+        self.chunk_size_limit = MAX_CHUNK_SIZE
+        self.request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        # Timing of the requests, shared with the PDU which adds the poll phases of its own
+        self.stats = RaritanPDUPollStats()
+        self.round_trip = RoundTripEstimator()
 
-    def load_mib_modules(self):
-        if self.modules_loaded:
+        # Request errors are logged at debug level while the device is known to be unreachable
+        self.error_log_level = logging.ERROR
+
+    async def initialize(self) -> bool:
+        """Load the shared MIB store and SNMP engine, and the SNMPv3 keys of the device, if not already."""
+        if self.mib_store is not None and self.snmp_engine is not None and self.read_auth is not None:
+            return True
+
+        start = time.perf_counter()
+        if self.mib_store is None:
+            self.mib_store = await async_get_mib_store()
+
+        if self.snmp_engine is None:
+            self.snmp_engine = await async_get_snmp_engine()
+
+        if self.read_auth is None:
+            await self.initialize_usm_user()
+        self.stats.add_phase(PHASE_INIT, time.perf_counter() - start)
+        return self.read_auth is not None
+
+    async def initialize_usm_user(self):
+        """Localize the SNMPv3 keys to the engine ID of the device, unless they already are."""
+        engine_id = await self.discover_engine_id()
+        if engine_id is None:
             return
 
-        if not Path(MIB_SOURCE_DIR).is_dir():
-            _LOGGER.error(f"mibs directory does not exist: {MIB_SOURCE_DIR}, cwd: {os.getcwd()}")
+        usm_user = self.usm_user
+        if engine_id != usm_user.engine_id:
+            _LOGGER.debug(f"SNMPv3 engine ID of {self.host}:{self.port} is {engine_id.hex()}, localizing keys")
+            await asyncio.get_running_loop().run_in_executor(None, usm_user.localize_keys, engine_id)
+        self.read_auth = self.write_auth = usm_user.get_auth_data()
+
+    async def discover_engine_id(self) -> bytes | None:
+        """Learn the engine ID of the device from its report to a request of an unknown user (RFC 3414 4)."""
+        transport_target = await self.get_transport_target()
+        engine_ids = []
+
+        def observe(snmp_engine: SnmpEngine, execpoint: str, variables: dict, cb_ctx: any):
+            if tuple(variables["transportAddress"])[:2] == tuple(transport_target.transport_address)[:2]:
+                engine_ids.append(bytes(variables["securityEngineId"]))
+
+        self.snmp_engine.observer.register_observer(observe, ENGINE_ID_EXECPOINT)
+        try:
+            async with self.request_semaphore:
+                start = time.perf_counter()
+                error_indication, _, _, _ = await get_cmd(
+                    self.snmp_engine,
+                    UsmUserData(DISCOVERY_USER_NAME),
+                    transport_target,
+                    ContextData(),
+                    ObjectType(ObjectIdentity(self.mib_store.get_oid("SNMPv2-MIB", "sysDescr", 0))),
+                    lookupMib=False
+                )
+                # The unknown user is reported as an error, only a missing response counts as one
+                self.add_request_stats(start, 1, error_indication if not engine_ids else None)
+        finally:
+            self.snmp_engine.observer.unregister_observer(observe)
+
+        engine_id = next((engine_id for engine_id in engine_ids if engine_id), None)
+        if engine_id is None:
+            _LOGGER.log(self.error_log_level, f"SNMPv3 engine ID discovery of {self.host}:{self.port} failed: "
+                                              f"{error_indication}")
+            self.invalidate_transport_target()
+        return engine_id
+
+    def add_request_stats(self, start: float, varbinds: int, error_indication: any):
+        """Record the round trip of a request started at start, and whether it timed out or failed."""
+        round_trip = time.perf_counter() - start
+        timed_out = isinstance(error_indication, RequestTimedOut)
+        self.stats.add_request(round_trip, varbinds, timed_out, bool(error_indication))
+        if timed_out:
+            self.round_trip.backoff()
+        elif not error_indication and round_trip < self.round_trip.timeout:
+            # Longer round trips include a retry after a lost datagram, they say nothing about the device
+            self.round_trip.add(round_trip)
 
-        mib_builder = builder.MibBuilder()
-        mib_builder.add_mib_sources(builder.DirMibSource(MIB_SOURCE_DIR))
-        compiler.add_mib_compiler(mib_builder, sources=[MIB_SOURCE_DIR])
-        mib_builder.loadModules('PDU-MIB', 'SNMPv2-SMI', 'INET-ADDRESS-MIB', 'SNMPv2-TC', 'SNMPv2-CONF', 'SNMPv2-MIB')
-        mib_view_controller = view.MibViewController(mib_builder)
-        self.modules_loaded = True
+    async def get_transport_target(self) -> UdpTransportTarget:
+        """Return the cached transport target, resolving the host address only when there is none."""
+        if self.transport_target is None:
+            self.transport_target = await UdpTransportTarget.create((self.host, self.port),
+                                                                    timeout=self.round_trip.timeout, retries=RETRIES)
+        self.transport_target.timeout = self.round_trip.timeout
+        return self.transport_target
+
+    def invalidate_transport_target(self, error_indication: any = None):
+        """Drop the cached transport target so the host address is resolved again on the next request.
+
+        SNMPv3 errors other than timeouts also rediscover the engine ID, e.g. after the device was replaced.
+        """
+        self.transport_target = None
+        if self.usm_user is not None and error_indication is not None and \
+                not isinstance(error_indication, RequestTimedOut):
+            self.read_auth = self.write_auth = None
+
+    def get_object_type(self, oid: list, *value: any) -> ObjectType:
+        """Build a var-bind from a symbolic [module, symbol, index...] OID using the precomputed numeric OID."""
+        return ObjectType(ObjectIdentity(self.mib_store.get_oid(*oid)), *value)
 
     async def snmp_get(self, *oids: any) -> any:
-        _LOGGER.debug(f"SNMP get: {self.host}:{self.port} {self.read_community} {oids}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"SNMP get: {self.host}:{self.port} {self.read_community} {oids}")
 
-        # https://developers.home-assistant.io/docs/asyncio_blocking_operations
-        loop = asyncio.get_event_loop()
+        if not await self.initialize():
+            return None
 
-        # load modules if not already
-        if not self.modules_loaded:
-            await loop.run_in_executor(None, self.load_mib_modules)
+        # Split the var-binds into chunks that are requested concurrently, a failed chunk leaves None results
+        results = [None] * len(oids)
+        chunk_size = self.chunk_size
+        await asyncio.gather(*[self.snmp_get_chunk(oids[offset:offset + chunk_size], results, offset)
+                               for offset in range(0, len(oids), chunk_size)])
 
-        if self.snmp_engine is None:
-            self.snmp_engine = await loop.run_in_executor(None, SnmpEngine)
+        if all(result is None for result in results):
+            return None
 
-        oid_objects = [ObjectType(ObjectIdentity(*oid)) for oid in oids]
-        error_indication, error_status, error_index, var_binds = await get_cmd(
-            self.snmp_engine,
-            CommunityData(self.read_community),
-            await UdpTransportTarget.create((self.host, self.port), timeout=5, retries=1),
-            ContextData(),
-            *oid_objects
-        )
+        if len(results) == 1:
+            return results[0]
+        return results
+
+    async def snmp_get_chunk(self, oids: list, results: list, offset: int):
+        """GET one chunk of var-binds into results[offset:], splitting it further when the response is too big."""
+        start = time.perf_counter()
+        oid_objects = [self.get_object_type(oid) for oid in oids]
+        self.stats.add_phase(PHASE_BUILD, time.perf_counter() - start)
+
+        transport_target = await self.get_transport_target()
+        async with self.request_semaphore:
+            start = time.perf_counter()
+            error_indication, error_status, error_index, var_binds = await get_cmd(
+                self.snmp_engine,
+                self.read_auth,
+                transport_target,
+                ContextData(),
+                *oid_objects,
+                lookupMib=False
+            )
+            self.add_request_stats(start, len(oids), error_indication)
 
-        _LOGGER.debug(f"SNMP get: {self.host}:{self.port} {self.read_community} {oids} "
-                      f"Error: {error_indication}, Status: {error_status}, Index: {error_index}, VarBinds: {var_binds}")
+        # The var-bind dump is only formatted when debug logging is enabled, it costs more than the decoding
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"SNMP get: {self.host}:{self.port} {self.read_community} {oids} Error: {error_indication}, "
+                          f"Status: {error_status}, Index: {error_index}, VarBinds: {var_binds}")
 
         if error_indication:
-            _LOGGER.error("SNMP error: %s", error_indication)
-            return None
+            _LOGGER.log(self.error_log_level, "SNMP error: %s", error_indication)
+            self.invalidate_transport_target(error_indication)
+            return
 
         if error_status:
+            if int(error_status) == TOO_BIG and len(oids) > 1:
+                # Learn a smaller chunk size for this device, never growing back to a size known too big
+                self.chunk_size_limit = min(self.chunk_size_limit, len(oids) - 1)
+                self.chunk_size = max(MIN_CHUNK_SIZE, min(self.chunk_size, len(oids) // 2))
+                _LOGGER.debug(f"SNMP get: {self.host}:{self.port} response too big, chunk size {self.chunk_size}")
+                chunk_size = self.chunk_size
+                await asyncio.gather(*[self.snmp_get_chunk(oids[start:start + chunk_size], results, offset + start)
+                                       for start in range(0, len(oids), chunk_size)])
+                return
+
             _LOGGER.error(
                 "%s at %s",
                 error_status.prettyPrint(),
                 error_index and var_binds[int(error_index) - 1] or "?"
             )
-            return None
+            return
 
-        results = []
-        for var_bind in var_binds:
-            val = var_bind.prettyPrint().split('=')[1].strip()
-            if val.isdigit():
-                results.append(int(val))
-            elif val.isdecimal():
-                results.append(float(val))
-            else:
-                results.append(val)
+        # A full chunk fit into one response, try a larger one next time
+        if len(oids) >= self.chunk_size:
+            self.chunk_size = min(self.chunk_size_limit, self.chunk_size + CHUNK_SIZE_STEP)
 
-        if len(results) == 1:
-            return results[0]
-        return results
+        start = time.perf_counter()
+        decoders = [self.mib_store.get_decoder(*oid) for oid in oids]
+        results[offset:offset + len(var_binds)] = [decode(decoder, value)
+                                                   for decoder, (_, value) in zip(decoders, var_binds)]
+        self.stats.add_phase(PHASE_DECODE, time.perf_counter() - start)
 
     async def snmp_set(self, *oids_and_values: any) -> any:
         _LOGGER.debug(f"SNMP set: {self.host}:{self.port} {self.write_community} {oids_and_values}")
 
-        # Obtain the event loop
-        loop = asyncio.get_event_loop()
-
-        # Load MIB modules if not already loaded
-        if not self.modules_loaded:
-            await loop.run_in_executor(None, self.load_mib_modules)
-
-        # Ensure the SNMP engine is instantiated
-        if self.snmp_engine is None:
-            self.snmp_engine = await loop.run_in_executor(None, SnmpEngine)
+        # Load the MIB store, the SNMP engine and the SNMPv3 keys if not already
+        if not await self.initialize():
+            return None
 
         # Prepare the OID objects with values to set
-        oid_objects = [ObjectType(ObjectIdentity(*oid), value) for oid, value in oids_and_values]
+        start = time.perf_counter()
+        oid_objects = [self.get_object_type(oid, value) for oid, value in oids_and_values]
+        self.stats.add_phase(PHASE_BUILD, time.perf_counter() - start)
 
         # Send the SNMP set command
-        error_indication, error_status, error_index, var_binds = await set_cmd(
-            self.snmp_engine,
-            CommunityData(self.write_community),
-            await UdpTransportTarget.create((self.host, self.port), timeout=5, retries=1),
-            ContextData(),
-            *oid_objects
-        )
+        transport_target = await self.get_transport_target()
+        async with self.request_semaphore:
+            start = time.perf_counter()
+            error_indication, error_status, error_index, var_binds = await set_cmd(
+                self.snmp_engine,
+                self.write_auth,
+                transport_target,
+                ContextData(),
+                *oid_objects,
+                lookupMib=False
+            )
+            self.add_request_stats(start, len(oid_objects), error_indication)
 
-        _LOGGER.debug(f"SNMP set: {self.host}:{self.port} {self.write_community} {oids_and_values} "
-                      f"Error: {error_indication}, Status: {error_status}, Index: {error_index}, VarBinds: {var_binds}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"SNMP set: {self.host}:{self.port} {self.write_community} {oids_and_values} "
+                          f"Error: {error_indication}, Status: {error_status}, Index: {error_index}, "
+                          f"VarBinds: {var_binds}")
 
         # Handle errors in the SNMP operation
         if error_indication:
-            _LOGGER.error("SNMP error: %s", error_indication)
+            _LOGGER.log(self.error_log_level, "SNMP error: %s", error_indication)
+            self.invalidate_transport_target(error_indication)
             return None
 
         if error_status:
@@ -128,16 +435,122 @@ class SNMPManager:
             return None
 
         # Parse and return the results from var_binds
-        results = []
-        for var_bind in var_binds:
-            val = var_bind.prettyPrint().split('=')[1].strip()
-            if val.isdigit():
-                results.append(int(val))
-            elif val.isdecimal():
-                results.append(float(val))
-            else:
-                results.append(val)
+        start = time.perf_counter()
+        results = [decode(self.mib_store.get_decoder(*oid), value)
+                   for (oid, _), (_, value) in zip(oids_and_values, var_binds)]
+        self.stats.add_phase(PHASE_DECODE, time.perf_counter() - start)
 
         if len(results) == 1:
             return results[0]
         return results
+
+    async def snmp_bulk_get_columns(self, max_repetitions: int, *columns: any, start_index: tuple = (),
+                                    stop_index: tuple = None, row_count: int = None, instances: list = ()) -> any:
+        """Walk table columns with GETBULK, returning {index: value} for each column.
+
+        The walk starts after start_index and ends after the rows whose index begins with stop_index, e.g. a range
+        of data log entries, or once row_count rows of a column arrived. The given instances, e.g. scalars or single
+        rows of other tables, are fetched as non-repeaters of the same requests and their values follow the columns
+        in the result. Return None when the agent did not respond and an empty list when it mishandled the GETBULK
+        request.
+        """
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"SNMP bulk: {self.host}:{self.port} {self.read_community} {max_repetitions} {columns} "
+                          f"{start_index} {stop_index} {instances}")
+
+        if not await self.initialize():
+            return None
+
+        column_oids = [self.mib_store.get_oid(*column) for column in columns]
+        decoders = [self.mib_store.get_decoder(*column) for column in columns]
+        results = [{} for _ in columns]
+        cursors = [column_oid + tuple(start_index) for column_oid in column_oids]
+        pending = list(range(len(columns)))
+
+        instance_oids = [self.mib_store.get_oid(*instance) for instance in instances]
+        instance_decoders = [self.mib_store.get_decoder(*instance) for instance in instances]
+        instance_values = [None] * len(instances)
+        pending_instances = list(range(len(instances)))
+
+        # Walk all unfinished columns side by side, each response carries up to max_repetitions rows after the
+        # instances that did not fit in earlier responses
+        while pending or pending_instances:
+            start = time.perf_counter()
+            oid_objects = [ObjectType(ObjectIdentity(get_preceding_oid(instance_oids[i]))) for i in pending_instances]
+            oid_objects.extend(ObjectType(ObjectIdentity(cursors[i])) for i in pending)
+            repetitions = max_repetitions
+            if row_count is not None and pending:
+                repetitions = max(1, min(max_repetitions, row_count - min(len(results[i]) for i in pending)))
+            self.stats.add_phase(PHASE_BUILD, time.perf_counter() - start)
+
+            transport_target = await self.get_transport_target()
+            async with self.request_semaphore:
+                start = time.perf_counter()
+                error_indication, error_status, error_index, var_binds = await bulk_cmd(
+                    self.snmp_engine,
+                    self.read_auth,
+                    transport_target,
+                    ContextData(),
+                    len(pending_instances),
+                    repetitions,
+                    *oid_objects,
+                    lookupMib=False
+                )
+                self.add_request_stats(start, len(var_binds), error_indication)
+
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(f"SNMP bulk: {self.host}:{self.port} {self.read_community} {columns} "
+                              f"Error: {error_indication}, Status: {error_status}, Index: {error_index}, "
+                              f"VarBinds: {var_binds}")
+
+            if error_indication:
+                _LOGGER.log(self.error_log_level, "SNMP error: %s", error_indication)
+                self.invalidate_transport_target(error_indication)
+                return None
+
+            if error_status:
+                _LOGGER.error("%s in bulk request", error_status.prettyPrint())
+                return []
+
+            if not var_binds:
+                _LOGGER.warning(f"Empty bulk response from {self.host}:{self.port}")
+                return []
+
+            start = time.perf_counter()
+            answered = var_binds[:len(pending_instances)]
+            for i, (oid, value) in zip(pending_instances, answered):
+                if tuple(oid) == instance_oids[i] and not isinstance(value, EndOfMibView):
+                    instance_values[i] = decode(instance_decoders[i], value)
+            pending_instances = pending_instances[len(answered):]
+
+            finished = set()
+            row_binds = var_binds[len(answered):] if pending else []
+            for offset in range(0, len(row_binds), len(pending) or 1):
+                for i, var_bind in zip(pending, row_binds[offset:offset + len(pending)]):
+                    if i in finished:
+                        continue
+
+                    oid, value = tuple(var_bind[0]), var_bind[1]
+                    column_oid = column_oids[i]
+                    if isinstance(value, EndOfMibView) or oid[:len(column_oid)] != column_oid:
+                        finished.add(i)  # walked past the end of this column
+                        continue
+
+                    if oid <= cursors[i]:
+                        _LOGGER.warning(f"Non-increasing OID {oid} in bulk response from {self.host}:{self.port}")
+                        return []
+
+                    index = oid[len(column_oid):]
+                    if stop_index is not None and index[:len(stop_index)] > tuple(stop_index):
+                        finished.add(i)  # walked past the requested rows
+                        continue
+
+                    results[i][index] = decode(decoders[i], value)
+                    cursors[i] = oid
+                    if row_count is not None and len(results[i]) >= row_count:
+                        finished.add(i)  # got every row of this column
+
+            self.stats.add_phase(PHASE_DECODE, time.perf_counter() - start)
+            pending = [i for i in pending if i not in finished]
+
+        return results + instance_values
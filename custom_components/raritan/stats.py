@@ -0,0 +1,152 @@
+import time
+from collections import deque
+
+from .const import POLL_STATS_WINDOW
+
+# Phases of a poll, time spent in each is summed over the poll's requests, including concurrent ones
+PHASE_INIT = "init"  # loading the MIB store and the SNMP engine
+PHASE_BUILD = "build"  # building the var-binds of the requests
+PHASE_NETWORK = "network"  # waiting for the responses
+PHASE_DECODE = "decode"  # decoding the var-binds of the responses
+PHASE_UPDATE = "update"  # writing the readings into the stores
+PHASE_ENTITY_WRITE = "entity write"  # writing the states of the entities, after the poll
+POLL_PHASES = (PHASE_INIT, PHASE_BUILD, PHASE_NETWORK, PHASE_DECODE, PHASE_UPDATE, PHASE_ENTITY_WRITE)
+
+
+class RollingStats:
+    """The latest samples of a measurement and their percentiles."""
+    __slots__ = ("samples", "count")
+
+    def __init__(self, size: int = POLL_STATS_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0  # samples ever added
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+
+    @property
+    def last(self) -> float | None:
+        return self.samples[-1] if self.samples else None
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self.samples:
+            return None
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "last": self.last,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": max(self.samples) if self.samples else None,
+        }
+
+
+class WindowStats:
+    """Minimum, maximum, mean and last value of the samples since the last reset, updated in O(1) per sample."""
+    __slots__ = ("count", "total", "min", "max", "last")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, value: float | None):
+        if value is None:
+            return
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if self.count == 0 or value > self.max:
+            self.max = value
+        self.total += value
+        self.count += 1
+        self.last = value
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        return {
+            "min": self.min,
+            "max": self.max,
+            "last": self.last,
+            "samples": self.count,
+        }
+
+
+class RaritanPDUPollStats:
+    """Timing of the polls and SNMP requests of one PDU, in seconds."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.phases = {phase: RollingStats() for phase in POLL_PHASES}  # time per poll
+        self.poll_duration = RollingStats()
+        self.snmp_round_trip = RollingStats()  # per request
+        self.varbinds_per_poll = RollingStats()
+        self.requests_per_poll = RollingStats()
+        self.snmp_timeouts = 0
+        self.snmp_errors = 0
+
+        # Totals of the poll in progress, None between polls
+        self.poll_start = 0.0
+        self.poll_phases: dict[str, float] = None
+        self.poll_varbinds = 0
+        self.poll_requests = 0
+
+    def start_poll(self):
+        self.poll_start = time.perf_counter()
+        self.poll_phases = {phase: 0.0 for phase in POLL_PHASES}
+        self.poll_varbinds = 0
+        self.poll_requests = 0
+
+    def end_poll(self):
+        if self.poll_phases is None:
+            return
+        self.poll_duration.add(time.perf_counter() - self.poll_start)
+        for phase, seconds in self.poll_phases.items():
+            if phase != PHASE_ENTITY_WRITE:
+                self.phases[phase].add(seconds)
+        self.varbinds_per_poll.add(self.poll_varbinds)
+        self.requests_per_poll.add(self.poll_requests)
+        self.poll_phases = None
+
+    def add_phase(self, phase: str, seconds: float):
+        """Add time spent in a phase to the poll in progress, or as a sample of its own outside polls."""
+        if self.poll_phases is not None:
+            self.poll_phases[phase] += seconds
+        else:
+            self.phases[phase].add(seconds)
+
+    def add_request(self, round_trip: float, varbinds: int, timed_out: bool = False, failed: bool = False):
+        self.add_phase(PHASE_NETWORK, round_trip)
+        if timed_out:
+            self.snmp_timeouts += 1
+        elif failed:
+            self.snmp_errors += 1
+        else:
+            self.snmp_round_trip.add(round_trip)
+
+        if self.poll_phases is not None:
+            self.poll_varbinds += varbinds
+            self.poll_requests += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "poll_duration": self.poll_duration.as_dict(),
+            "phases": {phase: stats.as_dict() for phase, stats in self.phases.items()},
+            "snmp_round_trip": self.snmp_round_trip.as_dict(),
+            "varbinds_per_poll": self.varbinds_per_poll.as_dict(),
+            "requests_per_poll": self.requests_per_poll.as_dict(),
+            "snmp_timeouts": self.snmp_timeouts,
+            "snmp_errors": self.snmp_errors,
+        }
@@ -2,7 +2,8 @@ from typing import Any
 
 from homeassistant.components.switch import SwitchEntityDescription, SwitchDeviceClass, SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 
 from .entity import RaritanPDUEntity
 from .const import DOMAIN
@@ -36,13 +37,23 @@ class RaritanPDUSwitch(RaritanPDUEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the outlet on."""
-        await self.outlet.power_on()
-        await self.coordinator.async_request_refresh()
+        if await self.outlet.power_on() is None:
+            raise HomeAssistantError(f"Outlet {self.outlet_index} of {self.coordinator.pdu.name} was not switched on")
+        # The outlet already holds the confirmed value, publish it without waiting for a poll
+        self.coordinator.async_update_listeners()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the outlet off."""
-        await self.outlet.power_off()
-        await self.coordinator.async_request_refresh()
+        if await self.outlet.power_off() is None:
+            raise HomeAssistantError(f"Outlet {self.outlet_index} of {self.coordinator.pdu.name} was not switched off")
+        # The outlet already holds the confirmed value, publish it without waiting for a poll
+        self.coordinator.async_update_listeners()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.is_changed((self.coordinator.data[self.outlet_index]["operational_state"],)):
+            super()._handle_coordinator_update()
 
     @property
     def is_on(self):
@@ -52,5 +63,5 @@ class RaritanPDUSwitch(RaritanPDUEntity, SwitchEntity):
     @property
     def available(self) -> bool:
         """The outlet can be turned on/off when it is not in power cycling or error."""
-        return self.coordinator.data[self.outlet_index]["operational_state"] == "on" or \
-            self.coordinator.data[self.outlet_index]["operational_state"] == "off"
+        return super().available and (self.coordinator.data[self.outlet_index]["operational_state"] == "on" or
+                                      self.coordinator.data[self.outlet_index]["operational_state"] == "off")
@@ -3,7 +3,8 @@ from typing import Any
 from homeassistant.components.switch import SwitchEntityDescription, SwitchDeviceClass, SwitchEntity
 from homeassistant.components.text import TextEntityDescription, TextEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 
 from .entity import RaritanPDUEntity
 from .const import DOMAIN
@@ -34,6 +35,12 @@ class RaritanPDUText(RaritanPDUEntity, TextEntity):
     def __init__(self, coordinator: RaritanPDUCoordinator, description: TextEntityDescription, outlet_index: int):
         RaritanPDUEntity.__init__(self, coordinator, description, outlet_index)
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.is_changed((self.coordinator.data[self.outlet_index]["label"],)):
+            super()._handle_coordinator_update()
+
     @property
     def native_value(self):
         """Return the value reported by the text."""
@@ -41,5 +48,7 @@ class RaritanPDUText(RaritanPDUEntity, TextEntity):
 
     async def async_set_value(self, value: str):
         """Handle setting the value."""
-        await self.outlet.set_label(value)
-        await self.coordinator.async_request_refresh()
+        if await self.outlet.set_label(value) is None:
+            raise HomeAssistantError(f"Outlet {self.outlet_index} of {self.coordinator.pdu.name} was not relabeled")
+        # The outlet already holds the confirmed value, publish it without waiting for a poll
+        self.coordinator.async_update_listeners()
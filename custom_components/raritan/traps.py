@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import socket
+from typing import TYPE_CHECKING
+
+from pyasn1.codec.ber import decoder, encoder
+from pysnmp.proto import api
+
+from homeassistant.core import HomeAssistant
+
+from .mib import MibStore, async_get_mib_store, decode
+from .const import _LOGGER, DOMAIN, DATA_TRAP_RECEIVERS, TABLE_CIRCUIT_BREAKER, TABLE_EXTERNAL_SENSOR
+
+if TYPE_CHECKING:
+    from .coordinator import RaritanPDUCoordinator
+
+# PDU-MIB notifications that trigger a refresh, all others are ignored
+TRAP_NOTIFICATIONS = ("powerControl", "thresholdAlarm", "circuitBreakerTripped", "circuitBreakerRecovered",
+                      "rebootStarted", "rebootCompleted", "externalOnOffSensorStateChange")
+
+# Notification objects that identify what changed, decoded by symbol
+TRAP_OBJECTS = ("outletOperationalState", "outletLabel", "circuitBreakerLabel", "sensorDescr",
+                "externalSensorNumber")
+
+# Outlet number in the sensorDescr of a thresholdAlarm, e.g. "Outlet 3 RMS Current"
+OUTLET_SENSOR_DESCR = re.compile(r"\boutlet\s*(\d+)", re.IGNORECASE)
+
+# Circuit breaker number in the sensorDescr of a thresholdAlarm, e.g. "Circuit Breaker 2 Current"
+CIRCUIT_BREAKER_SENSOR_DESCR = re.compile(r"\bcircuit\s*breaker\s*(\d+)", re.IGNORECASE)
+
+
+def get_notification_outlet(objects: dict[str, tuple[tuple, any]]) -> int | None:
+    """Index of the outlet a notification is about, None when it is not about a single outlet."""
+    for symbol in ("outletOperationalState", "outletLabel"):
+        if symbol in objects:
+            return objects[symbol][0][0]
+
+    if "sensorDescr" in objects:
+        match = OUTLET_SENSOR_DESCR.search(str(objects["sensorDescr"][1]))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def get_notification_row(objects: dict[str, tuple[tuple, any]]) -> tuple[str, tuple[int, ...]] | None:
+    """Table and row index of the component a notification is about, e.g. a tripped circuit breaker."""
+    if "circuitBreakerLabel" in objects:
+        return TABLE_CIRCUIT_BREAKER, tuple(objects["circuitBreakerLabel"][0])
+    if "externalSensorNumber" in objects:
+        return TABLE_EXTERNAL_SENSOR, (int(objects["externalSensorNumber"][1]),)
+
+    if "sensorDescr" in objects:
+        match = CIRCUIT_BREAKER_SENSOR_DESCR.search(str(objects["sensorDescr"][1]))
+        if match:
+            return TABLE_CIRCUIT_BREAKER, (int(match.group(1)),)
+    return None
+
+
+class RaritanPDUTrapProtocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver: RaritanPDUTrapReceiver) -> None:
+        """Initialize."""
+        self.receiver = receiver
+        self.transport: asyncio.DatagramTransport = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        self.receiver.handle_datagram(self.transport, data, addr)
+
+
+class RaritanPDUTrapReceiver:
+    """Receives SNMPv1/v2c notifications of every Raritan PDU on one UDP port and routes them by source address."""
+
+    def __init__(self, hass: HomeAssistant, port: int) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.port = port
+        self.transport: asyncio.DatagramTransport = None
+        self.mib_store: MibStore = None
+
+        self.notifications: dict[tuple[int, ...], str] = {}  # notification OID -> name
+        self.objects: dict[tuple[int, ...], str] = {}  # notification object OID -> symbol
+        self.coordinators: dict[str, RaritanPDUCoordinator] = {}  # PDU address -> coordinator
+        self.addresses: dict[str, list[str]] = {}  # config entry -> PDU addresses
+
+    async def start(self):
+        self.mib_store = await async_get_mib_store()
+        self.notifications = {self.mib_store.get_oid("PDU-MIB", name): name for name in TRAP_NOTIFICATIONS}
+        self.objects = {self.mib_store.get_oid("PDU-MIB", symbol): symbol for symbol in TRAP_OBJECTS}
+
+        self.transport, _ = await self.hass.loop.create_datagram_endpoint(
+            lambda: RaritanPDUTrapProtocol(self), local_addr=("0.0.0.0", self.port))
+        _LOGGER.info(f"Listening for SNMP notifications on UDP port {self.port}")
+
+    def stop(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    async def register(self, key: str, coordinator: RaritanPDUCoordinator):
+        """Route the notifications sent from the PDU's addresses to its coordinator."""
+        snmp_manager = coordinator.pdu.snmp_manager
+        try:
+            address_infos = await self.hass.loop.getaddrinfo(snmp_manager.host, None, type=socket.SOCK_DGRAM)
+            addresses = list({address_info[4][0] for address_info in address_infos})
+        except OSError as e:
+            _LOGGER.warning(f"Could not resolve {snmp_manager.host} for SNMP notifications: {e}")
+            addresses = [snmp_manager.host]
+
+        self.addresses[key] = addresses
+        for address in addresses:
+            self.coordinators[address] = coordinator
+
+    def unregister(self, key: str):
+        for address in self.addresses.pop(key, []):
+            self.coordinators.pop(address, None)
+
+    def handle_datagram(self, transport: asyncio.DatagramTransport, data: bytes, addr: tuple):
+        try:
+            protocol_module = api.PROTOCOL_MODULES[int(api.decodeMessageVersion(data))]
+            message, _ = decoder.decode(data, asn1Spec=protocol_module.Message())
+            pdu = protocol_module.apiMessage.get_pdu(message)
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.debug(f"Undecodable SNMP notification from {addr[0]}: {e}")
+            return
+
+        if protocol_module is api.v1:
+            if not pdu.isSameTypeWith(protocol_module.TrapPDU()):
+                return
+            # SNMPv1 traps of SNMPv2 notifications carry the notification OID as enterprise.0.specific-trap
+            notification_oid = (tuple(protocol_module.apiTrapPDU.get_enterprise(pdu)) +
+                                (0, int(protocol_module.apiTrapPDU.get_specific_trap(pdu))))
+            var_binds = protocol_module.apiTrapPDU.get_varbinds(pdu)
+        else:
+            if pdu.isSameTypeWith(protocol_module.InformRequestPDU()):
+                # Acknowledge informs so the PDU does not resend them
+                response = protocol_module.apiMessage.get_response(message)
+                protocol_module.apiPDU.set_varbinds(protocol_module.apiMessage.get_pdu(response),
+                                                    protocol_module.apiPDU.get_varbinds(pdu))
+                transport.sendto(encoder.encode(response), addr)
+            elif not pdu.isSameTypeWith(protocol_module.TrapPDU()):
+                return
+            var_binds = protocol_module.apiPDU.get_varbinds(pdu)
+            # The second var-bind is snmpTrapOID.0
+            notification_oid = tuple(var_binds[1][1]) if len(var_binds) > 1 else ()
+
+        notification = self.notifications.get(notification_oid)
+        if notification is None:
+            return
+
+        coordinator = self.coordinators.get(addr[0])
+        if coordinator is None:
+            _LOGGER.debug(f"Ignoring {notification} notification from unknown PDU {addr[0]}")
+            return
+
+        objects = self.decode_objects(var_binds)
+        _LOGGER.debug(f"Received {notification} notification from {coordinator.pdu.name}: {objects}")
+        self.hass.async_create_task(coordinator.async_handle_notification(notification, objects))
+
+    def decode_objects(self, var_binds: list) -> dict[str, tuple[tuple, any]]:
+        """Decode the notification objects of interest to {symbol: (instance index, value)}."""
+        objects = {}
+        for oid, value in var_binds:
+            oid = tuple(oid)
+            for length in range(len(oid) - 1, 0, -1):
+                symbol = self.objects.get(oid[:length])
+                if symbol is not None:
+                    objects[symbol] = (oid[length:], decode(self.mib_store.get_decoder("PDU-MIB", symbol), value))
+                    break
+        return objects
+
+
+async def async_get_trap_receiver(hass: HomeAssistant, port: int) -> RaritanPDUTrapReceiver:
+    """Return the trap receiver shared by the config entries listening on the given port, starting it if needed."""
+    receivers = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_TRAP_RECEIVERS, {})
+    if port not in receivers:
+        receiver = RaritanPDUTrapReceiver(hass, port)
+        await receiver.start()
+        receivers[port] = receiver
+    return receivers[port]
+
+
+def unregister_trap_receivers(hass: HomeAssistant, key: str):
+    """Stop routing notifications to a config entry, closing receivers no entry listens on anymore."""
+    receivers = hass.data.get(DOMAIN, {}).get(DATA_TRAP_RECEIVERS, {})
+    for port, receiver in list(receivers.items()):
+        receiver.unregister(key)
+        if not receiver.addresses:
+            receiver.stop()
+            receivers.pop(port)
@@ -0,0 +1 @@
+"""Tests for the Raritan PDU integration."""
@@ -0,0 +1,24 @@
+"""Fixtures for the Raritan PDU tests, against the simulated PDU of the benchmarks."""
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+@pytest.fixture(autouse=True)
+def config_dir(monkeypatch):
+    """Run from the repository root, the MIB directories are relative to the Home Assistant configuration."""
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for all tests, like in Home Assistant, the SNMP engine is shared by the whole process."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
@@ -0,0 +1,97 @@
+"""Tests of the data log import against a simulated PDU."""
+import pytest
+
+from custom_components.raritan.const import TABLE_OUTLET, TABLE_INLET, TABLE_INLET_POLE
+from custom_components.raritan.data_log import RaritanPDUDataLog
+from custom_components.raritan.mib import async_get_mib_store
+from custom_components.raritan.snmp import SNMPManager
+from simulator import SimulatedRaritanPDU, start_agent
+
+DATA_LOG_SIZE = 10
+START = 1_700_000_000  # timestamp of the first simulated entry
+ROWS = {
+    TABLE_OUTLET: [(1,), (2,)],
+    TABLE_INLET: [(1,)],
+    TABLE_INLET_POLE: [(1, 1), (1, 2), (1, 3)],
+}
+
+
+def test_candidate_indexes_first_import():
+    data_log = RaritanPDUDataLog(None)
+
+    # Nothing imported yet, the whole ring from the oldest entry after the latest one
+    assert data_log.get_candidate_indexes(DATA_LOG_SIZE, 4) == [5, 6, 7, 8, 9, 10, 1, 2, 3, 4]
+
+
+def test_candidate_indexes_wrap_around():
+    data_log = RaritanPDUDataLog(None)
+    data_log.last_index = 8
+
+    assert data_log.get_candidate_indexes(DATA_LOG_SIZE, 3) == [9, 10, 1, 2, 3]
+    assert data_log.get_candidate_indexes(DATA_LOG_SIZE, 10) == [9, 10]
+
+
+def test_candidate_indexes_up_to_date():
+    data_log = RaritanPDUDataLog(None)
+    data_log.last_index = 3
+
+    assert data_log.get_candidate_indexes(DATA_LOG_SIZE, 3) == []
+
+
+async def fetch_entries(sim: SimulatedRaritanPDU, data_log: RaritanPDUDataLog, max_repetitions: int) -> list:
+    transport, _, port = await start_agent(sim)
+    try:
+        data_log.snmp_manager = SNMPManager("127.0.0.1", port, "public", "private")
+        return await data_log.fetch_new_entries(ROWS, True, max_repetitions)
+    finally:
+        transport.close()
+
+
+@pytest.mark.parametrize("max_repetitions", [16, 0])
+def test_fetch_new_entries_wrap_around(event_loop, max_repetitions):
+    mib_store = event_loop.run_until_complete(async_get_mib_store())
+    sim = SimulatedRaritanPDU(mib_store.mib_builder, outlets=2, poles=3, data_log_size=DATA_LOG_SIZE)
+    data_log = RaritanPDUDataLog(None)
+
+    # The ring wrapped, the oldest entries were overwritten before the first import
+    for i in range(14):
+        sim.append_data_log(START + i * 60)
+    entries = event_loop.run_until_complete(fetch_entries(sim, data_log, max_repetitions))
+
+    assert [entry.index for entry in entries] == [5, 6, 7, 8, 9, 10, 1, 2, 3, 4]
+    assert [entry.timestamp for entry in entries] == [START + i * 60 for i in range(4, 14)]
+    assert (data_log.last_index, data_log.last_timestamp) == (4, START + 13 * 60)
+
+    entry = entries[-1]
+    assert entry.measurements[("outlet_2", "current")] == (520, 520, 520)
+    assert entry.measurements[("inlet_1", "active_power")] == (101, 101, 101)
+    assert entry.measurements[("inlet_1_pole_3", "current")] == (530, 530, 530)
+    assert entry.counters[("outlet_1", "watt_hours")] == 1000
+    assert entry.counters[("inlet_1", "active_energy")] == 1000
+
+    # Only the entries recorded since, across the end of the ring
+    for i in range(14, 21):
+        sim.append_data_log(START + i * 60)
+    entries = event_loop.run_until_complete(fetch_entries(sim, data_log, max_repetitions))
+
+    assert [entry.index for entry in entries] == [5, 6, 7, 8, 9, 10, 1]
+    assert [entry.timestamp for entry in entries] == [START + i * 60 for i in range(14, 21)]
+
+    entries = event_loop.run_until_complete(fetch_entries(sim, data_log, max_repetitions))
+    assert entries == []
+
+
+def test_fetch_new_entries_after_pdu_reset(event_loop):
+    mib_store = event_loop.run_until_complete(async_get_mib_store())
+    sim = SimulatedRaritanPDU(mib_store.mib_builder, outlets=2, poles=3, data_log_size=DATA_LOG_SIZE)
+    data_log = RaritanPDUDataLog(None)
+    data_log.last_index = 2
+    data_log.last_timestamp = START + 5 * 60
+
+    # The PDU cleared its log and started over, entries no newer than the imported ones are skipped
+    for i in range(8):
+        sim.append_data_log(START + i * 60)
+    entries = event_loop.run_until_complete(fetch_entries(sim, data_log, 16))
+
+    assert [entry.index for entry in entries] == [7, 8]
+    assert [entry.timestamp for entry in entries] == [START + 6 * 60, START + 7 * 60]
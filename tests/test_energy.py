@@ -0,0 +1,40 @@
+"""Tests of the energy calculations."""
+import pytest
+
+from custom_components.raritan.energy import get_counter_delta, integrate_power, get_max_integration_gap, \
+    MAX_INTEGRATION_GAP_POLLS
+
+
+def test_counter_delta():
+    assert get_counter_delta(1000, 1250) == 250
+    assert get_counter_delta(1000, 1000) == 0
+
+
+def test_counter_delta_after_reset():
+    # The counter restarted from 0, the energy since the reset still counts and nothing is subtracted
+    assert get_counter_delta(1000, 40) == 40
+    assert get_counter_delta(1000, 0) == 0
+
+
+def test_integrate_power():
+    # 100 W rising to 200 W over 36 s, the trapezoid gives 150 W for 0.01 h
+    assert integrate_power(100.0, 200.0, 1000.0, 1036.0, 60.0) == pytest.approx(1.5)
+
+
+def test_integrate_power_without_previous_reading():
+    assert integrate_power(100.0, 200.0, 0.0, 1036.0, 60.0) == 0.0
+    assert integrate_power(100.0, 200.0, 1000.0, 0.0, 60.0) == 0.0
+
+
+def test_integrate_power_timestamps_not_increasing():
+    assert integrate_power(100.0, 200.0, 1000.0, 1000.0, 60.0) == 0.0
+    assert integrate_power(100.0, 200.0, 1036.0, 1000.0, 60.0) == 0.0
+
+
+def test_integrate_power_gaps():
+    max_gap = get_max_integration_gap(5)
+    assert max_gap == 5 * MAX_INTEGRATION_GAP_POLLS
+
+    # Up to the gap the readings are integrated, beyond it the PDU was not polled and nothing is guessed
+    assert integrate_power(360.0, 360.0, 1000.0, 1000.0 + max_gap, max_gap) == pytest.approx(5.0)
+    assert integrate_power(360.0, 360.0, 1000.0, 1000.0 + max_gap + 1, max_gap) == 0.0
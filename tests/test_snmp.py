@@ -0,0 +1,52 @@
+"""Tests of the SNMP requests against a simulated PDU."""
+from custom_components.raritan.mib import async_get_mib_store
+from custom_components.raritan.snmp import SNMPManager, INITIAL_CHUNK_SIZE
+from simulator import SimulatedRaritanPDU, start_agent
+
+OUTLETS = 48
+OUTLET_LABELS = [f"Outlet {outlet}" for outlet in range(1, OUTLETS + 1)]
+OUTLET_LABEL_OIDS = [["PDU-MIB", "outletLabel", outlet] for outlet in range(1, OUTLETS + 1)]
+
+
+async def get_outlet_labels(max_response_size: int | None, times: int = 1) -> tuple[list, SNMPManager, list[int]]:
+    """GET the label of every outlet, returning the labels, the manager and the requests of every GET."""
+    mib_store = await async_get_mib_store()
+    sim = SimulatedRaritanPDU(mib_store.mib_builder, outlets=OUTLETS)
+    transport, protocol, port = await start_agent(sim, max_response_size=max_response_size)
+    try:
+        snmp_manager = SNMPManager("127.0.0.1", port, "public", "private")
+        requests = []
+        for _ in range(times):
+            start = protocol.requests
+            labels = await snmp_manager.snmp_get(*OUTLET_LABEL_OIDS)
+            requests.append(protocol.requests - start)
+        return labels, snmp_manager, requests
+    finally:
+        transport.close()
+
+
+def test_snmp_get_fits_one_chunk(event_loop):
+    labels, snmp_manager, requests = event_loop.run_until_complete(get_outlet_labels(None))
+
+    assert labels == OUTLET_LABELS
+    assert requests == [-(-OUTLETS // INITIAL_CHUNK_SIZE)]
+    assert snmp_manager.chunk_size > INITIAL_CHUNK_SIZE
+
+
+def test_snmp_get_splits_too_big_chunks(event_loop):
+    # Room for a few labels per response, the agent answers larger GETs with tooBig
+    labels, snmp_manager, requests = event_loop.run_until_complete(get_outlet_labels(300))
+
+    assert labels == OUTLET_LABELS
+    assert snmp_manager.chunk_size < INITIAL_CHUNK_SIZE
+    assert snmp_manager.chunk_size_limit < INITIAL_CHUNK_SIZE
+    assert requests[0] > -(-OUTLETS // INITIAL_CHUNK_SIZE)
+
+
+def test_snmp_get_learns_the_chunk_size(event_loop):
+    labels, snmp_manager, requests = event_loop.run_until_complete(get_outlet_labels(300, times=10))
+
+    # The chunk size settles below the size known too big, later GETs fit without tooBig responses
+    assert labels == OUTLET_LABELS
+    assert snmp_manager.chunk_size == snmp_manager.chunk_size_limit
+    assert requests[-2:] == [-(-OUTLETS // snmp_manager.chunk_size)] * 2